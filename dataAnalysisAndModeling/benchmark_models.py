@@ -0,0 +1,152 @@
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import LeaveOneGroupOut
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.svm import SVC
+from threadpoolctl import threadpool_limits
+
+from dataset_store import DEFAULT_DATASET_FOLDER
+from extract_features import DEFAULT_CACHE_FOLDER, extract_movement
+
+try:
+    from xgboost import XGBClassifier
+except ImportError:
+    XGBClassifier = None
+
+# -----------------------------------------------------------------------------
+# --- LEAVE-ONE-USER-OUT BENCHMARK ---
+# -----------------------------------------------------------------------------
+# Runs movements x models x leave-one-user-out folds as independent tasks on a process pool.
+# Every worker is limited to one BLAS/OpenMP thread and every model to n_jobs=1, so the pool
+# size is the only source of parallelism and the cores are not oversubscribed.
+# Per (movement, model) it reports accuracy / weighted F1 (mean over folds, like the notebooks),
+# fit time, predict latency per sample and pickled model size, then retrains the best model
+# (highest F1) on all users and writes its final_model_/final_scaler_/final_label_encoder_
+# triple into ml-api/final_models, where the API picks it up.
+# -----------------------------------------------------------------------------
+
+FINAL_MODELS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-api', 'final_models')
+
+
+def build_model(name):
+    """Fresh estimator for a model name; the names match the final_models file names."""
+    if name == "RandomForest": return RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=1)
+    if name == "SVM": return SVC(kernel='rbf', probability=True, random_state=42)
+    if name == "LogisticRegression": return LogisticRegression(max_iter=1000, random_state=42)
+    if name == "KNN": return KNeighborsClassifier(n_neighbors=5, n_jobs=1)
+    if name == "XGBoost": return XGBClassifier(eval_metric="mlogloss", random_state=42, n_jobs=1)
+    raise ValueError(f"Unknown model '{name}'")
+
+
+MODEL_NAMES = ["RandomForest", "SVM", "LogisticRegression", "KNN"] + (["XGBoost"] if XGBClassifier else [])
+
+
+def _limit_threads():
+    threadpool_limits(1)
+
+
+def run_fold(task):
+    """Fits one model on one fold. task = (movement, model_name, held_out_user, X, y, train_idx, test_idx)."""
+    movement, model_name, held_out_user, X, y, train_idx, test_idx = task
+    scaler = StandardScaler().fit(X[train_idx])
+    X_train, X_test = scaler.transform(X[train_idx]), scaler.transform(X[test_idx])
+
+    model = build_model(model_name)
+    start = time.perf_counter()
+    model.fit(X_train, y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+
+    return {"movement": movement, "model": model_name, "held_out_user": held_out_user,
+            "accuracy": accuracy_score(y[test_idx], y_pred),
+            "f1_score": f1_score(y[test_idx], y_pred, average="weighted"),
+            "fit_seconds": fit_seconds,
+            "predict_ms_per_sample": predict_seconds * 1000 / len(test_idx),
+            "model_bytes": len(pickle.dumps(model))}
+
+
+def benchmark(features_by_movement, model_names=None, workers=None):
+    """features_by_movement: { movement: DataFrame with feature columns, 'label' and 'user' }.
+    Returns (per-fold results, per-movement/model summary sorted by F1)."""
+    tasks = []
+    for movement, features_df in features_by_movement.items():
+        X = features_df.drop(['label', 'user'], axis=1).to_numpy()
+        y = LabelEncoder().fit_transform(features_df['label'])
+        groups = features_df['user'].to_numpy()
+        for train_idx, test_idx in LeaveOneGroupOut().split(X, y, groups):
+            for model_name in model_names or MODEL_NAMES:
+                tasks.append((movement, model_name, groups[test_idx[0]], X, y, train_idx, test_idx))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_limit_threads) as pool:
+        folds = pd.DataFrame(list(pool.map(run_fold, tasks)))
+
+    summary = (folds.groupby(["movement", "model"])
+               .agg(accuracy=("accuracy", "mean"), f1_score=("f1_score", "mean"),
+                    fit_seconds=("fit_seconds", "mean"), predict_ms_per_sample=("predict_ms_per_sample", "mean"),
+                    model_bytes=("model_bytes", "max"))
+               .reset_index()
+               .sort_values(["movement", "f1_score"], ascending=[True, False]))
+    return folds, summary
+
+
+def save_final_model(features_df, movement, model_name, output_folder=FINAL_MODELS_FOLDER):
+    """Trains `model_name` on every user of the movement and writes the triple the ml-api loads."""
+    X = features_df.drop(['label', 'user'], axis=1)
+    le = LabelEncoder().fit(features_df['label'])
+    final_scaler = StandardScaler().fit(X)
+    model = build_model(model_name)
+    model.fit(final_scaler.transform(X), le.transform(features_df['label']))
+
+    os.makedirs(output_folder, exist_ok=True)
+    for prefix, asset in (("final_model", model), ("final_scaler", final_scaler), ("final_label_encoder", le)):
+        with open(os.path.join(output_folder, f"{prefix}_{movement}_{model_name}.pkl"), "wb") as f:
+            pickle.dump(asset, f)
+    print(f"     ✅ Saved: final_model_{movement}_{model_name}.pkl -> {output_folder}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leave-one-user-out benchmark of the movement classifiers.")
+    parser.add_argument("dataset_root", nargs="?", default=DEFAULT_DATASET_FOLDER)
+    parser.add_argument("--movement", action="append", help="Movement to benchmark (repeatable, default: all)")
+    parser.add_argument("--model", action="append", choices=MODEL_NAMES, help="Model to benchmark (repeatable, default: all)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_FOLDER)
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: all cores)")
+    parser.add_argument("--results", default="benchmark_results.csv", help="Per-fold results are written here")
+    parser.add_argument("--save", choices=["winner", "all", "none"], default="winner",
+                        help="Which models to retrain on all users and write to --output-dir")
+    parser.add_argument("--output-dir", default=FINAL_MODELS_FOLDER)
+    args = parser.parse_args()
+
+    movements = args.movement or sorted(entry for entry in os.listdir(args.dataset_root)
+                                        if os.path.isdir(os.path.join(args.dataset_root, entry)))
+    features_by_movement = {movement: extract_movement(args.dataset_root, movement, args.cache_dir, args.workers)
+                            for movement in movements}
+
+    start = time.perf_counter()
+    folds, summary = benchmark(features_by_movement, args.model, args.workers)
+    folds.to_csv(args.results, index=False)
+    print(f"\n--- Leave-one-user-out results ({len(folds)} fits in {time.perf_counter() - start:.1f}s) ---")
+    print(summary.to_string(index=False))
+
+    if args.save == "none": return
+    print("\n--- Training final models on all users ---")
+    for movement, ranking in summary.groupby("movement", sort=False):
+        model_names = ranking["model"] if args.save == "all" else ranking["model"].iloc[:1]
+        for model_name in model_names:
+            save_final_model(features_by_movement[movement], movement, model_name, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import time
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# --- BLE QUATERNION DECODER ---
+# -----------------------------------------------------------------------------
+# Each FF64 notification carries one frame: per sensor 4 little-endian int16 values (w, x, y, z),
+# scaled by 1/32768. A notification is decoded with one vectorized multiply straight into a
+# preallocated ring buffer, so the BLE callback neither loops over the values nor allocates
+# Quaternion objects, and keeps up with the full notification rate of several devices.
+#
+#   buffer = QuaternionRingBuffer()     # 10 sensors; num_sensors=None takes it from the first packet
+#   await client.start_notify(ORIENTATION_UUID, lambda sender, data: buffer.append_packet(data))
+#   ...
+#   frames = buffer.to_frames_list()      # [[x, y, z, w] * sensors, ...] as in the pickles
+# -----------------------------------------------------------------------------
+
+NUM_SENSORS = 10
+INT16_SCALE = np.float32(1.0 / 32768.0)
+# The pickles store every sensor as x, y, z, w
+_WXYZ_TO_XYZW = [1, 2, 3, 0]
+
+
+def decode_packet(data):
+    """One notification -> (sensors, 4) float32 array in w, x, y, z order."""
+    return np.frombuffer(data, dtype='<i2').reshape(-1, 4) * INT16_SCALE
+
+
+def frames_to_list(quats):
+    """(frames, sensors, 4) w/x/y/z array -> the pickle 'data' layout (one x, y, z, w list per frame)."""
+    quats = np.asarray(quats, dtype=np.float64)
+    return quats[..., _WXYZ_TO_XYZW].reshape(len(quats), quats.shape[1] * 4).tolist()
+
+
+class QuaternionRingBuffer:
+    """Fixed-size buffer of decoded frames plus their arrival times; the oldest frames are
+    overwritten once `capacity` frames are held. Packets of the wrong size are counted and dropped,
+    with a warning for the first one. With num_sensors=None the first packet sets the sensor count."""
+
+    def __init__(self, capacity=4096, num_sensors=NUM_SENSORS):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.warned = False
+        self._allocate(num_sensors)
+        self.clear()
+
+    def _allocate(self, num_sensors):
+        self.num_sensors = num_sensors
+        self.packet_size = None if num_sensors is None else num_sensors * 4 * 2
+        self.data = None if num_sensors is None else np.zeros((self.capacity, num_sensors, 4), dtype=np.float32)
+
+    def clear(self):
+        self.count = 0      # frames appended since the last clear, including overwritten ones
+        self.dropped = 0    # malformed packets
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append_packet(self, data, timestamp=None):
+        """Decodes one notification into the next slot. Meant to be called from the BLE callback."""
+        if self.packet_size is None and len(data) and len(data) % 8 == 0:
+            self._allocate(len(data) // 8)
+        if len(data) != self.packet_size:
+            self.dropped += 1
+            if not self.warned:
+                self.warned = True
+                print(f"⚠️ Dropping FF64 packets of {len(data)} bytes, expected {self.packet_size} ({self.num_sensors} sensors)"
+                      + (f"; is this a {len(data) // 8}-sensor device?" if len(data) % 8 == 0 else ""))
+            return
+        slot = self.count % self.capacity
+        np.multiply(np.frombuffer(data, dtype='<i2').reshape(self.num_sensors, 4), INT16_SCALE, out=self.data[slot])
+        self.timestamps[slot] = time.monotonic() if timestamp is None else timestamp
+        self.count += 1
+
+    def append(self, frame, timestamp):
+        """Stores an already decoded (sensors, 4) frame."""
+        if self.data is None:
+            self._allocate(len(frame))
+        slot = self.count % self.capacity
+        self.data[slot] = frame
+        self.timestamps[slot] = timestamp
+        self.count += 1
+
+    def _order(self, n):
+        start = self.count - n
+        return np.arange(start, self.count) % self.capacity
+
+    def latest(self, n=None):
+        """The last `n` frames (all held frames by default), oldest first: ((n, sensors, 4), (n,) timestamps)."""
+        if self.data is None:
+            return np.zeros((0, 0, 4), dtype=np.float32), np.zeros(0)
+        n = len(self) if n is None else min(n, len(self))
+        order = self._order(n)
+        return self.data[order], self.timestamps[order]
+
+    def frames(self):
+        return self.latest()[0]
+
+    def to_frames_list(self):
+        return frames_to_list(self.frames())
@@ -0,0 +1,333 @@
+import argparse
+import asyncio
+import base64
+import json
+import time
+import numpy as np
+from ble_decoder import NUM_SENSORS, QuaternionRingBuffer
+
+# -----------------------------------------------------------------------------
+# --- MULTI-DEVICE CAPTURE DAEMON ---
+# -----------------------------------------------------------------------------
+# Keeps every device (jacket + trousers) connected for the whole session instead of reconnecting
+# for each take. Every notification is stamped with its arrival time (time.monotonic()) as it is
+# decoded into the device's ring buffer. A resampler puts all streams on one common clock:
+# every 1 / OUTPUT_RATE seconds, each device is slerp-interpolated between the two samples around
+# the tick. The aligned frames (jacket sensors followed by trousers sensors) are kept in a rolling
+# buffer and pushed to stream subscribers. Ticks trail real time by LATENCY so that both streams
+# already have a sample after each tick.
+# While a device is disconnected or silent no frames are produced; it is reconnected automatically.
+#
+# Recorders talk to the daemon over a local TCP socket with one JSON object per line:
+#   {"cmd": "status"}                 -> devices, connection state, measured rates
+#   {"cmd": "record", "seconds": 6}   -> the aligned frames of the next 6 seconds
+#   {"cmd": "stream"}                 -> every aligned frame as it is produced (a subscriber that falls
+#                                        more than SUBSCRIBER_QUEUE batches behind skips the oldest ones)
+#
+#   python capture_daemon.py                                   # jacket + trousers below
+#   python capture_daemon.py --device jacket=BE5663ED-E011-B0C5-C8F7-2829764800F7
+#   python capture_daemon.py --device jacket=BE5663ED-E011-B0C5-C8F7-2829764800F7 --device gloves=AA:BB:CC:DD:EE:FF:4
+# A device sends 8 bytes per sensor; packets of another size are dropped, counted in "status",
+# and the first one is reported on the console.
+# -----------------------------------------------------------------------------
+
+DEVICES = {
+    "jacket": "BE5663ED-E011-B0C5-C8F7-2829764800F7",
+    "trousers": "6BED8222-E5E9-9F63-6890-9C57DDB007FD",
+}
+ORIENTATION_UUID = "FF64"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+OUTPUT_RATE = 20          # Hz, the rate the recorders produced
+LATENCY = 0.15            # seconds the common clock trails arrival
+STALE_AFTER = 0.5         # seconds without a packet before a device counts as silent
+RECONNECT_DELAY = 2.0     # seconds
+OUTPUT_SECONDS = 120      # aligned frames kept for "record"
+HISTORY_FRAMES = 64       # samples per device the resampler looks back over
+MAX_MESSAGE = 2 ** 26     # bytes per JSON line
+SUBSCRIBER_QUEUE = 64     # batches buffered per stream subscriber (~3 s); a slower reader loses the oldest
+
+
+def slerp(q0, q1, weight):
+    """Vectorized spherical interpolation between (..., 4) quaternion arrays; weight (...) in [0, 1].
+    Inputs are renormalized (the int16 packets are not exactly unit); all-zero quaternions stay zero."""
+    norms0 = np.linalg.norm(q0, axis=-1, keepdims=True)
+    norms1 = np.linalg.norm(q1, axis=-1, keepdims=True)
+    q0 = q0 / np.where(norms0 == 0, 1, norms0)
+    q1 = q1 / np.where(norms1 == 0, 1, norms1)
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0, -q1, q1)                    # shortest path
+    theta = np.arccos(np.clip(np.abs(dot), 0.0, 1.0))
+    sin_theta = np.sin(theta)
+    weight = np.asarray(weight)[..., None]
+    close = sin_theta < 1e-6
+    safe = np.where(close, 1.0, sin_theta)
+    w0 = np.where(close, 1 - weight, np.sin((1 - weight) * theta) / safe)
+    w1 = np.where(close, weight, np.sin(weight * theta) / safe)
+    result = w0 * q0 + w1 * q1
+    norms = np.linalg.norm(result, axis=-1, keepdims=True)
+    return result / np.where(norms == 0, 1, norms)
+
+
+def encode_frames(frames, timestamps):
+    frames = np.ascontiguousarray(frames, dtype='<f4')
+    return {"shape": list(frames.shape),
+            "frames": base64.b64encode(frames.tobytes()).decode("ascii"),
+            "timestamps": base64.b64encode(np.ascontiguousarray(timestamps, dtype='<f8').tobytes()).decode("ascii")}
+
+
+def decode_frames(message):
+    """Inverse of encode_frames: ((frames, sensors, 4) float32 w/x/y/z, (frames,) timestamps)."""
+    frames = np.frombuffer(base64.b64decode(message["frames"]), dtype='<f4').reshape(message["shape"])
+    return frames, np.frombuffer(base64.b64decode(message["timestamps"]), dtype='<f8')
+
+
+# -----------------------------------------------------------------------------
+# --- DAEMON ---
+# -----------------------------------------------------------------------------
+
+class DeviceStream:
+    """One device: its connection (re-established forever) and its buffer of timestamped frames."""
+
+    def __init__(self, name, address, num_sensors=NUM_SENSORS):
+        self.name = name
+        self.address = address
+        self.buffer = QuaternionRingBuffer(num_sensors=num_sensors)
+        self.connected = False
+
+    def handle(self, sender, data):
+        self.buffer.append_packet(data, time.monotonic())
+
+    async def run(self):
+        from bleak import BleakClient
+        while True:
+            disconnected = asyncio.Event()
+            try:
+                async with BleakClient(self.address, disconnected_callback=lambda client: disconnected.set()) as client:
+                    await client.start_notify(ORIENTATION_UUID, self.handle)
+                    self.connected = True
+                    print(f"🔌 {self.name} connected ({self.address})")
+                    await disconnected.wait()
+            except Exception as e:
+                print(f"❌ {self.name}: {e}")
+            if self.connected:
+                print(f"⚠️ {self.name} disconnected, reconnecting...")
+            self.connected = False
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def last_arrival(self):
+        return self.buffer.latest(1)[1][0] if len(self.buffer) else None
+
+    def rate(self):
+        stamps = self.buffer.latest(HISTORY_FRAMES)[1]
+        return (len(stamps) - 1) / (stamps[-1] - stamps[0]) if len(stamps) > 1 and stamps[-1] > stamps[0] else 0.0
+
+    def resample(self, ticks):
+        """(ticks, sensors, 4) frames of this device at the given clock times."""
+        frames, stamps = self.buffer.latest(HISTORY_FRAMES)
+        upper = np.clip(np.searchsorted(stamps, ticks, side='right'), 1, len(stamps) - 1)
+        lower = upper - 1
+        span = stamps[upper] - stamps[lower]
+        weight = np.clip((ticks - stamps[lower]) / np.where(span > 0, span, 1), 0.0, 1.0)
+        return slerp(frames[lower], frames[upper], weight[:, None])
+
+
+class CaptureDaemon:
+
+    def __init__(self, devices, rate=OUTPUT_RATE, latency=LATENCY):
+        # devices: name -> address, or name -> (address, number of sensors)
+        self.streams = [DeviceStream(name, *(device if isinstance(device, tuple) else (device,)))
+                        for name, device in devices.items()]
+        self.rate = rate
+        self.latency = latency
+        self.output = QuaternionRingBuffer(int(OUTPUT_SECONDS * rate), sum(s.buffer.num_sensors for s in self.streams))
+        self.subscribers = set()
+
+    def devices(self):
+        return [[stream.name, stream.buffer.num_sensors] for stream in self.streams]
+
+    def _ready(self, now):
+        for stream in self.streams:
+            last = stream.last_arrival()
+            if not stream.connected or len(stream.buffer) < 2 or now - last > STALE_AFTER:
+                return False
+        return True
+
+    async def resample_loop(self):
+        period = 1.0 / self.rate
+        next_tick = None
+        while True:
+            await asyncio.sleep(period)
+            now = time.monotonic()
+            if not self._ready(now):
+                next_tick = None
+                continue
+            if next_tick is None:
+                next_tick = now - self.latency
+            count = int((now - self.latency - next_tick) // period) + 1
+            if count <= 0:
+                continue
+            ticks = next_tick + period * np.arange(count)
+            next_tick = ticks[-1] + period
+            frames = np.concatenate([stream.resample(ticks) for stream in self.streams], axis=1)
+            for frame, tick in zip(frames, ticks):
+                self.output.append(frame, tick)
+            for subscriber in self.subscribers:
+                if subscriber.full():
+                    subscriber.get_nowait()
+                subscriber.put_nowait((frames, ticks))
+
+    def status(self):
+        now = time.monotonic()
+        return {"devices": [{"name": s.name, "address": s.address, "connected": s.connected,
+                             "packets": s.buffer.count, "dropped": s.buffer.dropped, "rate_hz": round(s.rate(), 2),
+                             "last_packet_s": None if s.last_arrival() is None else round(now - s.last_arrival(), 3)}
+                            for s in self.streams],
+                "synchronized": self._ready(now), "output_rate_hz": self.rate, "frames": self.output.count,
+                "subscribers": len(self.subscribers)}
+
+    async def record(self, seconds):
+        if seconds <= 0 or seconds * self.rate > self.output.capacity:
+            return {"error": f"seconds must be in (0, {self.output.capacity / self.rate:.0f}]"}
+        start = time.monotonic()
+        end = start + seconds
+        await asyncio.sleep(seconds + self.latency + 2.0 / self.rate)
+        frames, ticks = self.output.latest()
+        selected = (ticks >= start) & (ticks < end)
+        if not selected.any():
+            return {"error": "no synchronized frames, is every device connected?"}
+        missing = int(round(seconds * self.rate)) - int(selected.sum())
+        return {"devices": self.devices(), "rate": self.rate, "missing": max(missing, 0),
+                **encode_frames(frames[selected], ticks[selected])}
+
+    async def _stream(self, writer):
+        pending = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+        self.subscribers.add(pending)
+        try:
+            writer.write(json.dumps({"devices": self.devices(), "rate": self.rate}).encode() + b"\n")
+            while True:
+                frames, ticks = await pending.get()
+                writer.write(json.dumps(encode_frames(frames, ticks)).encode() + b"\n")
+                await writer.drain()
+        finally:
+            self.subscribers.discard(pending)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                command = request.get("cmd")
+                if command == "stream":
+                    await self._stream(writer)
+                    return
+                if command == "status":
+                    reply = self.status()
+                elif command == "record":
+                    reply = await self.record(float(request.get("seconds", 0)))
+                else:
+                    reply = {"error": f"unknown command '{command}'"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            print(f"⚠️ Client dropped: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_MESSAGE)
+        print(f"--- Capture daemon listening on {host}:{port} ({', '.join(s.name for s in self.streams)} @ {self.rate} Hz) ---")
+        await asyncio.gather(server.serve_forever(), self.resample_loop(), *(stream.run() for stream in self.streams))
+
+
+# -----------------------------------------------------------------------------
+# --- CLIENT ---
+# -----------------------------------------------------------------------------
+
+async def request(command, host=DEFAULT_HOST, port=DEFAULT_PORT, **params):
+    """Sends one command to the daemon and returns its reply; raises RuntimeError on an error reply."""
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_MESSAGE)
+    try:
+        writer.write(json.dumps({"cmd": command, **params}).encode() + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+    finally:
+        writer.close()
+    if "error" in reply:
+        raise RuntimeError(reply["error"])
+    return reply
+
+
+async def record(seconds, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Aligned frames of the next `seconds`: ((frames, sensors, 4) w/x/y/z, timestamps, [[device, sensors], ...])."""
+    reply = await request("record", host, port, seconds=seconds)
+    if reply["missing"]:
+        print(f"⚠️ {reply['missing']} frames missing (a device dropped out during the take)")
+    frames, timestamps = decode_frames(reply)
+    return frames, timestamps, reply["devices"]
+
+
+async def stream(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Yields (frames, timestamps) batches of aligned frames as the daemon produces them."""
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_MESSAGE)
+    try:
+        writer.write(b'{"cmd": "stream"}\n')
+        await writer.drain()
+        await reader.readline()
+        while line := await reader.readline():
+            yield decode_frames(json.loads(line))
+    finally:
+        writer.close()
+
+
+def split_devices(frames, devices):
+    """{device: (frames, its sensors, 4)} from aligned frames and the daemon's device list."""
+    parts, start = {}, 0
+    for name, num_sensors in devices:
+        parts[name] = frames[:, start:start + num_sensors]
+        start += num_sensors
+    return parts
+
+
+def require_devices(names, required):
+    """Raises RuntimeError naming the daemon's devices unless `names` (the daemon's device names)
+    include every one of `required`."""
+    missing = [name for name in required if name not in names]
+    if missing:
+        raise RuntimeError(f"the capture daemon has no {' or '.join(missing)} device "
+                           f"(it captures: {', '.join(names) or 'nothing'}); start it with "
+                           + " ".join(f"--device {name}=..." for name in required))
+
+
+def parse_device(spec):
+    """'NAME=ADDRESS[:SENSORS]' -> (name, (address, sensors)). Linux addresses contain colons
+    themselves (AA:BB:CC:DD:EE:FF), so there the sensor count is a seventh colon group."""
+    name, _, address = spec.partition("=")
+    groups = address.split(":")
+    num_sensors = NUM_SENSORS
+    if len(groups) in (2, 7) and groups[-1].isdigit():
+        address, num_sensors = ":".join(groups[:-1]), int(groups[-1])
+    if not name or not address or num_sensors <= 0:
+        raise argparse.ArgumentTypeError(f"expected NAME=ADDRESS[:SENSORS], got '{spec}'")
+    return name, (address, num_sensors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keeps the BLE devices connected and serves synchronized frames.")
+    parser.add_argument("--device", action="append", type=parse_device, metavar="NAME=ADDRESS[:SENSORS]",
+                        help=f"Device to capture (repeatable, in frame order; {NUM_SENSORS} sensors unless given); "
+                             "default: jacket and trousers")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rate", type=float, default=OUTPUT_RATE, help="Output frames per second")
+    args = parser.parse_args()
+
+    devices = dict(args.device) if args.device else DEVICES
+    try:
+        asyncio.run(CaptureDaemon(devices, args.rate).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("--- Capture daemon stopped ---")
+
+
+if __name__ == "__main__":
+    main()
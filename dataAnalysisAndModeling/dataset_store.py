@@ -0,0 +1,145 @@
+import json
+import os
+import numpy as np
+
+from recording_format import INT16_SCALE, read_recording, pkl_to_recording
+
+# -----------------------------------------------------------------------------
+# --- CONSOLIDATED DATASET STORE ---
+# -----------------------------------------------------------------------------
+# One store per movement instead of hundreds of small files:
+#
+#   <store>/<Movement>.frames.npy    all recordings back to back, (total frames, sensors, 4) w/x/y/z,
+#                                    int16 (value / 32768) or float32
+#   <store>/<Movement>.index.json    one row per recording: user, label, recording, recorded_at,
+#                                    offset, n_frames (columns kept as lists)
+#
+# The frame array is memory-mapped, so opening a movement only parses the index and a recording
+# is a slice of the map. Label folders starting with 'tpose' and non-movement files (npose_*)
+# are left out, like in the notebooks.
+# -----------------------------------------------------------------------------
+
+DEFAULT_DATASET_FOLDER = "ThesisDataSet"
+DEFAULT_STORE_FOLDER = "ThesisDataSetStore"
+INDEX_COLUMNS = ("user", "label", "recording", "recorded_at", "offset", "n_frames")
+
+
+def movement_recordings(movement_path):
+    """Yields (user, label, filename, path) for every take of a movement, preferring .qrec over .pkl."""
+    for user_id in sorted(os.listdir(movement_path)):
+        user_path = os.path.join(movement_path, user_id)
+        if not os.path.isdir(user_path): continue
+        for label_folder in sorted(os.listdir(user_path)):
+            label_path = os.path.join(user_path, label_folder)
+            if not os.path.isdir(label_path) or label_folder.startswith('tpose'): continue
+            takes = {}
+            for filename in sorted(os.listdir(label_path)):
+                name, ext = os.path.splitext(filename)
+                if filename.startswith("movement_") and ext in (".pkl", ".qrec"):
+                    if ext == ".qrec" or name not in takes:
+                        takes[name] = filename
+            for name, filename in sorted(takes.items()):
+                yield user_id, label_folder, name, os.path.join(label_path, filename)
+
+
+def _load_take(path):
+    """Returns (data, dtype, recorded_at) with data being int16 raw values or float32 w/x/y/z."""
+    if path.endswith(".qrec"):
+        recording = read_recording(path, mmap=False)
+        return recording.data, recording.meta["dtype"], recording.meta.get("recorded_at")
+    quats, meta, dtype = pkl_to_recording(path)
+    if dtype == "int16":
+        return np.round(quats * INT16_SCALE).astype(np.int16), dtype, meta["recorded_at"]
+    return quats.astype(np.float32), dtype, meta["recorded_at"]
+
+
+def build_movement_store(dataset_root, movement, store_root=DEFAULT_STORE_FOLDER):
+    """Consolidates every take of `movement` into <store_root>/<movement>.frames.npy + .index.json."""
+    takes, index = [], {column: [] for column in INDEX_COLUMNS}
+    offset = 0
+    for user_id, label, name, path in movement_recordings(os.path.join(dataset_root, movement)):
+        data, dtype, recorded_at = _load_take(path)
+        if len(data) == 0: continue
+        takes.append((data, dtype))
+        for column, value in zip(INDEX_COLUMNS, (user_id, label, name, recorded_at, offset, len(data))):
+            index[column].append(value)
+        offset += len(data)
+
+    if not takes:
+        print(f"❌ No recordings found for {movement} in '{dataset_root}'")
+        return 0
+    # int16 only if every take is lossless as int16, otherwise everything goes to float32
+    if all(dtype == "int16" for _, dtype in takes):
+        dtype, frames = "int16", np.concatenate([data for data, _ in takes])
+    else:
+        dtype = "float32"
+        frames = np.concatenate([data / INT16_SCALE if kind == "int16" else data for data, kind in takes]).astype(np.float32)
+
+    os.makedirs(store_root, exist_ok=True)
+    np.save(os.path.join(store_root, f"{movement}.frames.npy"), np.ascontiguousarray(frames))
+    with open(os.path.join(store_root, f"{movement}.index.json"), "w") as f:
+        json.dump(dict(index, movement=movement, dtype=dtype, num_sensors=frames.shape[1]), f)
+    print(f"✅ {movement}: {len(takes)} recordings, {len(frames)} frames ({dtype})")
+    return len(takes)
+
+
+def build_store(dataset_root=DEFAULT_DATASET_FOLDER, store_root=DEFAULT_STORE_FOLDER, movements=None):
+    movements = movements or sorted(entry for entry in os.listdir(dataset_root)
+                                    if os.path.isdir(os.path.join(dataset_root, entry)))
+    return {movement: build_movement_store(dataset_root, movement, store_root) for movement in movements}
+
+
+class MovementStore:
+    """Read side of a consolidated movement. Recordings are addressed by their row in the index."""
+
+    def __init__(self, store_root, movement, mmap=True):
+        with open(os.path.join(store_root, f"{movement}.index.json")) as f:
+            index = json.load(f)
+        self.movement = movement
+        self.dtype = index["dtype"]
+        self.frames = np.load(os.path.join(store_root, f"{movement}.frames.npy"), mmap_mode="r" if mmap else None)
+        self.users = np.array(index["user"])
+        self.labels = np.array(index["label"])
+        self.recordings = np.array(index["recording"])
+        self.recorded_at = index["recorded_at"]
+        self.offsets = np.array(index["offset"], dtype=np.int64)
+        self.n_frames = np.array(index["n_frames"], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def select(self, users=None, labels=None, exclude_users=None):
+        """Row numbers of the recordings matching all given filters."""
+        mask = np.ones(len(self), dtype=bool)
+        if users is not None: mask &= np.isin(self.users, list(users))
+        if labels is not None: mask &= np.isin(self.labels, list(labels))
+        if exclude_users is not None: mask &= ~np.isin(self.users, list(exclude_users))
+        return np.flatnonzero(mask)
+
+    def raw(self, row):
+        """The stored block of one recording (a view into the memory map)."""
+        start = self.offsets[row]
+        return self.frames[start:start + self.n_frames[row]]
+
+    def quaternions(self, row):
+        """(frames, sensors, 4) float64 w/x/y/z array of one recording, as feature_engine expects."""
+        raw = self.raw(row)
+        return raw / INT16_SCALE if self.dtype == "int16" else raw.astype(np.float64)
+
+    def iter_recordings(self, rows=None):
+        """Yields {'data', 'label', 'user', 'recording'} like the notebooks' all_movements list."""
+        for row in (range(len(self)) if rows is None else rows):
+            yield {'data': self.quaternions(row), 'label': str(self.labels[row]), 'user': str(self.users[row]),
+                   'recording': str(self.recordings[row])}
+
+
+def open_store(movement, store_root=DEFAULT_STORE_FOLDER, mmap=True):
+    return MovementStore(store_root, movement, mmap=mmap)
+
+
+if __name__ == "__main__":
+    import sys
+    # Usage: python dataset_store.py [dataset_root] [store_root] [Movement ...]
+    dataset_root = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATASET_FOLDER
+    store_root = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_STORE_FOLDER
+    build_store(dataset_root, store_root, sys.argv[3:] or None)
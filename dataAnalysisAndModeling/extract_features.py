@@ -0,0 +1,103 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-api'))
+import feature_engine
+from dataset_store import DEFAULT_DATASET_FOLDER, movement_recordings
+from recording_format import read_recording, pkl_to_recording
+
+# -----------------------------------------------------------------------------
+# --- PARALLEL FEATURE EXTRACTION ---
+# -----------------------------------------------------------------------------
+# Builds the per-movement feature table the notebooks produce (features..., label, user),
+# spreading the extraction over a process pool. Every recording's feature vector is cached
+# on disk under its file content hash and feature_engine.FEATURE_VERSION, so a rerun only
+# extracts new or changed recordings:
+#
+#   python extract_features.py ThesisDataSet --movement ShoulderAbduction --output-dir features
+# -----------------------------------------------------------------------------
+
+DEFAULT_CACHE_FOLDER = ".feature_cache"
+DEFAULT_OUTPUT_FOLDER = "features"
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def cache_path(cache_root, digest):
+    return os.path.join(cache_root, f"v{feature_engine.FEATURE_VERSION}", digest[:2], f"{digest}.npy")
+
+
+def extract_recording(path):
+    """Feature vector (in feature_engine.feature_names order) of one .pkl/.qrec recording, or None if empty."""
+    quats = read_recording(path).quaternions() if path.endswith(".qrec") else pkl_to_recording(path)[0]
+    normalized = feature_engine.normalize_by_first_frame(quats)
+    if normalized is None: return None
+    features = feature_engine.extract_features_for_movement(normalized)
+    return np.fromiter(features.values(), dtype=np.float64, count=len(features))
+
+
+def extract_movement(dataset_root, movement, cache_root=DEFAULT_CACHE_FOLDER, workers=None):
+    """Returns the feature DataFrame of one movement (feature columns, then 'label' and 'user')."""
+    rows = []
+    to_extract = []
+    for user_id, label, _, path in movement_recordings(os.path.join(dataset_root, movement)):
+        digest = file_digest(path)
+        cached = cache_path(cache_root, digest)
+        vector = np.load(cached) if os.path.exists(cached) else None
+        if vector is None: to_extract.append((len(rows), path, cached))
+        rows.append([vector, label, user_id])
+
+    if to_extract:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(to_extract) // (4 * workers))
+            vectors = pool.map(extract_recording, [path for _, path, _ in to_extract], chunksize=chunksize)
+            for (row, path, cached), vector in zip(to_extract, vectors):
+                if vector is None:
+                    print(f"⚠️  Empty recording skipped: {path}")
+                    continue
+                os.makedirs(os.path.dirname(cached), exist_ok=True)
+                np.save(cached, vector)
+                rows[row][0] = vector
+    print(f"-> {movement}: {len(rows)} recordings, {len(to_extract)} extracted, {len(rows) - len(to_extract)} from cache")
+
+    rows = [row for row in rows if row[0] is not None]
+    features_df = pd.DataFrame(np.array([row[0] for row in rows]).reshape(len(rows), -1),
+                               columns=feature_engine.feature_names())
+    features_df['label'] = [row[1] for row in rows]
+    features_df['user'] = [row[2] for row in rows]
+    return features_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extracts the feature table of every movement in parallel.")
+    parser.add_argument("dataset_root", nargs="?", default=DEFAULT_DATASET_FOLDER)
+    parser.add_argument("--movement", action="append", help="Movement to process (repeatable, default: all)")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_FOLDER, help="Writes <Movement>.csv here")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_FOLDER)
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: all cores)")
+    args = parser.parse_args()
+
+    movements = args.movement or sorted(entry for entry in os.listdir(args.dataset_root)
+                                        if os.path.isdir(os.path.join(args.dataset_root, entry)))
+    os.makedirs(args.output_dir, exist_ok=True)
+    for movement in movements:
+        start = time.perf_counter()
+        features_df = extract_movement(args.dataset_root, movement, args.cache_dir, args.workers)
+        output_path = os.path.join(args.output_dir, f"{movement}.csv")
+        features_df.to_csv(output_path, index=False)
+        print(f"✅ {output_path}: {features_df.shape[0]} rows in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from ble_decoder import NUM_SENSORS, QuaternionRingBuffer
+
+ML_API_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-api')
+sys.path.append(ML_API_FOLDER)
+import feature_engine
+
+# -----------------------------------------------------------------------------
+# --- REAL-TIME LED FEEDBACK SERVICE ---
+# -----------------------------------------------------------------------------
+# Gives LED feedback on the device while the patient moves. One BLE connection is kept for the
+# whole session, and the device pushes FF64 notifications over it (no polling). Every packet is
+# decoded into a ring buffer. Every HOP_FRAMES new frames, the last WINDOW frames go to the
+# model, which is either a final_models bundle or a Keras sequence model with its own window
+# length. Inference runs in a worker thread, so the event loop keeps receiving packets meanwhile.
+# If packets arrive faster than the model runs, the loop always takes the newest window and the
+# older ones are skipped. The verdict is written to FF65 on the same connection: at most one write
+# per LED_MIN_INTERVAL, and only when the color changes (or every LED_REFRESH seconds).
+# The round trip (arrival of the window's last packet -> LED write done) is printed every few seconds.
+#
+#   python feedback_service.py --movement ShoulderAbduction --model RandomForest
+#   python feedback_service.py --sequence-model RightArmUpToLeft_0 --correct-label 1
+# -----------------------------------------------------------------------------
+
+SENSOR_ADDRESS = "BE5663ED-E011-B0C5-C8F7-2829764800F7"   # jacket
+ORIENTATION_UUID = "FF64"
+LED_CHARACTERISTIC_UUID = "FF65"
+
+# LED commands, same bytes as the earlier tryFeedback.py sent
+LED_GREEN = "01 01 FF 00 00".encode("utf-8")
+LED_RED = "01 01 00 FF 00".encode("utf-8")
+
+WINDOW_FRAMES = 80         # frames per prediction for final_models bundles (a recorded take is ~4 s)
+HOP_FRAMES = 5             # a new prediction every 5 frames (0.25 s)
+LED_MIN_INTERVAL = 0.3     # seconds between two LED writes
+LED_REFRESH = 2.0          # seconds after which an unchanged color is written again
+REPORT_EVERY = 5.0         # seconds between latency reports
+RECONNECT_DELAY = 2.0      # seconds
+CORRECT_LABELS = ["True", "Correct", "1"]
+
+
+class FeatureModelPredictor:
+    """final_models bundle (scaler + classifier + label encoder) on the /predict features."""
+
+    def __init__(self, movement_type, model_name, window=WINDOW_FRAMES):
+        from model_registry import ModelRegistry
+        registry = ModelRegistry(os.path.join(ML_API_FOLDER, "final_models"))
+        registry.scan()
+        self.assets = registry.get(movement_type, model_name)
+        self.columns = feature_engine.feature_names(NUM_SENSORS)
+        self.window = window
+        self.name = f"{movement_type}/{model_name}"
+        # The first prediction pays for scikit-learn's lazy setup; do it before the patient moves
+        self(np.tile([1.0, 0.0, 0.0, 0.0], (window, NUM_SENSORS, 1)))
+
+    def __call__(self, quats):
+        features = feature_engine.extract_features_for_movement(feature_engine.normalize_by_first_frame(quats))
+        features_scaled = self.assets["scaler"].transform(pd.DataFrame([features], columns=self.columns))
+        prediction_encoded = self.assets["model"].predict(features_scaled)[0]
+        return str(self.assets["le"].inverse_transform([prediction_encoded])[0])
+
+
+class SequenceModelPredictor:
+    """Keras .h5 sequence model; the window is the model's sequence length."""
+
+    def __init__(self, model_name, folder=ML_API_FOLDER):
+        from sequence_models import SequenceModelRegistry
+        # One window at a time, so there is nothing to batch and no reason to wait
+        registry = SequenceModelRegistry(folder, max_batch_size=1, max_wait_ms=0)
+        registry.scan()
+        self.model = registry.get(model_name)
+        self.window = self.model.timesteps
+        self.name = model_name
+
+    def __call__(self, quats):
+        return self.model.predict(quats)[0]
+
+
+class FeedbackService:
+
+    def __init__(self, address, predictor, correct_labels=CORRECT_LABELS, hop=HOP_FRAMES):
+        self.address = address
+        self.predictor = predictor
+        self.window = predictor.window
+        self.correct_labels = set(correct_labels)
+        self.hop = hop
+        self.buffer = QuaternionRingBuffer(capacity=max(4 * self.window, 256))
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feedback-inference")
+        self.client = None
+        self.write_response = True
+        self.frames_since_prediction = 0
+        self.led_color = None
+        self.led_written = 0.0
+        self.round_trips = []
+
+    def handle(self, sender, data):
+        """FF64 notification callback: decode into the ring buffer and wake the inference loop when a prediction is due."""
+        self.buffer.append_packet(data)
+        self.frames_since_prediction += 1
+        if self.frames_since_prediction >= self.hop and len(self.buffer) >= self.window:
+            self.due.set()
+
+    async def inference_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.due.wait()
+            self.due.clear()
+            self.frames_since_prediction = 0
+            frames, stamps = self.buffer.latest(self.window)
+            try:
+                label = await loop.run_in_executor(self.executor, self.predictor, frames.astype(np.float64))
+            except Exception as e:
+                print(f"❌ Prediction failed: {e}")
+                continue
+            if await self.set_led(label in self.correct_labels, label):
+                self.round_trips.append(self.led_written - stamps[-1])
+
+    async def set_led(self, correct, label):
+        """Writes the verdict's color unless rate limited; returns whether it was written."""
+        color = LED_GREEN if correct else LED_RED
+        now = time.monotonic()
+        if now - self.led_written < LED_MIN_INTERVAL:
+            return False
+        if color == self.led_color and now - self.led_written < LED_REFRESH:
+            return False
+        if self.client is None or not self.client.is_connected:
+            return False
+        await self.client.write_gatt_char(LED_CHARACTERISTIC_UUID, color, response=self.write_response)
+        self.led_written = time.monotonic()
+        if color != self.led_color:
+            print(f"{'🟢' if correct else '🔴'} {label}")
+        self.led_color = color
+        return True
+
+    async def report_loop(self):
+        while True:
+            await asyncio.sleep(REPORT_EVERY)
+            if self.round_trips:
+                round_trips = np.array(self.round_trips) * 1000
+                self.round_trips = []
+                print(f"⏱️ Round trip p50 {np.percentile(round_trips, 50):.0f} ms, p95 {np.percentile(round_trips, 95):.0f} ms "
+                      f"({len(round_trips)} LED writes, {self.buffer.dropped} malformed packets)")
+
+    async def run(self):
+        from bleak import BleakClient
+        self.due = asyncio.Event()
+        tasks = [asyncio.create_task(self.inference_loop()), asyncio.create_task(self.report_loop())]
+        try:
+            while True:
+                disconnected = asyncio.Event()
+                try:
+                    async with BleakClient(self.address, disconnected_callback=lambda client: disconnected.set()) as client:
+                        # Write without response when the firmware allows it: no round trip per LED command
+                        led = client.services.get_characteristic(LED_CHARACTERISTIC_UUID)
+                        self.write_response = led is None or "write-without-response" not in led.properties
+                        self.buffer.clear()
+                        self.led_color = None
+                        self.client = client
+                        await client.start_notify(ORIENTATION_UUID, self.handle)
+                        print(f"🔌 Connected to {self.address}, model {self.predictor.name} (window {self.window} frames)")
+                        await disconnected.wait()
+                except Exception as e:
+                    print(f"❌ {e}")
+                if self.client is not None:
+                    print("⚠️ Disconnected, reconnecting...")
+                self.client = None
+                await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Real-time LED feedback over one persistent BLE connection.")
+    parser.add_argument("--address", default=SENSOR_ADDRESS)
+    parser.add_argument("--movement", help="Movement type of a final_models bundle, e.g. ShoulderAbduction")
+    parser.add_argument("--model", help="Model name of a final_models bundle, e.g. RandomForest")
+    parser.add_argument("--sequence-model", help="Keras .h5 model in ml-api instead, e.g. RightArmUpToLeft_0")
+    parser.add_argument("--window", type=int, default=WINDOW_FRAMES, help="Frames per prediction (final_models bundles)")
+    parser.add_argument("--hop", type=int, default=HOP_FRAMES, help="New frames between two predictions")
+    parser.add_argument("--correct-label", action="append", help=f"Label(s) shown green (default: {CORRECT_LABELS})")
+    args = parser.parse_args()
+
+    if args.sequence_model:
+        predictor = SequenceModelPredictor(args.sequence_model)
+    elif args.movement and args.model:
+        predictor = FeatureModelPredictor(args.movement, args.model, args.window)
+    else:
+        parser.error("choose a model with --movement and --model, or --sequence-model")
+
+    service = FeedbackService(args.address, predictor, args.correct_label or CORRECT_LABELS, args.hop)
+    try:
+        asyncio.run(service.run())
+    except KeyboardInterrupt:
+        print("--- Feedback service stopped ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,10 @@
 import asyncio
 import pickle
-import struct
 import os
 from bleak import BleakClient
-from pyquaternion import Quaternion
 from datetime import datetime
 import time
+from ble_decoder import QuaternionRingBuffer
 
 # -----------------------------------------------------------------------------
 # --- SETTINGS: EDIT THIS SECTION BEFORE STARTING DATA COLLECTION ---
@@ -39,14 +38,6 @@ ORIENTATION_UUID = "FF64"
 # --- CODE SECTION (Usually no need to modify) ---
 # -----------------------------------------------------------------------------
 
-def parse_quaternions_int16(data):
-    quaternions = []
-    n_sensors = len(data) // 8
-    for i in range(n_sensors):
-        q_list = [struct.unpack('<h', data[i*8+j*2:i*8+j*2+2])[0] / 32768.0 for j in range(4)]
-        quaternions.append(Quaternion(w=q_list[0], x=q_list[1], y=q_list[2], z=q_list[3]))
-    return quaternions
-
 async def main():
     print("--- Advanced Batch Data Recording Script ---")
     
@@ -61,6 +52,11 @@ async def main():
     print(f"Recordings will be saved to: {save_path}")
     print("-" * 30)
 
+    # Decoded frames are written into one preallocated buffer (see ble_decoder.py); the sensor count
+    # comes from the first packet, as the device sends it
+    received_data = QuaternionRingBuffer(num_sensors=None)
+    def data_handler(sender, data): received_data.append_packet(data)
+
     try:
         async with BleakClient(DEVICE_NAME) as client:
             print(f"🔌 Connected to device: {DEVICE_NAME}.")
@@ -69,21 +65,20 @@ async def main():
             if not any(fname.startswith('npose_') for fname in os.listdir(npose_search_path)):
                 input("An N-Pose reference is required for this session. Please assume N-Pose and press Enter to start recording...")
                 
-                received_data = []
-                def npose_handler(sender, data): received_data.append(parse_quaternions_int16(data))
-                await client.start_notify(ORIENTATION_UUID, npose_handler)
+                received_data.clear()
+                await client.start_notify(ORIENTATION_UUID, data_handler)
                 print("🎬 Recording 2-second N-Pose...")
                 await asyncio.sleep(2)
                 await client.stop_notify(ORIENTATION_UUID)
 
-                if received_data:
+                if len(received_data):
                     npose_filename = os.path.join(npose_search_path, f"npose_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pkl")
-                    all_frames = [[val for q in quats for val in (q.x, q.y, q.z, q.w)] for quats in received_data]
+                    all_frames = received_data.to_frames_list()
                     with open(npose_filename, "wb") as f:
                         pickle.dump({'data': all_frames, 'label': 'npose'}, f)
-                    print(f"✅ N-Pose reference for this session saved: {npose_filename}\n")
+                    print(f"✅ N-Pose reference for this session saved: {npose_filename} ({len(received_data)} frames, {received_data.dropped} malformed packets dropped)\n")
                 else:
-                    print("ERROR: No N-Pose data received. Script is stopping.")
+                    print(f"ERROR: No N-Pose data received ({received_data.dropped} malformed packets dropped). Script is stopping.")
                     return
             else:
                 print("✅ N-Pose reference already exists for this session. Proceeding to movement recordings.\n")
@@ -92,24 +87,23 @@ async def main():
                 print(f"--- Recording #{i+1}/{NUMBER_OF_RECORDINGS} ({RECORDING_LABEL}) ---")
                 input("Press Enter when ready...")
 
-                received_data = []
-                def movement_handler(sender, data): received_data.append(parse_quaternions_int16(data))
-                await client.start_notify(ORIENTATION_UUID, movement_handler)
+                received_data.clear()
+                await client.start_notify(ORIENTATION_UUID, data_handler)
                 print(f"🎬 Recording {RECORD_DURATION} seconds...")
                 await asyncio.sleep(RECORD_DURATION)
                 await client.stop_notify(ORIENTATION_UUID)
 
-                if received_data:
+                if len(received_data):
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     filename = os.path.join(save_path, f"movement_{timestamp}.pkl")
                     
-                    all_frames = [[val for q in quats for val in (q.x, q.y, q.z, q.w)] for quats in received_data]
+                    all_frames = received_data.to_frames_list()
                     with open(filename, "wb") as f:
                         pickle.dump({'data': all_frames, 'label': final_label_in_file}, f)
                     
-                    print(f"✅ Recording saved: {filename}\n")
+                    print(f"✅ Recording saved: {filename} ({len(received_data)} frames, {received_data.dropped} malformed packets dropped)\n")
                 else:
-                    print("ERROR: No data received. Skipping this attempt.\n")
+                    print(f"ERROR: No data received ({received_data.dropped} malformed packets dropped). Skipping this attempt.\n")
                 
                 time.sleep(1)
             
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import pickle
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# --- .qrec RECORDING FORMAT ---
+# -----------------------------------------------------------------------------
+# One recording (take) per file, readable without unpickling and memory-mappable:
+#
+#   b"QREC" | uint32 header length | JSON header | zero padding to 64 bytes
+#   quaternion block: (frames, sensors, 4) little-endian int16 or float32, w/x/y/z per sensor
+#   optional timestamp block (aligned to 64 bytes): (frames,) float64 seconds since the first frame
+#
+# int16 stores the raw FF64 values (value / 32768 gives the quaternion component), i.e. the same
+# bytes the jacket sends. The header holds the metadata (user, movement, label, device, sample rate,
+# start time, ...) plus the dtype/shape/offsets needed to map the blocks.
+# -----------------------------------------------------------------------------
+
+MAGIC = b"QREC"
+VERSION = 1
+ALIGNMENT = 64
+INT16_SCALE = 32768.0
+
+# Order of the components inside the old pickles ('data': [[x, y, z, w] * sensors, ...])
+_PKL_XYZW_TO_WXYZ = [3, 0, 1, 2]
+_WXYZ_TO_XYZW = [1, 2, 3, 0]
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class Recording:
+    """A loaded .qrec file. `data` is the stored block (possibly a read-only memmap), `meta` the header."""
+
+    def __init__(self, data, meta, timestamps=None):
+        self.data = data
+        self.meta = meta
+        self.timestamps = timestamps
+
+    def __len__(self):
+        return len(self.data)
+
+    def quaternions(self):
+        """(frames, sensors, 4) float64 array in w, x, y, z order (the layout feature_engine uses)."""
+        if self.data.dtype == np.int16:
+            return self.data / INT16_SCALE
+        return self.data.astype(np.float64)
+
+    def frames_list(self):
+        """The old pickle 'data' layout: one list of x, y, z, w floats per frame."""
+        return self.quaternions()[..., _WXYZ_TO_XYZW].reshape(len(self), -1).tolist()
+
+
+def write_recording(path, quats, meta, timestamps=None, dtype="int16"):
+    """Writes a (frames, sensors, 4) w/x/y/z array to `path`.
+    With dtype int16, `quats` may be raw int16 values or floats in [-1, 1) (scaled by 32768)."""
+    quats = np.asarray(quats)
+    if dtype == "int16" and quats.dtype != np.int16:
+        quats = np.round(quats * INT16_SCALE).clip(-32768, 32767)
+    block = np.ascontiguousarray(quats, dtype=np.dtype(dtype).newbyteorder("<"))
+
+    header = dict(meta, version=VERSION, dtype=dtype, shape=list(block.shape), component_order="wxyz")
+    # The offsets depend on the header length, so size the header with placeholder offsets first
+    header.update(data_offset=0, timestamps_offset=None)
+    header_size = len(json.dumps(header).encode()) + 32
+    data_offset = _aligned(8 + header_size)
+    timestamps_offset = _aligned(data_offset + block.nbytes) if timestamps is not None else None
+    header.update(data_offset=data_offset, timestamps_offset=timestamps_offset)
+    header_bytes = json.dumps(header).encode().ljust(header_size)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint32(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        f.write(b"\0" * (data_offset - f.tell()))
+        f.write(block.tobytes())
+        if timestamps is not None:
+            f.write(b"\0" * (timestamps_offset - f.tell()))
+            f.write(np.ascontiguousarray(timestamps, dtype="<f8").tobytes())
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        if f.read(4) != MAGIC:
+            raise ValueError(f"{path} is not a .qrec recording")
+        header_length = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+        return json.loads(f.read(header_length))
+
+
+def read_recording(path, mmap=True):
+    """Loads a .qrec file. With mmap=True the blocks are mapped read-only instead of read into memory."""
+    meta = read_header(path)
+    dtype = np.dtype(meta["dtype"]).newbyteorder("<")
+    shape = tuple(meta["shape"])
+    if mmap:
+        data = np.memmap(path, dtype=dtype, mode="r", offset=meta["data_offset"], shape=shape)
+    else:
+        data = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=meta["data_offset"]).reshape(shape)
+    timestamps = None
+    if meta.get("timestamps_offset") is not None:
+        timestamps = np.fromfile(path, dtype="<f8", count=shape[0], offset=meta["timestamps_offset"])
+    return Recording(data, meta, timestamps)
+
+
+# -----------------------------------------------------------------------------
+# --- CONVERSION FROM THE OLD PICKLES ---
+# -----------------------------------------------------------------------------
+
+def pkl_to_recording(pkl_path, dtype=None):
+    """Reads an old take pickle and returns (quats, meta, dtype): (frames, sensors, 4) w/x/y/z float64
+    quaternions, the metadata, and the storage dtype for write_recording. Metadata comes from the
+    <Movement>/<User>/<Label>/movement_<YYYYMMDD_HHMMSS>.pkl path.
+    dtype=None picks int16 when that is lossless (it is for everything the recorders wrote), else float32."""
+    with open(pkl_path, "rb") as f:
+        content = pickle.load(f)
+    frames = [frame for frame in content["data"] if len(frame) % 4 == 0 and len(frame) > 0]
+    width = max((len(frame) for frame in frames), default=40)
+    frames = [frame for frame in frames if len(frame) == width]
+    quats = np.asarray(frames, dtype=np.float64).reshape(len(frames), width // 4, 4)[..., _PKL_XYZW_TO_WXYZ]
+
+    if dtype is None:
+        scaled = quats * INT16_SCALE
+        lossless = np.array_equal(scaled, np.round(scaled)) and scaled.min(initial=0) >= -32768 and scaled.max(initial=0) <= 32767
+        dtype = "int16" if lossless else "float32"
+
+    parts = os.path.normpath(pkl_path).split(os.sep)
+    match = re.search(r"(\d{8})_(\d{6})", parts[-1])
+    meta = {
+        "movement": parts[-4] if len(parts) >= 4 else None,
+        "user": parts[-3] if len(parts) >= 3 else None,
+        "label": parts[-2] if len(parts) >= 2 else None,
+        "file_label": content.get("label"),
+        "device": content.get("device"),
+        "sample_rate": content.get("sample_rate"),
+        "recorded_at": f"{match.group(1)}T{match.group(2)}" if match else None,
+        "source": parts[-1],
+    }
+    return quats, meta, dtype
+
+
+def convert_tree(root, remove_pickles=False):
+    """Writes a .qrec next to every movement_*/npose_* pickle under `root`. Returns the number converted."""
+    converted = 0
+    for folder, _, files in os.walk(root):
+        for filename in sorted(files):
+            if not filename.endswith(".pkl") or not filename.startswith(("movement_", "npose_")):
+                continue
+            pkl_path = os.path.join(folder, filename)
+            quats, meta, dtype = pkl_to_recording(pkl_path)
+            write_recording(pkl_path[:-len(".pkl")] + ".qrec", quats, meta, dtype=dtype)
+            if dtype != "int16":
+                print(f"⚠️  {pkl_path}: not int16-exact, stored as {dtype}")
+            if remove_pickles:
+                os.remove(pkl_path)
+            converted += 1
+    return converted
+
+
+if __name__ == "__main__":
+    import sys
+    # Usage: python recording_format.py [dataset_root] [--remove-pickles]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    dataset_root = args[0] if args else "ThesisDataSet"
+    count = convert_tree(dataset_root, remove_pickles="--remove-pickles" in sys.argv)
+    print(f"✅ Converted {count} recordings under {dataset_root}")
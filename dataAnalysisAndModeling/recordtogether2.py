@@ -1,11 +1,9 @@
 import asyncio
 import pickle
-import struct
 import os
-from bleak import BleakClient
-from pyquaternion import Quaternion
 from datetime import datetime
-import time
+import capture_daemon
+from ble_decoder import frames_to_list
 
 # -----------------------------------------------------------------------------
 # --- SETTINGS ---
@@ -18,43 +16,24 @@ NUMBER_OF_RECORDINGS = 5
 BASE_SAVE_FOLDER = "/Users/mac/Desktop/codetry/Together"
 RECORD_DURATION = 6  # seconds
 
-# Jacket device
-JACKET_DEVICE_NAME = "BE5663ED-E011-B0C5-C8F7-2829764800F7"
-# Pants device
-PANTS_DEVICE_NAME = "6BED8222-E5E9-9F63-6890-9C57DDB007FD"
-
-ORIENTATION_UUID = "FF64"
+# Jacket and pants stay connected in capture_daemon.py (device addresses are configured there).
+# Start it before recording: python capture_daemon.py
+DAEMON_HOST = capture_daemon.DEFAULT_HOST
+DAEMON_PORT = capture_daemon.DEFAULT_PORT
+DEVICE_NAMES = ("jacket", "trousers")   # names of the jacket and pants in the daemon's --device list
 
 # -----------------------------------------------------------------------------
 # --- HELPERS ---
 
 # -----------------------------------------------------------------------------
 
-def parse_quaternions_int16(data):
-    quaternions = []
-    n_sensors = len(data) // 8
-    for i in range(n_sensors):
-        q_list = [struct.unpack('<h', data[i*8+j*2:i*8+j*2+2])[0] / 32768.0 for j in range(4)]
-        quaternions.append(Quaternion(w=q_list[0], x=q_list[1], y=q_list[2], z=q_list[3]))
-    return quaternions
-
-
-async def record_from_two_devices(jacket_client, pants_client, duration):
-    jacket_data, pants_data = [], []
-
-    def jacket_handler(sender, data): jacket_data.append(parse_quaternions_int16(data))
-    def pants_handler(sender, data): pants_data.append(parse_quaternions_int16(data))
-
-    await jacket_client.start_notify(ORIENTATION_UUID, jacket_handler)
-    await pants_client.start_notify(ORIENTATION_UUID, pants_handler)
-
+async def record_from_two_devices(duration):
+    """Jacket and pants frames of the next `duration` seconds, aligned on the daemon's common clock."""
     print(f"🎬 Recording {duration} seconds from BOTH devices...")
-    await asyncio.sleep(duration)
-
-    await jacket_client.stop_notify(ORIENTATION_UUID)
-    await pants_client.stop_notify(ORIENTATION_UUID)
-
-    return jacket_data, pants_data
+    frames, _, devices = await capture_daemon.record(duration, DAEMON_HOST, DAEMON_PORT)
+    capture_daemon.require_devices([name for name, _ in devices], DEVICE_NAMES)
+    parts = capture_daemon.split_devices(frames, devices)
+    return parts[DEVICE_NAMES[0]], parts[DEVICE_NAMES[1]]
 
 
 # -----------------------------------------------------------------------------
@@ -69,35 +48,35 @@ async def main():
     print(f"Saving data to: {session_path}\n")
 
     try:
-        async with BleakClient(JACKET_DEVICE_NAME) as jacket_client, BleakClient(PANTS_DEVICE_NAME) as pants_client:
-            print(f"✅ Connected to Jacket: {JACKET_DEVICE_NAME}")
-            print(f"✅ Connected to Pants:  {PANTS_DEVICE_NAME}\n")
+        status = await capture_daemon.request("status", DAEMON_HOST, DAEMON_PORT)
+        for device in status["devices"]:
+            print(f"✅ {device['name']}: {'connected' if device['connected'] else 'NOT connected'} ({device['address']})")
+        print()
+        capture_daemon.require_devices([device["name"] for device in status["devices"]], DEVICE_NAMES)
 
-            for i in range(NUMBER_OF_RECORDINGS):
-                input(f"Press Enter to start recording #{i+1}/{NUMBER_OF_RECORDINGS} ...")
+        for i in range(NUMBER_OF_RECORDINGS):
+            input(f"Press Enter to start recording #{i+1}/{NUMBER_OF_RECORDINGS} ...")
 
-                jacket_frames, pants_frames = await record_from_two_devices(
-                    jacket_client, pants_client, RECORD_DURATION
-                )
+            jacket_frames, pants_frames = await record_from_two_devices(RECORD_DURATION)
 
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = os.path.join(session_path, f"dual_movement_{timestamp}.pkl")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = os.path.join(session_path, f"dual_movement_{timestamp}.pkl")
 
-                payload = {
-                    "data": {
-                        "jacket": [[val for q in quats for val in (q.x, q.y, q.z, q.w)] for quats in jacket_frames],
-                        "pants":  [[val for q in quats for val in (q.x, q.y, q.z, q.w)] for quats in pants_frames]
-                    },
-                    "label": f"{MOVEMENT_TYPE}_{RECORDING_LABEL}"
-                }
+            payload = {
+                "data": {
+                    "jacket": frames_to_list(jacket_frames),
+                    "pants":  frames_to_list(pants_frames)
+                },
+                "label": f"{MOVEMENT_TYPE}_{RECORDING_LABEL}"
+            }
 
-                with open(filename, "wb") as f:
-                    pickle.dump(payload, f)
+            with open(filename, "wb") as f:
+                pickle.dump(payload, f)
 
-                print(f"✅ Saved combined recording: {filename}\n")
-                await asyncio.sleep(1)
+            print(f"✅ Saved combined recording: {filename}\n")
+            await asyncio.sleep(1)
 
-            print("--- All dual recordings completed! ---")
+        print("--- All dual recordings completed! ---")
 
     except Exception as e:
         print(f"❌ Error: {e}")
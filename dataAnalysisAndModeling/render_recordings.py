@@ -0,0 +1,249 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-api'))
+from skeleton import PLAYBACK_VIEW, UPPER_BODY
+from recording_format import read_recording, pkl_to_recording
+
+# -----------------------------------------------------------------------------
+# --- HEADLESS RECORDING RENDERER ---
+# -----------------------------------------------------------------------------
+# Renders recordings as skeleton animations without a window (Agg backend), so takes can be
+# reviewed without replaying them in readAndVisualize.py. The axes, labels and background are
+# drawn once. Every frame then only moves the existing line artists (set_data_3d) and blits
+# them onto the saved background. Joint positions for the whole take come from one
+# skeleton.joint_positions call.
+#
+# Output formats:
+#   mp4  H.264 video through an ffmpeg pipe (needs the ffmpeg binary)
+#   gif  animated GIF
+#   png  sprite sheet (frames tiled row by row) plus a .json sidecar with the grid layout
+#
+#   python render_recordings.py ThesisDataSet --format mp4 --output-dir renders     # whole dataset, all cores
+#   python render_recordings.py ThesisDataSet/SitAndReach/User-B/SupportHand/movement_20250923_160618.pkl --format gif
+# -----------------------------------------------------------------------------
+
+DEFAULT_OUTPUT_FOLDER = "renders"
+FPS = 20                     # recording rate, so the animation plays in real time
+FRAME_SIZE = (4.8, 4.8)      # inches
+DPI = 100
+SPRITE_COLUMNS = 10
+# Bone colors by side; spine segments are red
+BONE_COLORS = {"right": "b", "left": "y"}
+
+# view name -> (skeleton, axis limit, sensor layout). The playback view reads the pickled
+# x, y, z, w columns as w, x, y, z (Quaternion(frame[i:i+4]) in readAndVisualize.py); its
+# display rotations were tuned on that, so the renderer feeds it the same layout.
+VIEWS = {
+    "playback": (PLAYBACK_VIEW, 2, [1, 2, 3, 0]),
+    "upper_body": (UPPER_BODY, 4, [0, 1, 2, 3]),
+}
+
+
+def find_recordings(path):
+    """Every movement_* recording under `path` (or `path` itself), preferring .qrec over .pkl."""
+    if os.path.isfile(path):
+        return [path]
+    recordings = {}
+    for folder, _, filenames in os.walk(path):
+        for filename in sorted(filenames):
+            name, ext = os.path.splitext(filename)
+            if filename.startswith("movement_") and ext in (".pkl", ".qrec"):
+                key = os.path.join(folder, name)
+                if ext == ".qrec" or key not in recordings:
+                    recordings[key] = os.path.join(folder, filename)
+    return [recordings[key] for key in sorted(recordings)]
+
+
+def load_quaternions(path):
+    """(frames, sensors, 4) w/x/y/z array of a .pkl or .qrec recording."""
+    return read_recording(path).quaternions() if path.endswith(".qrec") else pkl_to_recording(path)[0]
+
+
+class SkeletonRenderer:
+    """One off-screen 3D figure whose bone lines are moved and blitted for every frame.
+    Bones of one color share a single line artist (NaN-separated), so a frame draws 2-3 artists."""
+
+    def __init__(self, skeleton, limit=2, size=FRAME_SIZE, dpi=DPI):
+        self.skeleton = skeleton
+        self.figure = Figure(figsize=size, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111, projection='3d')
+        for set_limit in (self.ax.set_xlim, self.ax.set_ylim, self.ax.set_zlim):
+            set_limit((-limit, limit))
+        self.ax.set_xlabel('X')
+        self.ax.set_ylabel('Y')
+        self.ax.set_zlabel('Z')
+
+        # color -> (line artist, (parent, child) joint indices of its bones)
+        groups = {}
+        for parent, child in skeleton.bones:
+            joint = skeleton.joints[child]
+            color = next((c for side, c in BONE_COLORS.items() if joint.startswith(side)), 'r')
+            groups.setdefault(color, []).append((parent, child))
+        self.groups = [(self.ax.plot([], [], [], '-o', color=color, markersize=3, animated=True)[0], np.array(bones))
+                       for color, bones in groups.items()]
+
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+
+    @property
+    def frame_shape(self):
+        width, height = self.canvas.get_width_height()
+        return height, width, 3
+
+    def render(self, positions):
+        """Yields one (height, width, 3) uint8 image per frame of a (frames, joints, 3) array."""
+        paths = []
+        for line, bones in self.groups:
+            # (frames, bones, 3 points: start, end, NaN gap, xyz) -> one polyline per frame
+            points = np.concatenate([positions[:, bones], np.full((len(positions), len(bones), 1, 3), np.nan)], axis=2)
+            paths.append((line, points.reshape(len(positions), -1, 3)))
+        for i in range(len(positions)):
+            self.canvas.restore_region(self.background)
+            for line, path in paths:
+                line.set_data_3d(*path[i].T)
+                self.ax.draw_artist(line)
+            self.canvas.blit(self.figure.bbox)
+            yield np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+
+
+# Renderers of this process by (view, dpi); the background is the same for every take
+_renderers = {}
+
+
+def get_renderer(view, dpi=DPI):
+    if (view, dpi) not in _renderers:
+        skeleton, limit, _ = VIEWS[view]
+        _renderers[view, dpi] = SkeletonRenderer(skeleton, limit, dpi=dpi)
+    return _renderers[view, dpi]
+
+
+def write_mp4(frames, path, frame_shape, fps=FPS):
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("mp4 output needs the ffmpeg binary on PATH (or use --format gif/png)")
+    height, width, _ = frame_shape
+    command = ["ffmpeg", "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+               "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+               "-vcodec", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", path]
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as ffmpeg:
+        for frame in frames:
+            ffmpeg.stdin.write(frame.tobytes())
+        ffmpeg.stdin.close()
+        if ffmpeg.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed for {path}")
+
+
+def write_gif(frames, path, fps=FPS):
+    # One palette for the whole take (the frames share their few colors); much faster than
+    # quantizing every frame on its own
+    frames = iter(frames)
+    first = Image.fromarray(next(frames))
+    palette = first.quantize(colors=64, method=Image.Quantize.FASTOCTREE)
+    images = [first.quantize(palette=palette, dither=Image.Dither.NONE)]
+    images += [Image.fromarray(frame).quantize(palette=palette, dither=Image.Dither.NONE) for frame in frames]
+    images[0].save(path, save_all=True, append_images=images[1:], duration=round(1000 / fps), loop=0)
+
+
+def write_sprite_sheet(frames, path, columns=SPRITE_COLUMNS, fps=FPS):
+    frames = list(frames)
+    height, width, _ = frames[0].shape
+    columns = min(columns, len(frames))
+    rows = math.ceil(len(frames) / columns)
+    sheet = np.full((rows * height, columns * width, 3), 255, dtype=np.uint8)
+    for i, frame in enumerate(frames):
+        row, column = divmod(i, columns)
+        sheet[row * height:(row + 1) * height, column * width:(column + 1) * width] = frame
+    Image.fromarray(sheet).save(path)
+    with open(os.path.splitext(path)[0] + ".json", "w") as f:
+        json.dump({"frames": len(frames), "columns": columns, "rows": rows,
+                   "frame_width": width, "frame_height": height, "fps": fps}, f)
+
+
+def render_recording(path, output_path, view="playback", fmt="mp4", fps=FPS, dpi=DPI):
+    """Renders one recording to `output_path`; returns the number of frames."""
+    skeleton, _, layout = VIEWS[view]
+    quats = load_quaternions(path)
+    if len(quats) == 0:
+        return 0
+    positions = skeleton.joint_positions(quats[..., layout])
+    renderer = get_renderer(view, dpi)
+    frames = renderer.render(positions)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if fmt == "mp4":
+        write_mp4(frames, output_path, renderer.frame_shape, fps)
+    elif fmt == "gif":
+        write_gif(frames, output_path, fps)
+    else:
+        write_sprite_sheet(frames, output_path, fps=fps)
+    return len(positions)
+
+
+def _render_task(task):
+    path, output_path, view, fmt, fps, dpi = task
+    try:
+        return path, render_recording(path, output_path, view, fmt, fps, dpi), None
+    except Exception as e:
+        return path, 0, str(e)
+
+
+def render_all(source, output_dir=DEFAULT_OUTPUT_FOLDER, view="playback", fmt="mp4", fps=FPS, dpi=DPI, workers=None, force=False):
+    """Renders every recording under `source` into `output_dir` (same folder tree) on a process pool.
+    Recordings whose output is newer than the recording are skipped unless `force`."""
+    root = source if os.path.isdir(source) else os.path.dirname(source)
+    tasks = []
+    for path in find_recordings(source):
+        output_path = os.path.join(output_dir, os.path.splitext(os.path.relpath(path, root))[0] + f".{fmt}")
+        if not force and os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(path):
+            continue
+        tasks.append((path, output_path, view, fmt, fps, dpi))
+
+    rendered, failed = 0, 0
+    if tasks:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, frame_count, error in pool.map(_render_task, tasks, chunksize=max(1, len(tasks) // (4 * workers))):
+                if error:
+                    failed += 1
+                    print(f"❌ {path}: {error}")
+                elif frame_count == 0:
+                    print(f"⚠️  Empty recording skipped: {path}")
+                else:
+                    rendered += 1
+    return rendered, failed, len(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders recordings as skeleton animations without a display.")
+    parser.add_argument("source", help="A recording, or a folder (e.g. ThesisDataSet) rendered recursively")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_FOLDER)
+    parser.add_argument("--format", choices=("mp4", "gif", "png"), default="mp4", help="png = sprite sheet")
+    parser.add_argument("--view", choices=sorted(VIEWS), default="playback")
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--dpi", type=int, default=DPI, help=f"Frame size is {FRAME_SIZE[0]:g}x{FRAME_SIZE[1]:g} inches at this DPI")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="Re-render recordings that already have an output")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rendered, failed, total = render_all(args.source, args.output_dir, args.view, args.format, args.fps, args.dpi, args.workers, args.force)
+    print(f"✅ Rendered {rendered}/{total} recordings to '{args.output_dir}' in {time.perf_counter() - start:.1f}s"
+          + (f" ({failed} failed)" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import struct
+
+import numpy as np
+
+from ble_decoder import QuaternionRingBuffer, decode_packet, frames_to_list
+
+
+def packet(values):
+    return struct.pack(f"<{len(values)}h", *values)
+
+
+def test_decode_packet_scales_int16():
+    decoded = decode_packet(packet([16384, -32768, 0, 32767] * 10))
+    assert decoded.shape == (10, 4)
+    np.testing.assert_allclose(decoded[0], [0.5, -1.0, 0.0, 32767 / 32768], rtol=0, atol=1e-7)
+
+
+def test_frames_to_list_uses_the_pickle_order():
+    quats = np.array([[[1.0, 2.0, 3.0, 4.0]]])       # w, x, y, z
+    assert frames_to_list(quats) == [[2.0, 3.0, 4.0, 1.0]]
+
+
+def test_ring_buffer_keeps_the_latest_frames():
+    buffer = QuaternionRingBuffer(capacity=4, num_sensors=1)
+    for i in range(6):
+        buffer.append_packet(packet([i, 0, 0, 0]), timestamp=float(i))
+    frames, timestamps = buffer.latest()
+    assert len(buffer) == 4 and buffer.count == 6
+    np.testing.assert_array_equal(timestamps, [2, 3, 4, 5])
+    np.testing.assert_allclose(frames[:, 0, 0] * 32768, [2, 3, 4, 5])
+    np.testing.assert_array_equal(buffer.latest(2)[1], [4, 5])
+
+
+def test_wrong_size_packets_are_dropped_with_one_warning(capsys):
+    buffer = QuaternionRingBuffer(num_sensors=10)
+    buffer.append_packet(packet([0] * 16))
+    buffer.append_packet(packet([0] * 16))
+    buffer.append_packet(packet([0] * 40))
+    assert (len(buffer), buffer.dropped) == (1, 2)
+    output = capsys.readouterr().out
+    assert output.count("Dropping") == 1 and "4-sensor" in output
+
+
+def test_sensor_count_from_the_first_packet():
+    buffer = QuaternionRingBuffer(num_sensors=None)
+    assert buffer.to_frames_list() == []
+    buffer.append_packet(packet([32767, 0, 0, 0] * 4))
+    buffer.append_packet(packet([0] * 40))
+    assert buffer.num_sensors == 4 and buffer.frames().shape == (1, 4, 4) and buffer.dropped == 1
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.dropped == 0 and buffer.num_sensors == 4
@@ -0,0 +1,62 @@
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pytest
+
+from recording_format import convert_tree, pkl_to_recording, read_header, read_recording, write_recording
+
+DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ThesisDataSet')
+TAKE = os.path.join(DATASET, 'SitAndReach', 'User-B', 'SupportHand', 'movement_20250923_160618.pkl')
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip_with_timestamps(tmp_path, mmap):
+    raw = np.random.default_rng(0).integers(-32768, 32767, size=(12, 10, 4), dtype=np.int16)
+    timestamps = np.arange(12) / 20
+    path = str(tmp_path / "take.qrec")
+    write_recording(path, raw, {"user": "User-X", "label": "True"}, timestamps=timestamps)
+    recording = read_recording(path, mmap=mmap)
+    np.testing.assert_array_equal(recording.data, raw)
+    np.testing.assert_array_equal(recording.quaternions(), raw / 32768.0)
+    np.testing.assert_array_equal(recording.timestamps, timestamps)
+    assert recording.meta["user"] == "User-X" and recording.meta["shape"] == [12, 10, 4]
+    assert read_header(path)["data_offset"] % 64 == 0
+
+
+def test_float32_recording(tmp_path):
+    quats = np.random.default_rng(1).normal(size=(5, 3, 4)).astype(np.float32)
+    path = str(tmp_path / "take.qrec")
+    write_recording(path, quats, {}, dtype="float32")
+    recording = read_recording(path)
+    np.testing.assert_array_equal(recording.quaternions(), quats)
+    assert recording.timestamps is None
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / "other.qrec"
+    path.write_bytes(b"PK\x03\x04 not a recording")
+    with pytest.raises(ValueError):
+        read_header(str(path))
+
+
+def test_pickle_conversion_is_lossless(tmp_path):
+    quats, meta, dtype = pkl_to_recording(TAKE)
+    assert dtype == "int16"
+    assert (meta["movement"], meta["user"], meta["label"]) == ("SitAndReach", "User-B", "SupportHand")
+    assert meta["recorded_at"] == "20250923T160618"
+    path = str(tmp_path / "take.qrec")
+    write_recording(path, quats, meta, dtype=dtype)
+    with open(TAKE, "rb") as f:
+        frames = pickle.load(f)["data"]
+    assert read_recording(path).frames_list() == [list(map(float, frame)) for frame in frames if len(frame) == len(frames[0])]
+
+
+def test_convert_tree(tmp_path):
+    folder = tmp_path / "SitAndReach" / "User-B" / "SupportHand"
+    folder.mkdir(parents=True)
+    shutil.copy(TAKE, folder)
+    (folder / "notes.pkl").write_bytes(b"")
+    assert convert_tree(str(tmp_path), remove_pickles=True) == 1
+    assert sorted(os.listdir(folder)) == ["movement_20250923_160618.qrec", "notes.pkl"]
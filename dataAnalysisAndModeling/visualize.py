@@ -1,9 +1,45 @@
+import os
+import sys
 import numpy as np
 import matplotlib
 from pyquaternion import Quaternion
 matplotlib.use('Qt5Agg')
 import matplotlib.pyplot as plt
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ml-api'))
+from skeleton import Segment, Skeleton, UPPER_BODY, PLAYBACK_VIEW
+
+# Segment vectors come from the batched forward kinematics in ml-api/skeleton.py; the views
+# below only declare their segments. Sensor numbers refer to the argument order of the function.
+
+# visualize_quat(neck, lower_back, upper_left_arm, lower_left_arm, upper_right_arm, lower_right_arm)
+SIX_SENSOR_VIEW = Skeleton([
+    Segment("lower_back", 1, "hips", alignment=([0, 0, 1], 90)),
+    Segment("neck", 0, "lower_back", bone=(0, -1, 0)),
+    Segment("upper_left", 2, "neck", bone=(-1, 0, 0)),
+    Segment("upper_right", 4, "neck", bone=(-1, 0, 0), alignment=([0, 0, 1], 180)),
+    Segment("lower_left", 3, "upper_left", bone=(-1, 0, 0)),
+    Segment("lower_right", 5, "upper_right", bone=(-1, 0, 0), alignment=([0, 0, 1], 180)),
+], root="hips")
+
+# visualize_10_sensor: like PLAYBACK_VIEW with the live display rotations
+LIVE_VIEW = Skeleton([
+    Segment("first_back", "first_back", "hips", alignment=([0, 0, 1], 90)),
+    Segment("back1", "fourth_back", "first_back", alignment=([0, 0, 1], 120)),
+    Segment("rightback", "right_shoulder", "back1", bone=(-0.6, 0, 0), alignment=([0, -1, 0], 60)),
+    Segment("leftback", "left_shoulder", "back1", bone=(-0.6, 0, 0), alignment=([0, 1, 0], 60)),
+    Segment("upperight", "upper_right_arm", "rightback", bone=(-0.8, 0, 0), alignment=([0, -1, 0], 30)),
+    Segment("upperleft", "upper_left_arm", "leftback", bone=(0.8, 0, 0)),
+    Segment("lowerright", "lower_right_arm", "upperight", bone=(-0.8, 0, 0)),
+    Segment("lowerleft", "lower_left_arm", "upperleft", bone=(0.8, 0, 0)),
+], root="hips")
+
+
+def joint_positions(skeleton, quats):
+    """Joint positions of one frame given as Quaternions (in sensor order), by joint name."""
+    points = skeleton.joint_positions(np.array([[q.elements for q in quats]]))[0]
+    return dict(zip(skeleton.joints, points))
+
 
 def init(show_drift = False):
     #plt.ion()
@@ -21,20 +57,8 @@ def init(show_drift = False):
 
 def visualize_quat(neck_quat: Quaternion, lower_back_quat: Quaternion, upper_left_arm_quat,lower_left_arm_quat, upper_right_arm_quat, lower_right_arm_quat, show_complex = False):
     
-    base_vector0 = np.array([1, 0, 0])
-    lower_back_vector = lower_back_quat.rotate(base_vector0)
-    lower_back_vector = Quaternion(axis=[0, 0, 1], angle=90*np.pi/180).rotate(lower_back_vector)
-    base_vector0 = np.array([0,-1,0])
-    neck_vector = neck_quat.rotate(base_vector0)
-    
-    base_vector = np.array([-1, 0, 0])
-    upper_left_arm_vector = upper_left_arm_quat.rotate(base_vector)
-    lower_left_arm_vector = lower_left_arm_quat.rotate(base_vector)
-    base_vector = np.array([-1, 0, 0])
-    upper_right_arm_vector = upper_right_arm_quat.rotate(base_vector)
-    upper_right_arm_vector = Quaternion(axis=[0, 0, 1], angle=180*np.pi/180).rotate(upper_right_arm_vector)
-    lower_right_arm_vector = lower_right_arm_quat.rotate(base_vector)
-    lower_right_arm_vector = Quaternion(axis=[0, 0, 1], angle=180*np.pi/180).rotate(lower_right_arm_vector)
+    joints = joint_positions(SIX_SENSOR_VIEW, [neck_quat, lower_back_quat, upper_left_arm_quat, lower_left_arm_quat, upper_right_arm_quat, lower_right_arm_quat])
+    lower_back_vector = joints['lower_back']
     if show_complex:
         square_vectors = np.array([[0.2,-0.2,1],[0.2,0.2,1],[-0.2,0.2,1],[-0.2,-0.2,1]])
         lower_back_vectors = np.zeros([4,3])
@@ -64,11 +88,11 @@ def visualize_quat(neck_quat: Quaternion, lower_back_quat: Quaternion, upper_lef
     ax.quiver(0, 0, 0, left_arm_x, left_arm_y, left_arm_z, length=1, normalize=True, color='b', label='Left Arm')
     ax.quiver(0, 0, 0, right_arm_x, right_arm_y, right_arm_z, length=1, normalize=True, color='y', label='Right Arm')
     """
-    neck = lower_back_vector + neck_vector
-    upper_left = neck + upper_left_arm_vector
-    upper_right = neck + upper_right_arm_vector
-    lower_left = upper_left + lower_left_arm_vector
-    lower_right = upper_right + lower_right_arm_vector
+    neck = joints['neck']
+    upper_left = joints['upper_left']
+    upper_right = joints['upper_right']
+    lower_left = joints['lower_left']
+    lower_right = joints['lower_right']
 
     if show_complex:
         necks = lower_back_vectors+neck_vectors
@@ -133,43 +157,8 @@ visualize_quat(
 """
 
 def visualize_10_sensor(lower_right_arm: Quaternion, upper_right_arm: Quaternion, right_shoulder: Quaternion, first_back: Quaternion, second_back: Quaternion, third_back: Quaternion, fourth_back: Quaternion, left_shoulder: Quaternion, upper_left_arm: Quaternion, lower_left_arm: Quaternion):
-    base_vector0 = np.array([1, 0, 0])
-    first_back_vector = first_back.rotate(base_vector0)
-    first_back_vector = Quaternion(axis=[0, 0, 1], angle=90*np.pi/180).rotate(first_back_vector)
-    
-    second_back_vector = second_back.rotate(base_vector0)
-    second_back_vector = Quaternion(axis=[0, 0, 1], angle=90*np.pi/180).rotate(second_back_vector)
-    
-    third_back_vector = third_back.rotate(base_vector0)
-    third_back_vector = Quaternion(axis=[0, 0, 1], angle=90*np.pi/180).rotate(third_back_vector)
-    
-    fourt_back_vector = fourth_back.rotate(base_vector0)
-    fourt_back_vector = Quaternion(axis=[0, 0, 1], angle=120*np.pi/180).rotate(fourt_back_vector)
-    
-    base_vector0 = np.array([-0.6, 0 , 0])
-    left_shoulder_vector = left_shoulder.rotate(base_vector0)
-    left_shoulder_vector = Quaternion(axis=[0, 1, 0], angle=60*np.pi/180).rotate(left_shoulder_vector)
-
-
-    base_vector0 = np.array([-0.6, 0 ,0])
-    right_shoulder_vector= right_shoulder.rotate(base_vector0)
-    right_shoulder_vector = Quaternion(axis=[0, -1, 0], angle=60*np.pi/180).rotate(right_shoulder_vector)
-
-
-    base_vector0 = np.array([0.8, 0, 0])
-
-    lower_left_arm_vector = lower_left_arm.rotate(base_vector0)
-    upper_left_arm_vector = upper_left_arm.rotate(base_vector0)
-    #upper_left_arm_vector = Quaternion(axis=[0,0,1], angle=np.pi/90).rotate(upper_left_arm_vector)
-
-
-    base_vector0 = np.array([-0.8, 0, 0])
-    
-    lower_right_arm_vector = lower_right_arm.rotate(base_vector0)
-    lower_right_arm = Quaternion(axis=[1,0,0], angle=90*np.pi/180).rotate(lower_left_arm_vector)
-    base_vector0 = np.array([-0.8, 0, 0])
-    upper_right_arm_vector = upper_right_arm.rotate(base_vector0)
-    upper_right_arm_vector = Quaternion(axis=[ 0,-1,0], angle=30*np.pi/180).rotate(upper_right_arm_vector)
+    joints = joint_positions(LIVE_VIEW, [lower_right_arm, upper_right_arm, right_shoulder, first_back, second_back, third_back, fourth_back, left_shoulder, upper_left_arm, lower_left_arm])
+    first_back_vector = joints['first_back']
 
 
     ax.clear()
@@ -184,17 +173,17 @@ def visualize_10_sensor(lower_right_arm: Quaternion, upper_right_arm: Quaternion
     ax.set_zlabel('Z')
 
 
-    back1 = first_back_vector + fourt_back_vector
+    back1 = joints['back1']
     #back2= back1 + third_back_vector
     #back3 = back2 + fourt_back_vector
-    rightback = back1 + right_shoulder_vector
-    leftback = back1 + left_shoulder_vector
+    rightback = joints['rightback']
+    leftback = joints['leftback']
 
-    upperleft= leftback + upper_left_arm_vector
-    upperight= rightback + upper_right_arm_vector
+    upperleft= joints['upperleft']
+    upperight= joints['upperight']
 
-    lowerleft = upperleft + lower_left_arm_vector
-    lowerright = upperight +lower_right_arm_vector
+    lowerleft = joints['lowerleft']
+    lowerright = joints['lowerright']
 
 
     ax.plot(np.array([0, first_back_vector[0]]), np.array([0, first_back_vector[1]]), np.array([0, first_back_vector[2]]), color='r', label='Lower Back')
@@ -233,76 +222,16 @@ def visualize_10_sensors(
     Finally, a global rotation aligns the spine with the vertical (Z) axis.
     """
     #-----------------------------------------------------------------------------#
-    # 1) Define per-sensor mounting offsets: adjust these to match your sensor mounts
-    #-----------------------------------------------------------------------------#
-    mounting_offsets = {
-        'first_back':       Quaternion(axis=[0, 0, 1], angle=np.deg2rad( 90)),
-        'second_back':      Quaternion(axis=[0, 0, 1], angle=np.deg2rad( 90)),
-        'third_back':       Quaternion(axis=[0, 0, 1], angle=np.deg2rad( 90)),
-        'fourth_back':      Quaternion(axis=[0, 0, 1], angle=np.deg2rad( 90)),
-        'right_shoulder':   Quaternion(axis=[0, 1, 0], angle=np.deg2rad(-90)),
-        'upper_right_arm':  Quaternion(axis=[0, 1, 0], angle=np.deg2rad( 0)),
-        'lower_right_arm':  Quaternion(axis=[0, 1, 0], angle=np.deg2rad( 0)),
-        'left_shoulder':    Quaternion(axis=[0, 1, 0], angle=np.deg2rad( 90)),
-        'upper_left_arm':   Quaternion(axis=[0, 1, 0], angle=np.deg2rad( 0)),
-        'lower_left_arm':   Quaternion(axis=[0, 1, 0], angle=np.deg2rad( 0)),
-    }
-
-    #-----------------------------------------------------------------------------#
-    # 2) Choose one canonical bone axis in each sensor's local frame
-    #    (here +X direction points along the bone in sensor frame)
-    #-----------------------------------------------------------------------------#
-    canonical_axis = np.array([1.0, 0.0, 0.0])
-
-    #-----------------------------------------------------------------------------#
-    # 3) Helper: apply mounting offset then sensor rotation
-    #-----------------------------------------------------------------------------#
-    def get_segment_vector(sensor_quat: Quaternion, name: str) -> np.ndarray:
-        adjusted = sensor_quat * mounting_offsets[name]
-        return adjusted.rotate(canonical_axis)
-
-    #-----------------------------------------------------------------------------#
-    # 4) Get all segment vectors
+    # 1) Mounting offsets, bone axes and the upright rotation are declared in
+    #    skeleton.UPPER_BODY; all joints are computed there in one batched pass
     #-----------------------------------------------------------------------------#
-    v1 = get_segment_vector(first_back,      'first_back')
-    v2 = get_segment_vector(second_back,     'second_back')
-    v3 = get_segment_vector(third_back,      'third_back')
-    v4 = get_segment_vector(fourth_back,     'fourth_back')
-
-    vs_r = get_segment_vector(right_shoulder, 'right_shoulder')
-    vu_r = get_segment_vector(upper_right_arm, 'upper_right_arm')
-    vl_r = get_segment_vector(lower_right_arm, 'lower_right_arm')
-
-    vs_l = get_segment_vector(left_shoulder,  'left_shoulder')
-    vu_l = get_segment_vector(upper_left_arm,  'upper_left_arm')
-    vl_l = get_segment_vector(lower_left_arm,  'lower_left_arm')
-
-    #-----------------------------------------------------------------------------#
-    # 5) Chain positions in sensor/world frame (initially along X axis)
-    #-----------------------------------------------------------------------------#
-    p0 = np.zeros(3)
-    p1 = p0 + v1
-    p2 = p1 + v2
-    p3 = p2 + v3
-    p4 = p3 + v4
-
-    p5_r = p4 + vs_r
-    p6_r = p5_r + vu_r
-    p7_r = p6_r + vl_r
-
-    p5_l = p4 + vs_l
-    p6_l = p5_l + vu_l
-    p7_l = p6_l + vl_l
-
-    #-----------------------------------------------------------------------------#
-    # 6) Apply global rotation to stand upright: rotate +X to +Z
-    #-----------------------------------------------------------------------------#
-    global_rot = Quaternion(axis=[0, 1, 0], angle=np.deg2rad(90))
-    points = [p0, p1, p2, p3, p4, p5_r, p6_r, p7_r, p5_l, p6_l, p7_l]
-    p0, p1, p2, p3, p4, p5_r, p6_r, p7_r, p5_l, p6_l, p7_l = [global_rot.rotate(p) for p in points]
+    joints = joint_positions(UPPER_BODY, [lower_right_arm, upper_right_arm, right_shoulder, first_back, second_back, third_back, fourth_back, left_shoulder, upper_left_arm, lower_left_arm])
+    p0, p1, p2, p3, p4 = (joints[name] for name in ('pelvis', 'spine_1', 'spine_2', 'spine_3', 'neck'))
+    p5_r, p6_r, p7_r = (joints[name] for name in ('right_shoulder', 'right_elbow', 'right_wrist'))
+    p5_l, p6_l, p7_l = (joints[name] for name in ('left_shoulder', 'left_elbow', 'left_wrist'))
 
     #-----------------------------------------------------------------------------#
-    # 7) Plot
+    # 2) Plot
     #-----------------------------------------------------------------------------#
     fig = plt.figure()
     ax  = fig.add_subplot(111, projection='3d')
@@ -331,46 +260,8 @@ def visualize_10_sensors(
     plt.pause(0.1)
 
 def visualize_10_sensorforread(lower_right_arm: Quaternion, upper_right_arm: Quaternion, right_shoulder: Quaternion, first_back: Quaternion, second_back: Quaternion, third_back: Quaternion, fourth_back: Quaternion, left_shoulder: Quaternion, upper_left_arm: Quaternion, lower_left_arm: Quaternion):
-    base_vector0 = np.array([1, 0, 0])
-    first_back_vector = first_back.rotate(base_vector0)
-    first_back_vector = Quaternion(axis=[0, 1, 0], angle=150*np.pi/180).rotate(first_back_vector)
-    
-    second_back_vector = second_back.rotate(base_vector0)
-    second_back_vector = Quaternion(axis=[0, 0, 1], angle=90*np.pi/180).rotate(second_back_vector)
-    
-    third_back_vector = third_back.rotate(base_vector0)
-    third_back_vector = Quaternion(axis=[0, 0, 1], angle=90*np.pi/180).rotate(third_back_vector)
-    
-    fourt_back_vector = fourth_back.rotate(base_vector0)
-    fourt_back_vector = Quaternion(axis=[0, 1, 0], angle=120*np.pi/180).rotate(fourt_back_vector)
-    
-    base_vector0 = np.array([0.6, 0 , 0])
-    left_shoulder_vector = left_shoulder.rotate(base_vector0)
-    left_shoulder_vector = Quaternion(axis=[0, 1, 0], angle=60*np.pi/180).rotate(left_shoulder_vector)
-
-
-    base_vector0 = np.array([0.6, 0 ,0])
-    right_shoulder_vector= right_shoulder.rotate(base_vector0)
-    right_shoulder_vector = Quaternion(axis=[0, -1, 0], angle=60*np.pi/180).rotate(right_shoulder_vector)
-
-
-    base_vector0 = np.array([0.8, 0, 0])
-
-    lower_left_arm_vector = lower_left_arm.rotate(base_vector0)
-    lower_left_arm_vector = Quaternion(axis= [0,1,0], angle= 130*np.pi/180).rotate(lower_left_arm_vector)
-    upper_left_arm_vector = upper_left_arm.rotate(base_vector0)
-    upper_left_arm_vector = Quaternion(axis=[ 0,1,0], angle=150*np.pi/180).rotate(upper_left_arm_vector)
-
-    #upper_left_arm_vector = Quaternion(axis=[0,0,1], angle=np.pi/90).rotate(upper_left_arm_vector)
-
-
-    base_vector0 = np.array([-0.8, 0, 0])
-    
-    lower_right_arm_vector = lower_right_arm.rotate(base_vector0)
-    #lower_right_arm_vector = Quaternion(axis=[1,0,0], angle=90*np.pi/180).rotate(lower_left_arm_vector)
-    base_vector0 = np.array([0.8, 0, 0])
-    upper_right_arm_vector = upper_right_arm.rotate(base_vector0)
-    upper_right_arm_vector = Quaternion(axis=[0,-1,0], angle=30*np.pi/180).rotate(upper_right_arm_vector)
+    joints = joint_positions(PLAYBACK_VIEW, [lower_right_arm, upper_right_arm, right_shoulder, first_back, second_back, third_back, fourth_back, left_shoulder, upper_left_arm, lower_left_arm])
+    first_back_vector = joints['back']
 
 
     ax.clear()
@@ -385,17 +276,17 @@ def visualize_10_sensorforread(lower_right_arm: Quaternion, upper_right_arm: Qua
     ax.set_zlabel('Z')
 
 
-    back1 = first_back_vector + fourt_back_vector
+    back1 = joints['neck']
     #back2= back1 + third_back_vector
     #back3 = back2 + fourt_back_vector
-    rightback = back1 + right_shoulder_vector
-    leftback = back1 + left_shoulder_vector
+    rightback = joints['right_shoulder']
+    leftback = joints['left_shoulder']
 
-    upperleft= leftback + upper_left_arm_vector
-    upperight= rightback + upper_right_arm_vector
+    upperleft= joints['left_elbow']
+    upperight= joints['right_elbow']
 
-    lowerleft = upperleft + lower_left_arm_vector
-    lowerright = upperight +lower_right_arm_vector
+    lowerleft = joints['left_wrist']
+    lowerright = joints['right_wrist']
 
 
     ax.plot(np.array([0, first_back_vector[0]]), np.array([0, first_back_vector[1]]), np.array([0, first_back_vector[2]]), color='r', label='Lower Back')
@@ -1,24 +1,89 @@
 import os
-import pickle
+import json
+import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 from pyquaternion import Quaternion
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+import feature_engine
+import streaming
+from model_registry import ModelRegistry
+from feature_cache import FeatureCache
+from calibration_store import CalibrationStore
+from metrics import StageMetrics, StageTimer
+from sequence_models import SequenceModelRegistry
+from batch_scheduler import InferenceScheduler
+import skeleton
 
 # --- SETUP ---
 app = Flask(__name__)
 CORS(app)  # Enable Cross-Origin Resource Sharing for all routes
 
+# Structured request log: one JSON line per prediction with the per-stage timings
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger("ml-api")
+
+# Per-stage latency histograms, exposed on /metrics
+stage_metrics = StageMetrics()
+
 # The folder where all your .pkl files are stored
 MODELS_FOLDER = "final_models" 
 
-# A global dictionary to hold all loaded assets (models, scalers, encoders)
-# Structure: { "ShoulderAbduction": { "RandomForest": { "model": obj, "scaler": obj, "le": obj }, ... }, ... }
-model_assets = {}
+# Memory budget for loaded model bundles, and the "MovementType/ModelName" bundles to load at startup.
+# Everything else is loaded on its first request.
+MODEL_CACHE_MAX_MB = int(os.environ.get("MODEL_CACHE_MAX_MB", 512))
+HOT_MODELS = [m for m in os.environ.get("HOT_MODELS", "").split(",") if m.strip()]
+
+# "pickle" serves the scikit-learn/XGBoost pickles in MODELS_FOLDER, "onnx" the graphs that
+# onnx_export.py writes to ONNX_MODELS_FOLDER (scaler included, only onnxruntime needed)
+MODEL_FORMAT = os.environ.get("MODEL_FORMAT", "pickle")
+ONNX_MODELS_FOLDER = os.environ.get("ONNX_MODELS_FOLDER", "onnx_models")
+
+# Registry of all model assets (models, scalers, encoders), loaded lazily
+# get(movement_type, model_name) -> { "model": obj, "scaler": obj, "le": obj }
+if MODEL_FORMAT == "onnx":
+    from onnx_serving import OnnxModelRegistry
+    model_registry = OnnxModelRegistry(ONNX_MODELS_FOLDER, max_bytes=MODEL_CACHE_MAX_MB * 1024 * 1024)
+else:
+    model_registry = ModelRegistry(MODELS_FOLDER, max_bytes=MODEL_CACHE_MAX_MB * 1024 * 1024)
+
+# Micro-batching of concurrent /predict calls per movement/model: a queue is scored as one matrix once
+# BATCH_MAX_SIZE rows wait or the oldest has waited BATCH_MAX_WAIT_MS. PREDICT_BATCHING=0 turns it off.
+PREDICT_BATCHING = os.environ.get("PREDICT_BATCHING", "1") == "1"
+inference_scheduler = InferenceScheduler(model_registry,
+                                         max_batch_size=int(os.environ.get("BATCH_MAX_SIZE", 32)),
+                                         max_wait_ms=float(os.environ.get("BATCH_MAX_WAIT_MS", 1)),
+                                         stage_metrics=stage_metrics)
+
+# Extracted features of recently scored recordings, keyed by a hash of the recording
+FEATURE_CACHE_SIZE = int(os.environ.get("FEATURE_CACHE_SIZE", 256))
+FEATURE_CACHE_TTL = int(os.environ.get("FEATURE_CACHE_TTL", 600))
+feature_cache = FeatureCache(max_entries=FEATURE_CACHE_SIZE, ttl_seconds=FEATURE_CACHE_TTL)
+
+# N-pose calibrations uploaded on POST /calibration, referenced by calibration_id afterwards.
+# Calibrations idle for CALIBRATION_TTL seconds are evicted. They stay in this process unless
+# CALIBRATION_FOLDER is set, which persists them there and shares them between gunicorn workers
+# (gunicorn.conf.py sets it).
+calibration_store = CalibrationStore(max_entries=int(os.environ.get("CALIBRATION_CACHE_SIZE", 1024)),
+                                     ttl_seconds=int(os.environ.get("CALIBRATION_TTL", 3600)),
+                                     folder=os.environ.get("CALIBRATION_FOLDER") or None)
+
+# Keras .h5 sequence (LSTM) models, served on /predict/sequence through a micro-batching queue.
+# HOT_SEQUENCE_MODELS ("*" for all) are loaded and warmed up at startup (in every gunicorn worker).
+SEQUENCE_MODELS_FOLDER = os.environ.get("SEQUENCE_MODELS_FOLDER", ".")
+HOT_SEQUENCE_MODELS = [m for m in os.environ.get("HOT_SEQUENCE_MODELS", "").split(",") if m.strip()]
+sequence_registry = SequenceModelRegistry(SEQUENCE_MODELS_FOLDER,
+                                          length_mode=os.environ.get("SEQUENCE_LENGTH_MODE", "pad"),
+                                          max_batch_size=int(os.environ.get("SEQUENCE_BATCH_SIZE", 16)),
+                                          max_wait_ms=float(os.environ.get("SEQUENCE_BATCH_WAIT_MS", 5)))
 
 # --- DATA PROCESSING & FEATURE EXTRACTION ---
 # These functions are identical to the ones used in your successful Jupyter notebook.
+# /predict itself runs the vectorized copy in feature_engine.py, which gives the same features;
+# these are kept as the reference implementation.
 
 def reshape_from_request(frames_list):
     """Converts the flat list from the request into a list of DataFrames."""
@@ -82,97 +147,461 @@ def extract_features_for_movement(normalized_data):
 
 # --- DYNAMIC MODEL LOADING ---
 def load_all_models():
-    """Scans the MODELS_FOLDER and loads all model assets into the global dictionary."""
-    print("--- Loading All Models ---")
-    if not os.path.isdir(MODELS_FOLDER):
-        print(f"ERROR: Models folder not found at '{MODELS_FOLDER}'")
-        return
-
-    for filename in os.listdir(MODELS_FOLDER):
-        if filename.startswith("final_model_") and filename.endswith(".pkl"):
-            # Example filename: "final_model_ShoulderAbduction_RandomForest.pkl"
-            clean_name = filename.replace("final_model_", "").replace(".pkl", "")
-            parts = clean_name.split("_")
-            
-            # Robust parsing: The last part is the model name, everything before it is the movement type.
-            model_name = parts[-1]
-            movement_type = "_".join(parts[:-1])
-
-            if movement_type not in model_assets:
-                model_assets[movement_type] = {}
-            
-            try:
-                # Construct paths for all three asset types
-                model_path = os.path.join(MODELS_FOLDER, f"final_model_{movement_type}_{model_name}.pkl")
-                scaler_path = os.path.join(MODELS_FOLDER, f"final_scaler_{movement_type}_{model_name}.pkl")
-                le_path = os.path.join(MODELS_FOLDER, f"final_label_encoder_{movement_type}_{model_name}.pkl")
-
-                with open(model_path, 'rb') as f: model = pickle.load(f)
-                with open(scaler_path, 'rb') as f: scaler = pickle.load(f)
-                with open(le_path, 'rb') as f: le = pickle.load(f)
-                
-                model_assets[movement_type][model_name] = {
-                    "model": model,
-                    "scaler": scaler,
-                    "le": le
-                }
-                print(f"✅ Loaded: {movement_type} - {model_name}")
-            except Exception as e:
-                print(f"❌ FAILED to load assets for {movement_type} - {model_name}: {e}")
+    """Indexes the MODELS_FOLDER and preloads the HOT_MODELS; other models load on first use."""
+    print("--- Loading Models ---")
+    model_registry.scan()
+    model_registry.preload(HOT_MODELS)
+    sequence_registry.scan()
     print("--- Model Loading Complete ---")
 
+def load_sequence_models():
+    """Loads and warms up the HOT_SEQUENCE_MODELS. TensorFlow is not fork-safe, so behind gunicorn
+    this runs in every worker after the fork (post_worker_init), not in the master."""
+    sequence_registry.preload(HOT_SEQUENCE_MODELS)
+
+# --- REQUEST DECODING ---
+def get_movement_data(content):
+    """Reads movement_data from a request body. 'movement_data_b64' carries the raw int16
+    FF64 packets base64-encoded and is used instead of the JSON float lists when present."""
+    if content.get('movement_data_b64'):
+        return base64.b64decode(content['movement_data_b64'], validate=True)
+    return content.get('movement_data')
+
+def request_content():
+    """The request fields: the query string for an application/octet-stream body (raw int16 packets),
+    the JSON body otherwise."""
+    if request.mimetype == 'application/octet-stream':
+        return request.args
+    return request.json or {}
+
+def read_movement_quats(content, timer=None):
+    """Reads and decodes the movement of the current request: the octet-stream body, or movement_data /
+    movement_data_b64 in the JSON body. Decoding is timed as the "reshape" stage when a timer is given.
+    Returns (quats, None), or (None, error response) for a missing, undecodable or empty movement."""
+    if request.mimetype == 'application/octet-stream':
+        movement_data = request.get_data()
+    else:
+        try:
+            movement_data = get_movement_data(content)
+        except ValueError:
+            return None, (jsonify({'error': 'movement_data_b64 is not valid base64.'}), 400)
+    if not movement_data:
+        return None, (jsonify({'error': 'Missing required field: movement_data.'}), 400)
+    try:
+        if timer is None:
+            quats = movement_to_array(movement_data)
+        else:
+            with timer.stage("reshape"):
+                quats = movement_to_array(movement_data)
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+    if len(quats) == 0:
+        return None, (jsonify({'error': 'Could not process movement data. It might be empty or in the wrong format.'}), 400)
+    return quats, None
+
+def movement_to_array(movement_data):
+    """JSON frames (40 floats, x/y/z/w per sensor) or raw int16 packet bytes -> (frames, sensors, 4) array."""
+    if isinstance(movement_data, (bytes, bytearray)):
+        return feature_engine.decode_int16_packets(movement_data)
+    return feature_engine.frames_to_array(movement_data)
+
+def get_calibration(content):
+    """The Calibration named by content['calibration_id'], or None when the request names none.
+    Raises KeyError for an unknown or expired id."""
+    calibration_id = content.get('calibration_id')
+    if not calibration_id:
+        return None
+    calibration = calibration_store.get(calibration_id)
+    if calibration is None:
+        raise KeyError(f"Calibration '{calibration_id}' not found or expired. Upload the N-pose again on /calibration.")
+    return calibration
+
+def extract_features_cached(quats, timer, calibration=None):
+    """Normalizes and extracts the features of a (frames, sensors, 4) recording, reusing the result
+    for a recording that was already scored. Returns None for an empty recording.
+    With a calibration the recording is normalized against its N-pose instead of its first frame."""
+    key = FeatureCache.key_for(quats)
+    if calibration is not None:
+        key = f"{key}/{calibration.calibration_id}"
+    features = feature_cache.get(key)
+    if features is None:
+        with timer.stage("normalize"):
+            if calibration is not None:
+                normalized = calibration.apply(quats)
+            else:
+                normalized = feature_engine.normalize_by_first_frame(quats)
+        if normalized is None: return None
+        with timer.stage("extract"):
+            features = feature_engine.extract_features_for_movement(normalized)
+        feature_cache.put(key, features)
+    return features
+
+def log_prediction(endpoint, timer, **fields):
+    """Writes the structured log line of one prediction, with its stage timings in ms."""
+    record = {'event': 'prediction', 'endpoint': endpoint, 'movement_type': timer.movement_type,
+              'model_name': timer.model_name, **fields, 'timings_ms': timer.finish()}
+    logger.info(json.dumps(record, default=str))
+
 # --- FLASK API ENDPOINT ---
 @app.route('/predict', methods=['POST'])
 def predict():
-    content = request.json
-    movement_data = content.get('movement_data')
+    # JSON body, or raw int16 packets in the body with movement_type and model_name in the query string
+    content = request_content()
     movement_type = content.get('movement_type')
     model_name = content.get('model_name')
 
     # --- Input Validation ---
-    if not all([movement_data, movement_type, model_name]):
+    if not all([movement_type, model_name]):
         return jsonify({'error': 'Missing required fields: movement_data, movement_type, and model_name are required.'}), 400
-    
-    if movement_type not in model_assets or model_name not in model_assets[movement_type]:
+
+    if not model_registry.has(movement_type, model_name):
         return jsonify({'error': f"Model not found for movement '{movement_type}' with name '{model_name}'. Make sure the server has loaded it."}), 404
+    try:
+        calibration = get_calibration(content)
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
 
+    timer = StageTimer(stage_metrics, movement_type, model_name)
     try:
         # 1. Select the correct assets from the loaded dictionary
-        assets = model_assets[movement_type][model_name]
-        model = assets["model"]
-        scaler = assets["scaler"]
-        label_encoder = assets["le"]
-
-        # 2. Reshape and Normalize Data
-        live_movement_reshaped = reshape_from_request(movement_data)
-        live_movement_normalized = normalize_by_first_frame(live_movement_reshaped)
-        if live_movement_normalized is None:
+        with timer.stage("load_model"):
+            assets = model_registry.get(movement_type, model_name)
+
+        # 2. Reshape Data
+        live_movement_reshaped, error = read_movement_quats(content, timer)
+        if error: return error
+
+        # 3. Normalize and Extract Features (cached per recording)
+        try:
+            features = extract_features_cached(live_movement_reshaped, timer, calibration)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if features is None:
             return jsonify({'error': 'Could not process movement data. It might be empty or in the wrong format.'}), 400
 
-        # 3. Extract Features
-        features = extract_features_for_movement(live_movement_normalized)
-        features_df = pd.DataFrame([features])
+        if PREDICT_BATCHING:
+            # 4./5. Scale and predict together with concurrent requests; includes the wait for the batch
+            with timer.stage("predict"):
+                prediction_label = inference_scheduler.predict(movement_type, model_name, features)
+        else:
+            features_df = pd.DataFrame([features])
 
-        # 4. Scale Features
-        features_scaled = scaler.transform(features_df)
-        
-        # 5. Make Prediction
-        prediction_encoded = model.predict(features_scaled)[0]
-        prediction_label = label_encoder.inverse_transform([prediction_encoded])[0]
+            # 4. Scale Features
+            with timer.stage("scale"):
+                features_scaled = assets["scaler"].transform(features_df)
 
-        print(model)
-        print(assets)
-        print(prediction_label)
-        
+            # 5. Make Prediction
+            with timer.stage("predict"):
+                prediction_encoded = assets["model"].predict(features_scaled)[0]
+            with timer.stage("inverse_transform"):
+                prediction_label = assets["le"].inverse_transform([prediction_encoded])[0]
+
+        log_prediction('/predict', timer, prediction=prediction_label, frames=len(live_movement_reshaped))
         return jsonify({'prediction': prediction_label, 'status': 'success'})
 
     except Exception as e:
-        # Log the full error to the server console for debugging
-        import traceback
-        traceback.print_exc()
+        # Log the full error for debugging
+        logger.exception("Prediction failed for %s - %s", movement_type, model_name)
+        return jsonify({'error': f"An unexpected error occurred during prediction: {str(e)}", 'status': 'failure'}), 500
+
+# Upper limit on the number of movements accepted by a single /predict/batch call
+MAX_BATCH_SIZE = 100
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Scores many movements in one call.
+    Body: { "movements": [ { "movement_data": [...], "movement_type": "...", "model_name": "..." }, ... ] }
+    Each movement may send "movement_data_b64" (raw int16 packets) instead of "movement_data",
+    and a "calibration_id" to be normalized against that N-pose. Movements are grouped by (movement_type, model_name) so every model runs once on a stacked matrix.
+    The response has one result per movement, in request order."""
+    content = request.json or {}
+    movements = content.get('movements')
+
+    # --- Input Validation ---
+    if not isinstance(movements, list) or not movements:
+        return jsonify({'error': 'Missing required field: movements must be a non-empty list.'}), 400
+    if len(movements) > MAX_BATCH_SIZE:
+        return jsonify({'error': f"Too many movements in one batch ({len(movements)}), the limit is {MAX_BATCH_SIZE}."}), 400
+
+    results = [None] * len(movements)
+    groups = {}  # (movement_type, model_name) -> [(index, features), ...]
+
+    # 1. Validate, reshape, normalize and extract features for every movement
+    for index, movement in enumerate(movements):
+        movement = movement if isinstance(movement, dict) else {}
+        movement_type = movement.get('movement_type')
+        model_name = movement.get('model_name')
+
+        if not all([movement.get('movement_data') or movement.get('movement_data_b64'), movement_type, model_name]):
+            results[index] = {'error': 'Missing required fields: movement_data, movement_type, and model_name are required.', 'status': 'failure'}
+            continue
+        if not model_registry.has(movement_type, model_name):
+            results[index] = {'error': f"Model not found for movement '{movement_type}' with name '{model_name}'. Make sure the server has loaded it.", 'status': 'failure'}
+            continue
+
+        try:
+            calibration = get_calibration(movement)
+            timer = StageTimer(stage_metrics, movement_type, model_name)
+            with timer.stage("reshape"):
+                quats = movement_to_array(get_movement_data(movement))
+            features = extract_features_cached(quats, timer, calibration)
+            if features is None:
+                results[index] = {'error': 'Could not process movement data. It might be empty or in the wrong format.', 'status': 'failure'}
+                continue
+            groups.setdefault((movement_type, model_name), []).append((index, features))
+        except KeyError as e:
+            results[index] = {'error': e.args[0], 'status': 'failure'}
+        except ValueError as e:
+            results[index] = {'error': str(e), 'status': 'failure'}
+        except Exception as e:
+            results[index] = {'error': f"An unexpected error occurred during prediction: {str(e)}", 'status': 'failure'}
+
+    # 2. Scale and predict once per model on the stacked feature matrix
+    for (movement_type, model_name), entries in groups.items():
+        indices = [index for index, _ in entries]
+        timer = StageTimer(stage_metrics, movement_type, model_name)
+        try:
+            with timer.stage("load_model"):
+                assets = model_registry.get(movement_type, model_name)
+            features_df = pd.DataFrame([features for _, features in entries])
+            with timer.stage("scale"):
+                features_scaled = assets["scaler"].transform(features_df)
+            with timer.stage("predict"):
+                predictions_encoded = assets["model"].predict(features_scaled)
+            with timer.stage("inverse_transform"):
+                prediction_labels = assets["le"].inverse_transform(predictions_encoded)
+            for index, prediction_label in zip(indices, prediction_labels):
+                results[index] = {'prediction': prediction_label, 'status': 'success'}
+            log_prediction('/predict/batch', timer, batch_size=len(indices))
+        except Exception as e:
+            logger.exception("Batch prediction failed for %s - %s", movement_type, model_name)
+            for index in indices:
+                results[index] = {'error': f"An unexpected error occurred during prediction: {str(e)}", 'status': 'failure'}
+
+    return jsonify({'predictions': results, 'status': 'success'})
+
+# Threads used by /predict/compare to run the models of one movement side by side.
+# The heavy parts of predict_proba run in native code (libsvm, XGBoost, BLAS), which releases the GIL.
+COMPARE_THREADS = int(os.environ.get("COMPARE_THREADS", 4))
+compare_executor = ThreadPoolExecutor(max_workers=COMPARE_THREADS)
+
+def score_with_probabilities(movement_type, model_name, features_df):
+    """Label and per-class probabilities of one model bundle for a single feature row."""
+    timer = StageTimer(stage_metrics, movement_type, model_name)
+    with timer.stage("load_model"):
+        assets = model_registry.get(movement_type, model_name)
+    model, label_encoder = assets["model"], assets["le"]
+    with timer.stage("scale"):
+        features_scaled = assets["scaler"].transform(features_df)
+    with timer.stage("predict"):
+        prediction_encoded = model.predict(features_scaled)
+    with timer.stage("inverse_transform"):
+        prediction_label = label_encoder.inverse_transform(prediction_encoded)[0]
+    result = {'prediction': str(prediction_label), 'status': 'success'}
+    if hasattr(model, 'predict_proba'):
+        with timer.stage("predict_proba"):
+            probabilities = model.predict_proba(features_scaled)[0]
+        class_labels = label_encoder.inverse_transform(model.classes_)
+        result['probabilities'] = {str(label): float(p) for label, p in zip(class_labels, probabilities)}
+    log_prediction('/predict/compare', timer, prediction=prediction_label)
+    return result
+
+@app.route('/predict/compare', methods=['POST'])
+def predict_compare():
+    """Scores one movement with every model of its movement_type (or the given model_names).
+    Features are extracted once; the models run in parallel on the compare thread pool.
+    With "ensemble": true the response also has a soft-voting result (mean of the probabilities)."""
+    content = request_content()
+    movement_type = content.get('movement_type')
+
+    # --- Input Validation ---
+    if not movement_type:
+        return jsonify({'error': 'Missing required fields: movement_data and movement_type are required.'}), 400
+    model_names = content.get('model_names')
+    if model_names is None:
+        model_names = model_registry.model_names(movement_type)
+    elif not isinstance(model_names, list) or not model_names or not all(isinstance(name, str) for name in model_names):
+        return jsonify({'error': 'model_names must be a non-empty list of model names.'}), 400
+    missing = [name for name in model_names if not model_registry.has(movement_type, name)]
+    if not model_names or missing:
+        return jsonify({'error': f"Model not found for movement '{movement_type}' with name(s) {missing}. Make sure the server has loaded it."}), 404
+    try:
+        calibration = get_calibration(content)
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
+
+    timer = StageTimer(stage_metrics, movement_type, "")
+    quats, error = read_movement_quats(content, timer)
+    if error: return error
+    try:
+        features = extract_features_cached(quats, timer, calibration)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if features is None:
+        return jsonify({'error': 'Could not process movement data. It might be empty or in the wrong format.'}), 400
+    features_df = pd.DataFrame([features])
+
+    futures = {name: compare_executor.submit(score_with_probabilities, movement_type, name, features_df) for name in model_names}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            results[name] = {'error': f"An unexpected error occurred during prediction: {str(e)}", 'status': 'failure'}
+    response = {'results': results, 'status': 'success'}
+
+    if content.get('ensemble'):
+        voters = [r['probabilities'] for r in results.values() if 'probabilities' in r]
+        if voters:
+            labels = sorted({label for probabilities in voters for label in probabilities})
+            averaged = {label: float(np.mean([probabilities.get(label, 0.0) for probabilities in voters])) for label in labels}
+            response['ensemble'] = {'prediction': max(averaged, key=averaged.get), 'probabilities': averaged, 'models': len(voters)}
+        else:
+            response['ensemble'] = {'error': 'None of the models could provide probabilities.', 'status': 'failure'}
+
+    return jsonify(response)
+
+@app.route('/predict/sequence', methods=['POST'])
+def predict_sequence():
+    """Scores one movement with a Keras sequence (LSTM) model. Same movement_data fields as /predict,
+    plus model_name (the .h5 file name without extension). Concurrent requests are micro-batched."""
+    content = request_content()
+    model_name = content.get('model_name')
+
+    if not model_name:
+        return jsonify({'error': 'Missing required fields: movement_data and model_name are required.'}), 400
+    if not sequence_registry.has(model_name):
+        return jsonify({'error': f"Sequence model '{model_name}' not found."}), 404
+
+    timer = StageTimer(stage_metrics, "sequence", model_name)
+    quats, error = read_movement_quats(content, timer)
+    if error: return error
+    try:
+        with timer.stage("load_model"):
+            model = sequence_registry.get(model_name)
+    except ImportError as e:
+        return jsonify({'error': f"Sequence models are not available on this server: {e}", 'status': 'failure'}), 503
+    except Exception as e:
+        logger.exception("Loading sequence model %s failed", model_name)
+        return jsonify({'error': f"An unexpected error occurred during prediction: {str(e)}", 'status': 'failure'}), 500
+
+    try:
+        # The predict stage includes the time spent waiting for the micro-batch
+        with timer.stage("predict"):
+            prediction_label, probabilities = model.predict(quats)
+        log_prediction('/predict/sequence', timer, prediction=prediction_label, frames=len(quats))
+        return jsonify({'prediction': prediction_label, 'probabilities': probabilities, 'status': 'success'})
+    except Exception as e:
+        logger.exception("Sequence prediction failed for %s", model_name)
         return jsonify({'error': f"An unexpected error occurred during prediction: {str(e)}", 'status': 'failure'}), 500
 
+# Skeletons /skeleton can compute joint trajectories for
+SKELETONS = {'upper_body': skeleton.UPPER_BODY, 'playback': skeleton.PLAYBACK_VIEW}
+
+@app.route('/skeleton', methods=['POST'])
+def skeleton_trajectory():
+    """Joint positions of every frame for the avatar components, from the batched forward kinematics
+    in skeleton.py. Same movement_data fields as /predict; optional "skeleton" (default upper_body),
+    "normalize" (relative to the first frame, so the avatar starts in the rest pose), "calibration_id"
+    (relative to that N-pose instead) and "angles"."""
+    content = request_content()
+    skeleton_name = content.get('skeleton', 'upper_body')
+
+    if not isinstance(skeleton_name, str) or skeleton_name not in SKELETONS:
+        return jsonify({'error': f"Unknown skeleton '{skeleton_name}', expected one of {sorted(SKELETONS)}."}), 400
+    quats, error = read_movement_quats(content)
+    if error: return error
+    try:
+        calibration = get_calibration(content)
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
+    if calibration is not None:
+        try:
+            quats = calibration.apply(quats)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    elif str(content.get('normalize', '')).lower() in ('1', 'true'):
+        try:
+            quats = feature_engine.normalize_by_first_frame(quats)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    selected = SKELETONS[skeleton_name]
+    body = {'skeleton': skeleton_name, **selected.trajectory_payload(quats), 'status': 'success'}
+    if str(content.get('angles', '')).lower() in ('1', 'true'):
+        body['angle_names'] = selected.angle_names()
+        body['angles'] = np.round(selected.joint_angles(quats), 2).tolist()
+    return jsonify(body)
+
+@app.route('/calibration', methods=['POST'])
+def create_calibration():
+    """Stores the N-pose of a patient/session and returns its calibration_id. Same movement_data fields
+    as /predict (a short recording of the patient standing still in the N-pose), plus optional
+    "patient_id" and "session_id". Later requests send the calibration_id instead of the N-pose."""
+    content = request_content()
+    quats, error = read_movement_quats(content)
+    if error: return error
+    try:
+        calibration = calibration_store.create(quats, content.get('patient_id'), content.get('session_id'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ZeroDivisionError:
+        return jsonify({'error': 'A sensor only sent zero quaternions in the N-pose recording.'}), 400
+    logger.info(json.dumps({'event': 'calibration', **calibration.describe()}))
+    return jsonify({**calibration.describe(), 'idle_ttl_seconds': calibration_store.ttl_seconds, 'status': 'success'}), 201
+
+@app.route('/calibration/<calibration_id>', methods=['GET', 'DELETE'])
+def calibration_detail(calibration_id):
+    """GET describes a stored calibration (and counts as a use); DELETE removes it, e.g. at the end of a session."""
+    if request.method == 'DELETE':
+        if not calibration_store.delete(calibration_id):
+            return jsonify({'error': f"Calibration '{calibration_id}' not found or expired."}), 404
+        return jsonify({'calibration_id': calibration_id, 'status': 'deleted'})
+    calibration = calibration_store.get(calibration_id)
+    if calibration is None:
+        return jsonify({'error': f"Calibration '{calibration_id}' not found or expired."}), 404
+    return jsonify({**calibration.describe(), 'status': 'success'})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus-style metrics of this process: per-stage latency histograms and feature cache counters."""
+    cache = feature_cache.stats()
+    extra = ["# TYPE ml_api_feature_cache_hits_total counter", f"ml_api_feature_cache_hits_total {cache['hits']}",
+             "# TYPE ml_api_feature_cache_misses_total counter", f"ml_api_feature_cache_misses_total {cache['misses']}",
+             "# TYPE ml_api_models_loaded gauge", f"ml_api_models_loaded {len(model_registry.loaded())}"]
+    batch_stats = inference_scheduler.stats()
+    for metric, field in (("ml_api_batches_total", "batches"), ("ml_api_batched_requests_total", "items")):
+        extra.append(f"# TYPE {metric} counter")
+        for queue_name, batches in batch_stats.items():
+            movement_type, model_name = queue_name.split("/", 1)
+            extra.append(f'{metric}{{movement_type="{movement_type}",model_name="{model_name}"}} {batches[field]}')
+    return Response(stage_metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Health/readiness check: which models exist and which are loaded in this process.
+    Not ready (503) until the models folder has been indexed and every HOT_MODELS entry is loaded.
+    Hot bundles are pinned in the registry, so once ready, LRU eviction cannot make it not ready again."""
+    available = {movement_type: model_registry.model_names(movement_type) for movement_type in model_registry.index}
+    loaded_pairs = model_registry.loaded()
+    loaded = [f"{movement_type}/{model_name}" for movement_type, model_name in loaded_pairs]
+    ready = bool(available) and all(pair in loaded_pairs for pair in model_registry.expand(HOT_MODELS))
+    body = {'status': 'ready' if ready else 'not_ready', 'pid': os.getpid(), 'model_format': MODEL_FORMAT,
+            'available_models': available, 'loaded_models': loaded,
+            'feature_cache': feature_cache.stats(), 'calibrations': calibration_store.stats(),
+            'sequence_models': {'available': sequence_registry.model_names(), 'loaded': sequence_registry.loaded()}}
+    return jsonify(body), 200 if ready else 503
+
+# WebSocket endpoint for mid-repetition feedback (see streaming.py)
+streaming.register_streaming(app, model_registry)
+
+def create_app():
+    """Production entry point (see wsgi.py): indexes and preloads the models, then returns the app."""
+    load_all_models()
+    return app
+
 if __name__ == '__main__':
     load_all_models()  # Load models when the script starts
+    load_sequence_models()
     app.run(debug=True, port=5000)
 
@@ -0,0 +1,60 @@
+import threading
+import time
+import pandas as pd
+from micro_batching import MicroBatcher
+
+# --- DYNAMIC MICRO-BATCHING FOR THE CLASSICAL MODELS ---
+# Every /predict call used to run scaler.transform + model.predict on a one-row DataFrame, where
+# the fixed per-call overhead of scikit-learn/XGBoost costs more than the arithmetic. The
+# scheduler queues feature rows per (movement_type, model_name) and scores each queue as one
+# stacked matrix once `max_batch_size` rows are waiting or the oldest row has waited
+# `max_wait_ms`. Every caller gets its own label back.
+# Batches can only form from requests in the same process; behind gunicorn this means the
+# threads of one worker (ML_API_THREADS).
+
+
+class InferenceScheduler:
+
+    def __init__(self, model_registry, max_batch_size=32, max_wait_ms=1.0, stage_metrics=None):
+        self.model_registry = model_registry
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stage_metrics = stage_metrics
+        # (movement_type, model_name) -> MicroBatcher
+        self.batchers = {}
+        self.lock = threading.Lock()
+
+    def _batcher(self, movement_type, model_name):
+        key = (movement_type, model_name)
+        batcher = self.batchers.get(key)
+        if batcher is None:
+            with self.lock:
+                batcher = self.batchers.get(key)
+                if batcher is None:
+                    batcher = MicroBatcher(lambda rows: self._run_batch(movement_type, model_name, rows),
+                                           self.max_batch_size, self.max_wait_ms, name=f"batch-{movement_type}-{model_name}")
+                    self.batchers[key] = batcher
+        return batcher
+
+    def _run_batch(self, movement_type, model_name, rows):
+        """Scores a list of feature dicts in one scaler/model call; returns one label per row."""
+        start = time.perf_counter()
+        assets = self.model_registry.get(movement_type, model_name)
+        features_scaled = assets["scaler"].transform(pd.DataFrame(rows))
+        labels = assets["le"].inverse_transform(assets["model"].predict(features_scaled))
+        if self.stage_metrics is not None:
+            self.stage_metrics.observe("batch", time.perf_counter() - start, movement_type, model_name)
+        return list(labels)
+
+    def submit(self, movement_type, model_name, features):
+        """Queues one feature dict; the Future resolves to its predicted label."""
+        return self._batcher(movement_type, model_name).submit(features)
+
+    def predict(self, movement_type, model_name, features, timeout=None):
+        return self.submit(movement_type, model_name, features).result(timeout)
+
+    def stats(self):
+        """Batch counters per "MovementType/ModelName" queue."""
+        with self.lock:
+            batchers = dict(self.batchers)
+        return {f"{movement_type}/{model_name}": batcher.stats() for (movement_type, model_name), batcher in batchers.items()}
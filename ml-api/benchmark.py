@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Replayed recordings repeat, so the feature cache would turn every pass after the first into
+# cache hits, and one log line per request would time the log handler; both are off unless asked for.
+os.environ.setdefault("FEATURE_CACHE_SIZE", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import app as ml_app
+import feature_engine
+
+# --- SERVING BENCHMARK ---
+# Replays real ThesisDataSet recordings through the serving path and reports p50/p95/p99 latency:
+#   stages      reshape -> normalize -> extract (once per recording), then scale -> predict ->
+#               inverse_transform for every model in final_models (per movement/model)
+#   http        end-to-end POST /predict through the Flask test client at each --concurrency,
+#               with requests per second
+# Results are written as JSON; with --baseline a run fails (exit code 1) when a p95 latency
+# grows, or a throughput drops, by more than --threshold compared to the baseline.
+#
+#   python benchmark.py --output bench.json                       # record a baseline
+#   python benchmark.py --baseline bench.json --threshold 0.2     # compare against it
+
+DEFAULT_DATASET_FOLDER = os.path.join("..", "dataAnalysisAndModeling", "ThesisDataSet")
+PERCENTILES = (50, 95, 99)
+# Differences below this are timer noise for sub-millisecond stages and never count as a regression
+MIN_REGRESSION_MS = 0.1
+
+
+def load_recordings(dataset_root, movement, limit):
+    """Up to `limit` frame lists ([40 floats] per frame, as sent to /predict) of one movement."""
+    paths = []
+    for folder, _, files in os.walk(os.path.join(dataset_root, movement)):
+        if os.path.basename(folder).startswith('tpose'): continue
+        paths.extend(os.path.join(folder, f) for f in files if f.startswith("movement_") and f.endswith(".pkl"))
+    # Spread the sample over users and labels instead of taking the first folder
+    paths = sorted(paths)
+    step = max(1, len(paths) // limit) if limit else 1
+    recordings = []
+    for path in paths[::step][:limit or None]:
+        with open(path, 'rb') as f:
+            recordings.append(pickle.load(f)['data'])
+    return recordings
+
+
+def summarize(latencies_s, wall_s=None):
+    latencies_ms = np.asarray(latencies_s) * 1000
+    summary = {"count": len(latencies_ms)}
+    summary.update({f"p{p}_ms": round(float(np.percentile(latencies_ms, p)), 4) for p in PERCENTILES})
+    if wall_s:
+        summary["rps"] = round(len(latencies_ms) / wall_s, 2)
+    return summary
+
+
+def _pipeline(name):
+    """(reshape, normalize, extract) functions of the vectorized serving path or the legacy one."""
+    if name == "legacy":
+        return ml_app.reshape_from_request, ml_app.normalize_by_first_frame, ml_app.extract_features_for_movement
+    return feature_engine.frames_to_array, feature_engine.normalize_by_first_frame, feature_engine.extract_features_for_movement
+
+
+def bench_stages(recordings_by_movement, models_by_movement, pipeline="engine", repeat=1):
+    reshape, normalize, extract = _pipeline(pipeline)
+    timings = {}
+
+    def timed(key, keep, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        if keep: timings.setdefault(key, []).append(time.perf_counter() - start)
+        return result
+
+    for movement, recordings in recordings_by_movement.items():
+        # An untimed pass over the first recording warms up the models
+        for frames, keep in [(recordings[0], False)] + [(frames, True) for frames in recordings * repeat]:
+            start = time.perf_counter()
+            reshaped = timed("stage/reshape", keep, reshape, frames)
+            normalized = timed("stage/normalize", keep, normalize, reshaped)
+            features_df = pd.DataFrame([timed("stage/extract", keep, extract, normalized)])
+            features_s = time.perf_counter() - start
+
+            for model_name, assets in models_by_movement.get(movement, {}).items():
+                key = f"model/{movement}/{model_name}"
+                start = time.perf_counter()
+                scaled = timed(f"{key}/scale", keep, assets["scaler"].transform, features_df)
+                encoded = timed(f"{key}/predict", keep, assets["model"].predict, scaled)
+                timed(f"{key}/inverse_transform", keep, assets["le"].inverse_transform, encoded)
+                if keep: timings.setdefault(f"{key}/total", []).append(features_s + time.perf_counter() - start)
+    return {key: summarize(values) for key, values in timings.items()}
+
+
+def bench_http(requests, concurrency):
+    """POSTs every (movement_type, model_name, frames) to /predict with `concurrency` client threads."""
+    def send(request_args):
+        movement_type, model_name, frames = request_args
+        client = ml_app.app.test_client()
+        start = time.perf_counter()
+        response = client.post('/predict', json={'movement_type': movement_type, 'model_name': model_name,
+                                                 'movement_data': frames})
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict answered {response.status_code}: {response.get_json()}")
+        return elapsed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(send, requests))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def find_regressions(results, baseline, threshold):
+    """Messages for every p95 latency (or rps) that is worse than the baseline by more than `threshold`."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous: continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold) and current["p95_ms"] - previous["p95_ms"] > MIN_REGRESSION_MS:
+            regressions.append(f"{key}: p95 {previous['p95_ms']:.3f} ms -> {current['p95_ms']:.3f} ms")
+        if "rps" in current and "rps" in previous and current["rps"] < previous["rps"] * (1 - threshold):
+            regressions.append(f"{key}: {previous['rps']:.1f} -> {current['rps']:.1f} requests/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and throughput benchmark of the ml-api serving path.")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_FOLDER)
+    parser.add_argument("--recordings", type=int, default=30, help="Recordings replayed per movement")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the recordings in the stage benchmark")
+    parser.add_argument("--pipeline", choices=["engine", "legacy"], default="engine",
+                        help="Feature extraction to time: feature_engine (served) or the legacy pandas functions")
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated client thread counts for the HTTP benchmark")
+    parser.add_argument("--http-model", action="append", help="Models used in the HTTP benchmark (default: all)")
+    parser.add_argument("--output", help="Write the results as JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    ml_app.load_all_models()
+    registry = ml_app.model_registry
+    recordings_by_movement, models_by_movement = {}, {}
+    for movement in sorted(registry.index):
+        recordings = load_recordings(args.dataset, movement, args.recordings)
+        if not recordings:
+            print(f"❌ No recordings for {movement} in '{args.dataset}', skipping.")
+            continue
+        recordings_by_movement[movement] = recordings
+        for model_name in registry.model_names(movement):
+            try:
+                models_by_movement.setdefault(movement, {})[model_name] = registry.get(movement, model_name)
+            except Exception as e:
+                print(f"❌ Skipping {movement} - {model_name}: {e}")
+
+    print(f"--- Stage benchmark ({args.pipeline} pipeline) ---")
+    results = bench_stages(recordings_by_movement, models_by_movement, args.pipeline, args.repeat)
+
+    http_requests = [(movement, model_name, frames)
+                     for movement, recordings in recordings_by_movement.items()
+                     for model_name in models_by_movement.get(movement, {})
+                     if not args.http_model or model_name in args.http_model
+                     for frames in recordings]
+    for concurrency in (int(c) for c in args.concurrency.split(",") if c.strip()):
+        print(f"--- HTTP benchmark, concurrency {concurrency} ({len(http_requests)} requests) ---")
+        results[f"http/predict/c{concurrency}"] = bench_http(http_requests, concurrency)
+
+    width = max(len(key) for key in results)
+    for key, summary in results.items():
+        line = "  ".join(f"p{p} {summary[f'p{p}_ms']:8.3f} ms" for p in PERCENTILES)
+        rps = f"  {summary['rps']:8.1f} req/s" if "rps" in summary else ""
+        print(f"{key:<{width}}  {line}{rps}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for message in regressions: print(f"   {message}")
+            sys.exit(1)
+        print(f"✅ No regression over {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
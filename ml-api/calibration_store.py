@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from feature_engine import quat_inverse, quat_multiply
+
+# --- N-POSE CALIBRATION STORE ---
+# A patient stands in the N-pose once per session. The upload is reduced to one reference
+# quaternion per sensor (the mean orientation over its frames), and its inverse is stored under a
+# calibration id. Later requests send only that id. Normalizing a recording against the N-pose
+# is then one broadcast multiply, inverse_reference * q, over all frames and sensors.
+#
+# Entries are evicted after `ttl_seconds` without use, and the least recently used ones beyond
+# `max_entries`. By default calibrations only live in this process. With a `folder`, every
+# calibration is also written there as <id>.npz. Other gunicorn workers load it from there on
+# first use, so an id works whichever worker gets the request. The file's mtime is the shared
+# "last used" time, and a file is deleted once no worker has used it within the TTL. Evicting an
+# entry beyond `max_entries` only frees this process's memory; the file stays for the other
+# workers. A deleted file ends the calibration everywhere: workers check that it still exists
+# before serving their in-memory copy.
+
+
+def reference_inverse(quats):
+    """(frames, sensors, 4) N-pose recording -> (sensors, 4) inverse of each sensor's mean orientation.
+    q and -q are the same rotation, so every frame is flipped to the first frame's hemisphere before averaging."""
+    if quats is None or len(quats) == 0:
+        raise ValueError("The N-pose recording is empty.")
+    signs = np.sign(np.sum(quats * quats[:1], axis=-1, keepdims=True))
+    mean = np.mean(quats * np.where(signs == 0, 1, signs), axis=0)
+    norms = np.linalg.norm(mean, axis=-1, keepdims=True)
+    if np.any(norms == 0):
+        raise ZeroDivisionError("a sensor has no orientation in the N-pose recording (all-zero quaternions)")
+    return quat_inverse(mean / norms)
+
+
+class Calibration:
+
+    def __init__(self, calibration_id, inverse, frames, patient_id=None, session_id=None, created=None):
+        self.calibration_id = calibration_id
+        self.inverse = inverse
+        self.frames = frames
+        self.patient_id = patient_id
+        self.session_id = session_id
+        self.created = time.time() if created is None else created
+
+    def apply(self, quats):
+        """Normalizes a (frames, sensors, 4) recording against the N-pose. None for an empty recording."""
+        if quats is None or len(quats) == 0: return None
+        if quats.shape[1:] != self.inverse.shape:
+            raise ValueError(f"The recording has {quats.shape[1]} sensors, calibration '{self.calibration_id}' has {len(self.inverse)}.")
+        return quat_multiply(self.inverse, quats)
+
+    def describe(self):
+        return {'calibration_id': self.calibration_id, 'patient_id': self.patient_id, 'session_id': self.session_id,
+                'frames': self.frames, 'sensors': len(self.inverse), 'created': self.created}
+
+
+class CalibrationStore:
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, folder=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.folder = folder
+        # Shared mtimes are refreshed at most this often per calibration and process
+        self.touch_interval = ttl_seconds / 10
+        # id -> [calibration, last used, last mtime refresh], least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    def _path(self, calibration_id):
+        return os.path.join(self.folder, f"{calibration_id}.npz")
+
+    def create(self, quats, patient_id=None, session_id=None):
+        """Stores the calibration of an N-pose recording; returns the Calibration with its new id."""
+        calibration = Calibration(uuid.uuid4().hex, reference_inverse(quats), len(quats), patient_id, session_id)
+        if self.folder:
+            self._sweep()
+            # Write then rename, so other workers never read a partial file
+            temporary = self._path(calibration.calibration_id) + ".tmp"
+            with open(temporary, "wb") as f:
+                np.savez(f, inverse=calibration.inverse, frames=calibration.frames, created=calibration.created,
+                         patient_id=str(patient_id or ""), session_id=str(session_id or ""))
+            os.replace(temporary, self._path(calibration.calibration_id))
+        now = time.time()
+        self._remember(calibration, now)
+        return calibration
+
+    def get(self, calibration_id):
+        """The Calibration for `calibration_id`, or None when it is unknown or was idle too long."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(calibration_id)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                entry[1] = now
+                self.entries.move_to_end(calibration_id)
+                touch = self.folder and now - entry[2] > self.touch_interval
+                if touch: entry[2] = now
+                calibration = entry[0]
+            else:
+                # An expired entry's file is deleted by _load below unless another worker used it since
+                calibration, touch = None, False
+                if entry is not None: del self.entries[calibration_id]
+        if calibration is not None:
+            if self.folder and not os.path.exists(self._path(calibration_id)):
+                # Deleted by another worker (DELETE /calibration/<id>) or swept after the TTL
+                with self.lock:
+                    self.entries.pop(calibration_id, None)
+                return None
+            if touch: self._touch(calibration_id)
+            return calibration
+        # Not used recently in this process: another worker may have created or used it since
+        calibration = self._load(calibration_id, now)
+        if calibration is not None:
+            self._remember(calibration, now)
+        return calibration
+
+    def delete(self, calibration_id):
+        """Removes a calibration, in every worker when it has a file; returns whether it existed."""
+        with self.lock:
+            existed = self.entries.pop(calibration_id, None) is not None
+        if self.folder and self._is_id(calibration_id):
+            try:
+                os.remove(self._path(calibration_id))
+                existed = True
+            except FileNotFoundError:
+                pass
+        return existed
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'max_entries': self.max_entries, 'ttl_seconds': self.ttl_seconds,
+                    'folder': self.folder}
+
+    def _remember(self, calibration, now):
+        expired = []
+        with self.lock:
+            self.entries[calibration.calibration_id] = [calibration, now, now]
+            self.entries.move_to_end(calibration.calibration_id)
+            # Beyond max_entries only the memory is freed; other workers may still use the file
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            # Least recently used first, so the idle entries are at the front
+            while self.entries and now - next(iter(self.entries.values()))[1] > self.ttl_seconds:
+                expired.append(self.entries.popitem(last=False)[0])
+        if self.folder:
+            for calibration_id in expired:
+                self._remove(calibration_id, now)
+
+    @staticmethod
+    def _is_id(calibration_id):
+        # Ids are uuid4 hex strings; anything else never reaches the file system
+        return isinstance(calibration_id, str) and len(calibration_id) == 32 and all(c in "0123456789abcdef" for c in calibration_id)
+
+    def _load(self, calibration_id, now):
+        if not self.folder or not self._is_id(calibration_id):
+            return None
+        path = self._path(calibration_id)
+        try:
+            if now - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with np.load(path) as data:
+                calibration = Calibration(calibration_id, data["inverse"], int(data["frames"]),
+                                          str(data["patient_id"]) or None, str(data["session_id"]) or None,
+                                          float(data["created"]))
+        except FileNotFoundError:
+            return None
+        self._touch(calibration_id)
+        return calibration
+
+    def _remove(self, calibration_id, now):
+        """Deletes a calibration's file if no worker has used it within the TTL."""
+        try:
+            if now - os.path.getmtime(self._path(calibration_id)) > self.ttl_seconds:
+                os.remove(self._path(calibration_id))
+        except FileNotFoundError:
+            pass
+
+    def _touch(self, calibration_id):
+        try:
+            os.utime(self._path(calibration_id))
+        except FileNotFoundError:
+            pass
+
+    def _sweep(self):
+        """Deletes calibration files that no worker has used within the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.folder):
+            try:
+                if entry.name.endswith(".npz") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,89 @@
+import numpy as np
+import feature_engine
+
+# --- INCREMENTAL FEATURE ACCUMULATOR ---
+# Single-pass, constant-memory version of extract_features_for_movement.
+# Frames can be added one at a time (live streams) or in chunks (stored recordings); every
+# column (each sensor component and each relative pair s2/s5, s1/s2, s3/s8) keeps a Welford
+# mean/variance plus running min/max, so the raw recording never has to be kept around.
+# The result matches the batch features to float rounding and has the same column order.
+#
+# The training notebooks can use it too:
+#   import sys; sys.path.append('../ml-api')
+#   from feature_accumulator import MovementFeatureAccumulator
+
+
+class RunningStats:
+    """Welford mean/variance plus running min/max for every column of a frame stream."""
+
+    def __init__(self, n_columns):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, values):
+        """Adds one frame, a (n_columns,) array."""
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+        np.minimum(self.min, values, out=self.min)
+        np.maximum(self.max, values, out=self.max)
+
+    def update_chunk(self, values):
+        """Adds a (frames, n_columns) chunk, merged with Chan et al.'s parallel variance formula."""
+        chunk_count = len(values)
+        if chunk_count == 0: return
+        chunk_mean = values.mean(axis=0)
+        chunk_m2 = np.sum((values - chunk_mean) ** 2, axis=0)
+        total = self.count + chunk_count
+        delta = chunk_mean - self.mean
+        self.mean += delta * (chunk_count / total)
+        self.m2 += chunk_m2 + delta ** 2 * (self.count * chunk_count / total)
+        self.count = total
+        np.minimum(self.min, values.min(axis=0), out=self.min)
+        np.maximum(self.max, values.max(axis=0), out=self.max)
+
+    def std(self):
+        # Population std (ddof=0), like np.std in the feature extraction
+        return np.sqrt(self.m2 / self.count)
+
+
+class MovementFeatureAccumulator:
+    """Accumulates the 260 movement features of one recording, normalized by its own first frame."""
+
+    def __init__(self, num_sensors=feature_engine.NUM_SENSORS):
+        self.num_sensors = num_sensors
+        self.reference_inverse = None
+        self.stats = RunningStats((num_sensors + len(feature_engine.RELATIVE_PAIRS)) * 4)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    def add_frames(self, quats):
+        """Adds a (frames, sensors, 4) array (w, x, y, z); a single frame may be passed as (sensors, 4)."""
+        quats = np.asarray(quats, dtype=np.float64)
+        if quats.ndim == 2: quats = quats[np.newaxis]
+        if len(quats) == 0: return
+        if self.reference_inverse is None:
+            self.reference_inverse = feature_engine.quat_inverse(quats[0])
+        normalized = feature_engine.quat_multiply(self.reference_inverse, quats)
+        relative = np.stack([feature_engine.calculate_relative_quaternions(normalized, s, r)
+                             for s, r, _ in feature_engine.RELATIVE_PAIRS], axis=1)
+        columns = np.concatenate([normalized, relative], axis=1).reshape(len(quats), -1)
+        if len(columns) == 1:
+            self.stats.update(columns[0])
+        else:
+            self.stats.update_chunk(columns)
+
+    def feature_vector(self):
+        """Features as a flat array, in feature_engine.feature_names() order."""
+        stats = self.stats
+        return np.stack([stats.mean, stats.std(), stats.min, stats.max, stats.max - stats.min], axis=1).reshape(-1)
+
+    def features(self):
+        """Same dict as extract_features_for_movement."""
+        return dict(zip(feature_engine.feature_names(self.num_sensors), self.feature_vector()))
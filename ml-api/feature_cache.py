@@ -0,0 +1,53 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# --- FEATURE-VECTOR CACHE ---
+# Content-addressed cache from a recording to its extracted features. Scoring the same stored
+# recording against several models (RandomForest vs SVM vs XGBoost, ...) then costs one feature
+# extraction plus the model calls. Entries expire after `ttl_seconds` and the least recently used
+# entries are dropped beyond `max_entries`. The cache lives in one process; every gunicorn worker
+# keeps its own.
+
+
+class FeatureCache:
+
+    def __init__(self, max_entries=256, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (features, expiry time), least recently used first
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key_for(quats):
+        """Hash of a (frames, sensors, 4) recording array; JSON and binary uploads of the same data share a key."""
+        digest = hashlib.blake2b(str(quats.shape).encode(), digest_size=16)
+        digest.update(quats.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None: del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, features):
+        with self.lock:
+            self.entries[key] = (features, time.monotonic() + self.ttl_seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'max_entries': self.max_entries, 'ttl_seconds': self.ttl_seconds,
+                    'hits': self.hits, 'misses': self.misses}
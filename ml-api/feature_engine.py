@@ -0,0 +1,110 @@
+import numpy as np
+
+# --- VECTORIZED FEATURE ENGINE ---
+# NumPy version of the reshape -> normalize -> extract pipeline in app.py.
+# A recording is held as one (frames, sensors, 4) float64 array in w, x, y, z order,
+# so every quaternion operation runs on all frames (and sensors) at once.
+# The output dict has the same keys, in the same order, as extract_features_for_movement,
+# so the pickled scalers and models in final_models keep working unchanged.
+
+# Bump whenever the extracted values change, so on-disk feature caches are rebuilt
+FEATURE_VERSION = 1
+
+NUM_SENSORS = 10
+COMPONENTS = ['w', 'x', 'y', 'z']
+STAT_NAMES = ['mean', 'std', 'min', 'max', 'range']
+
+# (sensor index, reference sensor index, feature prefix) -> relative = q_ref.inverse * q
+RELATIVE_PAIRS = [(1, 4, 'rel_s2_s5'), (0, 1, 'rel_s1_s2'), (2, 7, 'rel_s3_s8')]
+
+# The recordings store every sensor as x, y, z, w; this reorders to w, x, y, z.
+_XYZW_TO_WXYZ = [3, 0, 1, 2]
+
+
+def frames_to_array(frames_list, num_sensors=NUM_SENSORS):
+    """Converts the flat list from the request into a (frames, sensors, 4) array (w, x, y, z).
+    Frames with the wrong length are skipped, like in reshape_from_request."""
+    frame_width = num_sensors * 4
+    valid_frames = [frame for frame in frames_list if len(frame) == frame_width]
+    if not valid_frames:
+        return np.empty((0, num_sensors, 4))
+    xyzw = np.asarray(valid_frames, dtype=np.float64).reshape(-1, num_sensors, 4)
+    return xyzw[..., _XYZW_TO_WXYZ]
+
+
+def decode_int16_packets(buffer, num_sensors=NUM_SENSORS):
+    """Decodes raw FF64 notification bytes (little-endian int16 w, x, y, z per sensor, scaled by 1/32768)
+    into a (frames, sensors, 4) array (w, x, y, z). Same values as parse_quaternions_int16 in the recorders."""
+    packet_size = num_sensors * 4 * 2
+    if len(buffer) == 0 or len(buffer) % packet_size != 0:
+        raise ValueError(f"Binary movement data must be a non-empty multiple of {packet_size} bytes, got {len(buffer)}.")
+    raw = np.frombuffer(buffer, dtype='<i2').reshape(-1, num_sensors, 4)
+    return raw / 32768.0
+
+
+def quat_multiply(a, b):
+    """Hamilton product a * b for arrays of quaternions (..., 4), broadcasting over leading axes."""
+    aw, ax, ay, az = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bw, bx, by, bz = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    return np.stack([
+        aw * bw - ax * bx - ay * by - az * bz,
+        ax * bw + aw * bx - az * by + ay * bz,
+        ay * bw + az * bx + aw * by - ax * bz,
+        az * bw - ay * bx + ax * by + aw * bz,
+    ], axis=-1)
+
+
+def quat_inverse(q):
+    """Inverse (conjugate / squared norm) of an array of quaternions (..., 4)."""
+    sum_of_squares = np.sum(q * q, axis=-1, keepdims=True)
+    if np.any(sum_of_squares == 0):
+        raise ZeroDivisionError("a zero quaternion (0 + 0i + 0j + 0k) cannot be inverted")
+    conjugate = q * np.array([1.0, -1.0, -1.0, -1.0])
+    return conjugate / sum_of_squares
+
+
+def normalize_by_first_frame(quats):
+    """Normalizes a (frames, sensors, 4) recording relative to its own first frame.
+    Raises ValueError when a sensor's first quaternion is all zeros (it has no inverse)."""
+    if quats is None or len(quats) == 0: return None
+    if np.any(np.all(quats[0] == 0, axis=-1)):
+        raise ValueError("The first frame contains a zero quaternion and cannot be used as reference.")
+    return quat_multiply(quat_inverse(quats[0]), quats)
+
+
+def calculate_relative_quaternions(quats, sensor, reference):
+    """Orientation of `sensor` relative to `reference` for every frame: q_ref.inverse * q."""
+    return quat_multiply(quat_inverse(quats[:, reference]), quats[:, sensor])
+
+
+def get_statistical_features(columns):
+    """mean/std/min/max/range of every column of a (frames, n) array, as (n,) arrays."""
+    # Reduce along a contiguous last axis so the sums match the per-column numpy/pandas calls.
+    series = np.ascontiguousarray(columns.T)
+    col_min = series.min(axis=1)
+    col_max = series.max(axis=1)
+    return {'mean': series.mean(axis=1), 'std': series.std(axis=1), 'min': col_min, 'max': col_max, 'range': col_max - col_min}
+
+
+def get_quaternion_features(quats, prefixes):
+    """Feature dict for a (frames, n, 4) array, one prefix per quaternion series."""
+    stats = get_statistical_features(quats.reshape(len(quats), -1))
+    features = {}
+    for i, prefix in enumerate(prefixes):
+        for c, component in enumerate(COMPONENTS):
+            for stat_name in STAT_NAMES: features[f'{prefix}_{component}_{stat_name}'] = stats[stat_name][i * 4 + c]
+    return features
+
+
+def extract_features_for_movement(normalized):
+    """Same feature dict as app.extract_features_for_movement, computed from a (frames, sensors, 4) array."""
+    relative = np.stack([calculate_relative_quaternions(normalized, s, r) for s, r, _ in RELATIVE_PAIRS], axis=1)
+    quats = np.concatenate([normalized, relative], axis=1)
+    prefixes = [f's{i+1}' for i in range(normalized.shape[1])] + [prefix for _, _, prefix in RELATIVE_PAIRS]
+    return get_quaternion_features(quats, prefixes)
+
+
+def feature_names(num_sensors=NUM_SENSORS):
+    """Column order of the feature vector the scalers were fitted on."""
+    prefixes = [f's{i+1}' for i in range(num_sensors)] + [prefix for _, _, prefix in RELATIVE_PAIRS]
+    return [f'{p}_{c}_{s}' for p in prefixes for c in COMPONENTS for s in STAT_NAMES]
@@ -0,0 +1,35 @@
+import os
+import multiprocessing
+
+# --- GUNICORN SETTINGS FOR ml-api ---
+# Start with:  gunicorn -c gunicorn.conf.py wsgi:app
+
+bind = os.environ.get("ML_API_BIND", "0.0.0.0:5000")
+
+# Several worker processes so one slow prediction does not block other patients,
+# each with a few threads for requests that are waiting on I/O.
+workers = int(os.environ.get("ML_API_WORKERS", min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get("ML_API_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.environ.get("ML_API_TIMEOUT", 60))
+
+# Load the app (and the models) in the master before forking, so workers share them copy-on-write
+preload_app = True
+
+# Preload every model unless a hot set was configured; lazy loading would give each worker its own copy
+os.environ.setdefault("HOT_MODELS", "*")
+
+# Calibrations must be visible to every worker, whichever one created them
+os.environ.setdefault("CALIBRATION_FOLDER", os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibrations"))
+if workers > 1 and not os.environ["CALIBRATION_FOLDER"]:
+    raise SystemExit("CALIBRATION_FOLDER is empty: calibration ids would only work on the worker that created them")
+
+# One BLAS/OpenMP thread per worker thread; the parallelism comes from workers and threads
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+
+
+def post_worker_init(worker):
+    # Sequence (TensorFlow) models are not fork-safe, so they are loaded in each worker instead
+    from app import load_sequence_models
+    load_sequence_models()
@@ -0,0 +1,74 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# --- LATENCY METRICS ---
+# Per-stage latency histograms (reshape, normalize, extract, scale, predict, inverse_transform, total)
+# per movement type and model, rendered in the Prometheus text format on /metrics.
+# Metrics are kept per process; behind gunicorn every worker reports its own numbers.
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class StageMetrics:
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # (stage, movement_type, model_name) -> [bucket counts..., +Inf count], sum
+        self.counts = {}
+        self.sums = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds, movement_type="", model_name=""):
+        key = (stage, movement_type or "", model_name or "")
+        with self.lock:
+            counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound: counts[i] += 1
+            counts[-1] += 1
+            self.sums[key] = self.sums.get(key, 0.0) + seconds
+
+    def render(self, extra_lines=()):
+        """Prometheus text exposition of all histograms, followed by any extra sample lines."""
+        lines = ["# HELP ml_api_stage_seconds Latency of each prediction stage in seconds.",
+                 "# TYPE ml_api_stage_seconds histogram"]
+        with self.lock:
+            for (stage, movement_type, model_name), counts in sorted(self.counts.items()):
+                labels = f'stage="{stage}",movement_type="{movement_type}",model_name="{model_name}"'
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'ml_api_stage_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'ml_api_stage_seconds_bucket{{{labels},le="+Inf"}} {counts[-1]}')
+                lines.append(f'ml_api_stage_seconds_sum{{{labels}}} {self.sums[(stage, movement_type, model_name)]}')
+                lines.append(f'ml_api_stage_seconds_count{{{labels}}} {counts[-1]}')
+        lines.extend(extra_lines)
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """Times the stages of one request. Durations go to the histograms and are kept for the request log."""
+
+    def __init__(self, metrics, movement_type="", model_name=""):
+        self.metrics = metrics
+        self.movement_type = movement_type
+        self.model_name = model_name
+        self.stages = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            self.metrics.observe(name, elapsed, self.movement_type, self.model_name)
+
+    def finish(self):
+        """Records the total time since the timer was created and returns the stage times in ms."""
+        total = time.perf_counter() - self.started
+        self.metrics.observe("total", total, self.movement_type, self.model_name)
+        timings = {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+        timings["total"] = round(total * 1000, 3)
+        return timings
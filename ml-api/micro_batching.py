@@ -0,0 +1,95 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# --- MICRO-BATCHING ---
+# Concurrent requests hand their inputs to a MicroBatcher instead of calling the model themselves.
+# One worker thread takes the first waiting input, collects more until `max_batch_size` inputs
+# are queued or `max_wait_ms` has passed, runs them through the model in a single call and hands
+# every caller its own result. If the batch call fails, the inputs are run one by one, so only the
+# caller whose input failed gets the exception. Under load the per-call overhead is paid once per batch; a lone
+# request waits at most `max_wait_ms`.
+#
+# The worker thread is started on first use in each process, so a batcher created in the gunicorn
+# master before forking gets its own thread (and queue) in every worker.
+
+
+class MicroBatcher:
+
+    def __init__(self, run_batch, max_batch_size=16, max_wait_ms=5.0, name="micro-batcher"):
+        # run_batch(list of inputs) -> list of results in the same order
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self.queue = queue.Queue()
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item):
+        """Queues one input; the returned Future gets its result (or the exception its input raised)."""
+        self._ensure_worker()
+        future = Future()
+        self.queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def _ensure_worker(self):
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked: the parent's thread does not exist here and its queue is not ours
+                self.queue = queue.Queue()
+                self.thread = None
+                self.pid = os.getpid()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, args=(self.queue,), name=self.name, daemon=True)
+                self.thread.start()
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                self._resolve(batch)
+            except Exception:
+                # One bad input must not fail its neighbours: score the items one by one, so each
+                # caller gets its own result or its own exception
+                for entry in batch:
+                    try:
+                        self._resolve([entry])
+                    except Exception as e:
+                        entry[1].set_exception(e)
+
+    def _resolve(self, batch):
+        """Runs one batch and sets every future's result. Raises if run_batch fails; a result list of
+        the wrong length fails every future of the batch, so no caller waits forever."""
+        results = self.run_batch([item for item, _ in batch])
+        if len(results) != len(batch):
+            error = RuntimeError(f"{self.name}: run_batch returned {len(results)} results for {len(batch)} inputs")
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {'batches': self.batches, 'items': self.items, 'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000, 'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0}
@@ -0,0 +1,129 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# --- LAZY MODEL REGISTRY ---
+# Indexes the final_model_* / final_scaler_* / final_label_encoder_* files at startup without
+# unpickling anything. A movement/model bundle is loaded on its first request and kept in an LRU
+# cache that is bounded by memory; the size of a bundle is estimated from its pickle files.
+# A "hot" set of bundles can be preloaded so the common requests never wait for unpickling.
+# Hot bundles are pinned: LRU eviction skips them, even when they alone exceed the memory budget.
+
+
+class ModelRegistry:
+
+    def __init__(self, folder, max_bytes=512 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        # { movement_type: { model_name: (model_path, scaler_path, le_path) } }
+        self.index = {}
+        # (movement_type, model_name) -> (assets, size in bytes), least recently used first
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        self.pinned = set()
+        self.lock = threading.Lock()
+        self.loading = {}
+
+    def scan(self):
+        """Finds every complete model/scaler/encoder triple in the folder. Nothing is loaded."""
+        self.index = {}
+        if not os.path.isdir(self.folder):
+            print(f"ERROR: Models folder not found at '{self.folder}'")
+            return
+        for filename in os.listdir(self.folder):
+            if filename.startswith("final_model_") and filename.endswith(".pkl"):
+                # Example filename: "final_model_ShoulderAbduction_RandomForest.pkl"
+                # The last part is the model name, everything before it is the movement type.
+                parts = filename.replace("final_model_", "").replace(".pkl", "").split("_")
+                model_name = parts[-1]
+                movement_type = "_".join(parts[:-1])
+                paths = tuple(os.path.join(self.folder, f"{prefix}_{movement_type}_{model_name}.pkl")
+                              for prefix in ("final_model", "final_scaler", "final_label_encoder"))
+                if not all(os.path.isfile(path) for path in paths):
+                    print(f"❌ Incomplete assets for {movement_type} - {model_name}, skipping.")
+                    continue
+                self.index.setdefault(movement_type, {})[model_name] = paths
+        print(f"--- Indexed {sum(len(models) for models in self.index.values())} models in '{self.folder}' ---")
+
+    def has(self, movement_type, model_name):
+        return model_name in self.index.get(movement_type, {})
+
+    def model_names(self, movement_type):
+        return sorted(self.index.get(movement_type, {}))
+
+    def loaded(self):
+        """(movement_type, model_name) pairs currently held in memory."""
+        with self.lock:
+            return list(self.cache)
+
+    def get(self, movement_type, model_name):
+        """Returns { "model", "scaler", "le" } for the bundle, loading it on first use.
+        Raises KeyError for unknown bundles; unpickling errors are passed on to the caller."""
+        key = (movement_type, model_name)
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key][0]
+            paths = self.index[movement_type][model_name]
+            # One loader per bundle; requests for other (cached) bundles are not blocked meanwhile
+            load_lock = self.loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self.lock:
+                if key in self.cache:
+                    return self.cache[key][0]
+
+            try:
+                assets = self.load_assets(paths)
+                size = sum(os.path.getsize(path) for path in paths)
+                with self.lock:
+                    self.cache[key] = (assets, size)
+                    self.cached_bytes += size
+                    self._evict(key)
+            finally:
+                # Also after a failed load, so the lock entry does not outlive it
+                with self.lock:
+                    self.loading.pop(key, None)
+            print(f"✅ Loaded: {movement_type} - {model_name}")
+            return assets
+
+    def load_assets(self, paths):
+        """Unpickles one (model, scaler, label encoder) triple from the index."""
+        model_path, scaler_path, le_path = paths
+        with open(model_path, 'rb') as f: model = pickle.load(f)
+        with open(scaler_path, 'rb') as f: scaler = pickle.load(f)
+        with open(le_path, 'rb') as f: le = pickle.load(f)
+        return {"model": model, "scaler": scaler, "le": le}
+
+    def _evict(self, loaded_key):
+        # Drop least recently used bundles until the cache fits, but never a pinned one or the one just loaded
+        for key in list(self.cache):
+            if self.cached_bytes <= self.max_bytes:
+                break
+            if key == loaded_key or key in self.pinned:
+                continue
+            _, size = self.cache.pop(key)
+            self.cached_bytes -= size
+            print(f"Evicted: {key[0]} - {key[1]}")
+
+    def expand(self, hot_models):
+        """Turns "MovementType/ModelName" entries into (movement_type, model_name) pairs.
+        A single "*" entry stands for every indexed bundle."""
+        if [entry.strip() for entry in hot_models] == ["*"]:
+            return [(movement_type, model_name) for movement_type, models in self.index.items() for model_name in models]
+        return [tuple(entry.strip().partition("/")[::2]) for entry in hot_models]
+
+    def preload(self, hot_models):
+        """Loads the given bundles (see expand) ahead of the first request and pins them in memory."""
+        for movement_type, model_name in self.expand(hot_models):
+            entry = f"{movement_type}/{model_name}"
+            if not self.has(movement_type, model_name):
+                print(f"❌ Hot model '{entry}' not found in '{self.folder}'.")
+                continue
+            with self.lock:
+                self.pinned.add((movement_type, model_name))
+            try:
+                self.get(movement_type, model_name)
+            except Exception as e:
+                print(f"❌ FAILED to load assets for {movement_type} - {model_name}: {e}")
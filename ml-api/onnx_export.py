@@ -0,0 +1,127 @@
+import argparse
+import copy
+import json
+import os
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from skl2onnx import convert_sklearn, update_registered_converter
+from skl2onnx.common.data_types import FloatTensorType
+from skl2onnx.common.shape_calculator import calculate_linear_classifier_output_shapes
+
+from model_registry import ModelRegistry
+
+try:
+    from xgboost import XGBClassifier
+    from onnxmltools.convert.xgboost.operator_converters.XGBoost import convert_xgboost
+    update_registered_converter(XGBClassifier, "XGBoostXGBClassifier", calculate_linear_classifier_output_shapes,
+                                convert_xgboost, options={"nocl": [True, False], "zipmap": [True, False, "columns"]})
+except ImportError:
+    XGBClassifier = None
+
+# --- ONNX EXPORT ---
+# Converts every final_model_/final_scaler_/final_label_encoder_ triple in final_models into one
+# ONNX graph, onnx_models/final_<MovementType>_<ModelName>.onnx, served with MODEL_FORMAT=onnx
+# (see onnx_serving.py):
+#   - input "features": float32 [N, 260] in feature_engine.feature_names order, unscaled
+#   - outputs: encoded label [N] and class probabilities [N, classes]
+#   - metadata: "classes" (label encoder classes), "model_classes", "feature_names"
+# The StandardScaler is folded into the weights of linear models; for the others it becomes the
+# first node of the graph. ONNX runs in float32, so every graph is checked against its pickled
+# model on real recordings and disagreements are reported.
+#
+#   python onnx_export.py                       # final_models -> onnx_models
+#   python onnx_export.py --verify-recordings 0 # skip the check
+
+ONNX_MODELS_FOLDER = "onnx_models"
+DEFAULT_DATASET_FOLDER = os.path.join("..", "dataAnalysisAndModeling", "ThesisDataSet")
+
+
+def fold_scaler(scaler, model):
+    """Returns a copy of a linear model whose weights already include the StandardScaler, or None.
+    w . ((x - mean) / scale) + b == (w / scale) . x + (b - (w / scale) . mean)"""
+    if not isinstance(model, LogisticRegression):
+        return None
+    mean = scaler.mean_ if scaler.mean_ is not None else 0.0
+    scale = scaler.scale_ if scaler.scale_ is not None else 1.0
+    folded = copy.deepcopy(model)
+    folded.coef_ = model.coef_ / scale
+    folded.intercept_ = model.intercept_ - folded.coef_ @ np.broadcast_to(mean, folded.coef_.shape[1])
+    return folded
+
+
+def to_onnx(assets):
+    """One ONNX graph (scaler + model) for a { "model", "scaler", "le" } bundle."""
+    model, scaler, le = assets["model"], assets["scaler"], assets["le"]
+    folded = fold_scaler(scaler, model)
+    estimator = folded if folded is not None else Pipeline([("scaler", scaler), ("model", model)])
+    classifier = folded if folded is not None else model
+
+    onx = convert_sklearn(estimator, initial_types=[("features", FloatTensorType([None, scaler.n_features_in_]))],
+                          options={id(classifier): {"zipmap": False}})
+    metadata = {"classes": json.dumps(le.classes_.tolist()),
+                "model_classes": json.dumps(np.asarray(model.classes_).tolist())}
+    if hasattr(scaler, "feature_names_in_"):
+        metadata["feature_names"] = json.dumps(list(scaler.feature_names_in_))
+    for key, value in metadata.items():
+        entry = onx.metadata_props.add()
+        entry.key, entry.value = key, value
+    return onx
+
+
+def verification_features(dataset_root, movement_type, limit):
+    """Feature rows of up to `limit` real recordings of the movement, to compare ONNX and pickles on."""
+    import pandas as pd
+    import feature_engine
+    from benchmark import load_recordings
+    rows = []
+    for frames in load_recordings(dataset_root, movement_type, limit):
+        normalized = feature_engine.normalize_by_first_frame(feature_engine.frames_to_array(frames))
+        if normalized is not None:
+            rows.append(list(feature_engine.extract_features_for_movement(normalized).values()))
+    return pd.DataFrame(rows, columns=feature_engine.feature_names())
+
+
+def verify(path, assets, features):
+    """Number of rows where the ONNX graph predicts a different label than the pickled model."""
+    from onnx_serving import OnnxModelRegistry
+    onnx_assets = OnnxModelRegistry(os.path.dirname(path) or ".").load_assets((path,))
+    expected = assets["model"].predict(assets["scaler"].transform(features))
+    actual = onnx_assets["model"].predict(onnx_assets["scaler"].transform(features))
+    return int(np.sum(np.asarray(expected) != np.asarray(actual)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exports the final models (scaler included) to ONNX.")
+    parser.add_argument("--models-dir", default="final_models")
+    parser.add_argument("--output-dir", default=ONNX_MODELS_FOLDER)
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_FOLDER, help="Recordings used to verify the graphs")
+    parser.add_argument("--verify-recordings", type=int, default=50, help="Recordings per movement to verify on (0 = off)")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.models_dir)
+    registry.scan()
+    os.makedirs(args.output_dir, exist_ok=True)
+    for movement_type in sorted(registry.index):
+        features = None
+        if args.verify_recordings and os.path.isdir(args.dataset):
+            features = verification_features(args.dataset, movement_type, args.verify_recordings)
+        for model_name in registry.model_names(movement_type):
+            path = os.path.join(args.output_dir, f"final_{movement_type}_{model_name}.onnx")
+            try:
+                assets = registry.load_assets(registry.index[movement_type][model_name])
+                with open(path, "wb") as f:
+                    f.write(to_onnx(assets).SerializeToString())
+            except Exception as e:
+                print(f"❌ Could not export {movement_type} - {model_name}: {e}")
+                continue
+            message = f"✅ Exported: {path} ({os.path.getsize(path) / 1024:.0f} KB)"
+            if features is not None and len(features):
+                mismatches = verify(path, assets, features)
+                message += f", {len(features) - mismatches}/{len(features)} predictions match the pickled model"
+            print(message)
+
+
+if __name__ == "__main__":
+    main()
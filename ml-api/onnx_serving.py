@@ -0,0 +1,86 @@
+import json
+import os
+import numpy as np
+from model_registry import ModelRegistry
+
+# --- ONNX SERVING ---
+# Serves the graphs written by onnx_export.py instead of the pickled estimators. Each
+# final_<MovementType>_<ModelName>.onnx holds the StandardScaler and the model as one graph and
+# carries the label encoder classes in its metadata, so neither scikit-learn nor xgboost is
+# imported at serving time; only onnxruntime and numpy are.
+# The bundles expose the same { "model", "scaler", "le" } interface as the pickled ones, so the
+# endpoints do not know which format they are running.
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+
+class PassthroughScaler:
+    """The scaler lives inside the graph; transform only turns the feature row(s) into float32."""
+
+    def transform(self, features):
+        return np.ascontiguousarray(np.asarray(features, dtype=np.float32))
+
+
+class OnnxClassifier:
+    """predict / predict_proba / classes_ on top of an onnxruntime session (label, probabilities outputs)."""
+
+    def __init__(self, session, classes):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.classes_ = np.asarray(classes)
+
+    def _run(self, features):
+        labels, probabilities = self.session.run(None, {self.input_name: np.asarray(features, dtype=np.float32)})
+        return labels, probabilities
+
+    def predict(self, features):
+        return self._run(features)[0]
+
+    def predict_proba(self, features):
+        return self._run(features)[1]
+
+
+class OnnxLabelEncoder:
+    """inverse_transform of the LabelEncoder the model was trained with, read from the graph metadata."""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def inverse_transform(self, encoded):
+        return self.classes_[np.asarray(encoded, dtype=np.int64)]
+
+
+class OnnxModelRegistry(ModelRegistry):
+    """ModelRegistry over a folder of final_<MovementType>_<ModelName>.onnx graphs."""
+
+    def __init__(self, folder, max_bytes=512 * 1024 * 1024, intra_op_threads=1):
+        if onnxruntime is None:
+            raise ImportError("MODEL_FORMAT=onnx needs the 'onnxruntime' package.")
+        super().__init__(folder, max_bytes)
+        self.intra_op_threads = intra_op_threads
+
+    def scan(self):
+        self.index = {}
+        if not os.path.isdir(self.folder):
+            print(f"ERROR: ONNX models folder not found at '{self.folder}'")
+            return
+        for filename in os.listdir(self.folder):
+            if filename.startswith("final_") and filename.endswith(".onnx"):
+                # Example filename: "final_ShoulderAbduction_RandomForest.onnx"
+                parts = filename[len("final_"):-len(".onnx")].split("_")
+                self.index.setdefault("_".join(parts[:-1]), {})[parts[-1]] = (os.path.join(self.folder, filename),)
+        print(f"--- Indexed {sum(len(models) for models in self.index.values())} ONNX models in '{self.folder}' ---")
+
+    def load_assets(self, paths):
+        options = onnxruntime.SessionOptions()
+        # One thread per session: gunicorn workers and request threads already use the cores
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = 1
+        session = onnxruntime.InferenceSession(paths[0], options, providers=["CPUExecutionProvider"])
+        metadata = session.get_modelmeta().custom_metadata_map
+        return {"model": OnnxClassifier(session, json.loads(metadata["model_classes"])),
+                "scaler": PassthroughScaler(),
+                "le": OnnxLabelEncoder(json.loads(metadata["classes"]))}
@@ -0,0 +1,165 @@
+from collections import deque
+
+import numpy as np
+from skeleton import SENSORS
+
+# --- REPETITION SEGMENTER ---
+# Finds the repetitions in one continuous session stream, so a set of repetitions is sent as one
+# stream instead of one fixed-length capture per repetition. Every frame is looked at once:
+#   speed     RMS angular speed (rad/s) of the selected sensors. It is measured over `lag` frames,
+#             because frame to frame the sensor jitter (~0.13 rad/s at rest) hides slow movements.
+#   baseline  resting speed, updated while idle. It drops at once to lower speeds and rises slowly.
+#   excursion RMS angle (rad) between the current pose and the pose the repetition started from.
+# A repetition opens when the speed rises `start_margin` above the baseline. It closes once the
+# speed has stayed below baseline + `stop_margin` (or `stop_fraction` of the repetition's peak
+# speed, if higher) for `min_rest` seconds and the pose is back
+# within `return_fraction` of the largest excursion. The pause at the far end of a movement
+# (e.g. the arm held up in an abduction) is just as still, but the pose there has not returned.
+# A closed repetition spans from the last quiet frame before the onset (minus `lag`, at most
+# `lead` seconds back) to the end of the quiet run. The rest before and after is kept, like in
+# the recorded takes the models were trained on. Repetitions shorter than `min_duration` are dropped as bumps. Longer than `max_duration` they
+# are closed anyway and marked truncated. While idle only the last `lead` seconds of frames are kept.
+#
+#   segmenter = RepetitionSegmenter(sensors=["upper_right_arm", "lower_right_arm"])
+#   for repetition in segmenter.push(quats):     # (frames, sensors, 4) w/x/y/z, any chunk size
+#       classify(repetition.quats)
+#   last = segmenter.flush()                     # end of the session
+
+
+def rms_angle(a, b):
+    """RMS rotation angle (rad) over the sensors between two (..., sensors, 4) quaternion arrays.
+    All-zero quaternions count as no rotation."""
+    norms = np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1)
+    cosine = np.abs(np.sum(a * b, axis=-1)) / np.where(norms == 0, 1, norms)
+    cosine = np.where(norms == 0, 1.0, np.clip(cosine, 0.0, 1.0))
+    return np.sqrt(np.mean((2 * np.arccos(cosine)) ** 2, axis=-1))
+
+
+class Repetition:
+
+    def __init__(self, number, start, end, quats, truncated=False):
+        self.number = number        # 1-based, in session order
+        self.start = start          # session frame index of the first frame
+        self.end = end              # session frame index after the last frame
+        self.quats = quats          # (end - start, sensors, 4)
+        self.truncated = truncated
+
+    def describe(self):
+        return {'repetition': self.number, 'start': self.start, 'end': self.end, 'frames': len(self.quats),
+                'truncated': self.truncated}
+
+
+class RepetitionSegmenter:
+
+    def __init__(self, sensors=None, rate=20, lag=4, start_margin=0.35, stop_margin=0.15, min_rest=0.15,
+                 stop_fraction=0.2, return_fraction=0.35, min_duration=0.6, max_duration=20.0, lead=0.5):
+        # Sensor names (skeleton.SENSORS) or indices; all sensors by default
+        self.sensors = None if sensors is None else [SENSORS.index(s) if isinstance(s, str) else int(s) for s in sensors]
+        self.rate = rate
+        self.lag = lag
+        self.start_margin = start_margin
+        self.stop_margin = stop_margin
+        self.min_rest = max(1, round(min_rest * rate))
+        self.stop_fraction = stop_fraction
+        self.return_fraction = return_fraction
+        self.min_duration = round(min_duration * rate)
+        self.max_duration = round(max_duration * rate)
+        self.lead = round(lead * rate)
+        self.reset()
+
+    def reset(self):
+        self.frames = deque()       # frames from session index `first_index` on
+        self.first_index = 0
+        self.count = 0              # frames pushed
+        self.tail = None            # last `lag` frames, for the speed of the next chunk
+        self.baseline = None
+        self.speed = 0.0
+        self.active = False
+        self.start = 0
+        self.last_quiet = 0         # last frame below the stop threshold
+        self.previous_end = 0       # end of the last repetition; the next one starts after it
+        self.quiet_run = 0          # consecutive quiet frames while active
+        self.start_pose = None      # selected sensors at the first frame of the open repetition
+        self.peak_excursion = 0.0
+        self.peak_speed = 0.0
+        self.repetitions = 0
+
+    def speeds(self, quats):
+        """RMS angular speed (rad/s) at every frame of a chunk, over `lag` frames back in the stream."""
+        selected = self._select(quats)
+        history = selected if self.tail is None else np.concatenate([self.tail, selected])
+        offset = len(history) - len(selected)
+        self.tail = history[-self.lag:]
+        # Frames without `lag` predecessors (stream start) are compared with the first frame
+        previous = history[np.maximum(np.arange(offset, len(history)) - self.lag, 0)]
+        return rms_angle(selected, previous) * (self.rate / self.lag)
+
+    def _select(self, quats):
+        return quats if self.sensors is None else quats[..., self.sensors, :]
+
+    def push(self, quats):
+        """Adds (frames, sensors, 4) quaternions; returns the repetitions that closed in them."""
+        quats = np.asarray(quats, dtype=np.float64)
+        if quats.ndim == 2: quats = quats[np.newaxis]
+        closed = []
+        for speed, frame in zip(self.speeds(quats), quats):
+            index = self.count
+            self.count += 1
+            self.frames.append(frame)
+            self.speed = speed
+            if self.baseline is None or speed < self.baseline:
+                self.baseline = speed
+
+            if not self.active:
+                quiet = speed < self.baseline + self.stop_margin
+                if quiet:
+                    self.last_quiet = index
+                    self.baseline += 0.02 * (speed - self.baseline)
+                elif speed > self.baseline + self.start_margin:
+                    self.active = True
+                    self.quiet_run = 0
+                    self.start = max(self.last_quiet - self.lag, index - self.lead, self.previous_end)
+                    self.start_pose = self._select(self.frames[self.start - self.first_index])
+                    self.peak_excursion = 0.0
+                    self.peak_speed = speed
+                    continue
+                # Idle: only the frames a repetition starting at the next frame could reach back to are kept
+                keep_from = max(self.last_quiet - self.lag, index + 1 - self.lead, self.previous_end)
+                while self.first_index < keep_from:
+                    self.frames.popleft()
+                    self.first_index += 1
+                continue
+
+            self.peak_speed = max(self.peak_speed, speed)
+            quiet = speed < self.baseline + max(self.stop_margin, self.stop_fraction * self.peak_speed)
+            self.quiet_run = self.quiet_run + 1 if quiet else 0
+            excursion = rms_angle(self._select(frame), self.start_pose)
+            self.peak_excursion = max(self.peak_excursion, excursion)
+            if self.quiet_run >= self.min_rest and excursion <= self.return_fraction * self.peak_excursion:
+                repetition = self._close(index + 1)
+                if repetition: closed.append(repetition)
+            elif index + 1 - self.start >= self.max_duration:
+                closed.append(self._close(index + 1, truncated=True))
+        return closed
+
+    def flush(self):
+        """Closes a repetition that is still open at the end of the session (None if there is none)."""
+        return self._close(self.count) if self.active else None
+
+    def _close(self, end, truncated=False):
+        self.active = False
+        self.last_quiet = end - 1
+        self.previous_end = end
+        if end - self.start < self.min_duration and not truncated:
+            return None
+        frames = list(self.frames)[self.start - self.first_index:end - self.first_index]
+        self.repetitions += 1
+        return Repetition(self.repetitions, self.start, end, np.stack(frames), truncated)
+
+
+def segment_recording(quats, **options):
+    """Repetitions of a whole stored session, a (frames, sensors, 4) array; options as RepetitionSegmenter."""
+    segmenter = RepetitionSegmenter(**options)
+    repetitions = segmenter.push(quats)
+    last = segmenter.flush()
+    return repetitions + [last] if last else repetitions
@@ -0,0 +1,184 @@
+import os
+import pickle
+import threading
+import numpy as np
+import feature_engine
+from micro_batching import MicroBatcher
+
+# --- SEQUENCE (LSTM) MODELS ---
+# Serves the Keras .h5 sequence models (e.g. RightArmUpToLeft_0.h5) next to the pickled
+# classifiers. A recording is prepared the way the LSTM notebooks prepared their training data:
+#   1. normalized against its first frame (all-zero quaternions count as identity)
+#   2. padded with zeros / cut at the end to the model's sequence length ("pad", as in training),
+#      or interpolated to that length ("resample")
+#   3. scaled per feature with <name>_scaler.pkl, if present
+# Class names come from <name>_label_encoder.pkl if present, else the class index is returned.
+#
+# Models are loaded on first use (or preloaded) and warmed up with one call per batch size, so no
+# request pays for graph tracing. Requests go through a MicroBatcher per model: concurrent
+# recordings run in one forward pass. Batches are zero-padded to the next power of two, so only
+# log2(max batch size) + 1 input shapes are ever traced, all of them during warm-up.
+#
+# TensorFlow is imported on first load only. It is not fork-safe, so behind gunicorn the models
+# are loaded in each worker (see post_worker_init in gunicorn.conf.py), not in the master.
+
+# Sequence length of the LSTM notebooks (TIMESTEPS), used when the model does not declare one
+DEFAULT_TIMESTEPS = 80
+LENGTH_MODES = ("pad", "resample")
+
+_IDENTITY = np.array([1.0, 0.0, 0.0, 0.0])
+# The LSTM notebooks handed the pickled x, y, z, w columns to normalize_sequence, which reads them
+# as w, x, y, z. The models learned that layout, so the (w, x, y, z) array is turned back into it.
+_WXYZ_TO_TRAINING_LAYOUT = [1, 2, 3, 0]
+
+
+def normalize_sequence(quats):
+    """Vectorized normalize_sequence of the LSTM notebooks on a (frames, sensors, 4) array."""
+    if not quats.any():
+        return quats
+    quats = np.where(np.all(quats == 0, axis=-1, keepdims=True), _IDENTITY, quats)
+    return feature_engine.normalize_by_first_frame(quats)
+
+
+def fit_length(sequence, timesteps, mode="pad"):
+    """(frames, sensors, 4) -> (timesteps, sensors * 4) float32.
+    "pad" zero-pads / truncates at the end like pad_sequences(padding='post', truncating='post');
+    "resample" interpolates every quaternion over time (and renormalizes it) to exactly `timesteps` frames."""
+    flat = sequence.reshape(len(sequence), -1)
+    if mode == "resample" and len(flat) > 1:
+        positions = np.linspace(0, len(flat) - 1, timesteps)
+        lower = np.floor(positions).astype(int)
+        upper = np.minimum(lower + 1, len(flat) - 1)
+        weight = (positions - lower)[:, None]
+        resampled = (flat[lower] * (1 - weight) + flat[upper] * weight).reshape(timesteps, -1, 4)
+        norms = np.linalg.norm(resampled, axis=-1, keepdims=True)
+        return (resampled / np.where(norms == 0, 1, norms)).reshape(timesteps, -1).astype(np.float32)
+    fitted = np.zeros((timesteps, flat.shape[1]), dtype=np.float32)
+    fitted[:min(len(flat), timesteps)] = flat[:timesteps]
+    return fitted
+
+
+def _batch_buckets(max_batch_size):
+    """Batch sizes actually run: powers of two up to (and including) max_batch_size."""
+    buckets, size = [], 1
+    while size < max_batch_size:
+        buckets.append(size)
+        size *= 2
+    return buckets + [max_batch_size]
+
+
+class SequenceModel:
+    """One loaded .h5 model with its optional scaler and label encoder, behind a MicroBatcher."""
+
+    def __init__(self, name, model, scaler=None, le=None, length_mode="pad", max_batch_size=16, max_wait_ms=5.0):
+        self.name = name
+        self.model = model
+        self.scaler = scaler
+        self.le = le
+        self.length_mode = length_mode
+        _, timesteps, features = model.input_shape
+        self.timesteps = timesteps or DEFAULT_TIMESTEPS
+        self.features = features
+        self.buckets = _batch_buckets(max_batch_size)
+        self.batcher = MicroBatcher(self._run_batch, max_batch_size, max_wait_ms, name=f"sequence-{name}")
+
+    def prepare(self, quats):
+        """(frames, sensors, 4) w/x/y/z recording -> (timesteps, features) model input."""
+        sequence = normalize_sequence(quats[..., _WXYZ_TO_TRAINING_LAYOUT])
+        fitted = fit_length(sequence, self.timesteps, self.length_mode)
+        if self.scaler is not None:
+            fitted = self.scaler.transform(fitted).astype(np.float32)
+        return fitted
+
+    def _forward(self, inputs):
+        size = next(bucket for bucket in self.buckets if bucket >= len(inputs))
+        batch = np.zeros((size, self.timesteps, self.features), dtype=np.float32)
+        batch[:len(inputs)] = inputs
+        return np.asarray(self.model.predict_on_batch(batch))[:len(inputs)]
+
+    def _run_batch(self, inputs):
+        return list(self._forward(np.stack(inputs)))
+
+    def warm_up(self):
+        for size in self.buckets:
+            self.model.predict_on_batch(np.zeros((size, self.timesteps, self.features), dtype=np.float32))
+
+    def class_labels(self, count):
+        if self.le is not None:
+            return [str(label) for label in self.le.inverse_transform(np.arange(count))]
+        return [str(index) for index in range(count)]
+
+    def predict(self, quats):
+        """Label and class probabilities of one recording; waits for its micro-batch."""
+        probabilities = self.batcher(self.prepare(quats))
+        labels = self.class_labels(len(probabilities))
+        return labels[int(np.argmax(probabilities))], {label: float(p) for label, p in zip(labels, probabilities)}
+
+
+class SequenceModelRegistry:
+    """Finds the *.h5 models in a folder and loads (and warms up) each one on first use."""
+
+    def __init__(self, folder, length_mode="pad", max_batch_size=16, max_wait_ms=5.0):
+        if length_mode not in LENGTH_MODES:
+            raise ValueError(f"length_mode must be one of {LENGTH_MODES}, got '{length_mode}'")
+        self.folder = folder
+        self.length_mode = length_mode
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        # { model_name: .h5 path }
+        self.index = {}
+        self.models = {}
+        self.lock = threading.Lock()
+
+    def scan(self):
+        self.index = {}
+        if not os.path.isdir(self.folder):
+            return
+        for filename in sorted(os.listdir(self.folder)):
+            if filename.endswith(".h5"):
+                self.index[filename[:-len(".h5")]] = os.path.join(self.folder, filename)
+        print(f"--- Indexed {len(self.index)} sequence models in '{self.folder}' ---")
+
+    def has(self, model_name):
+        return model_name in self.index
+
+    def model_names(self):
+        return sorted(self.index)
+
+    def loaded(self):
+        return sorted(self.models)
+
+    def get(self, model_name):
+        """Returns the SequenceModel, loading and warming it up on first use.
+        Raises KeyError for unknown models and ImportError when TensorFlow is missing."""
+        model = self.models.get(model_name)
+        if model is not None:
+            return model
+        with self.lock:
+            if model_name not in self.models:
+                self.models[model_name] = self._load(model_name)
+            return self.models[model_name]
+
+    def _load(self, model_name):
+        from tensorflow.keras.models import load_model
+        path = self.index[model_name]
+        stem = path[:-len(".h5")]
+        assets = {}
+        for key, suffix in (("scaler", "_scaler.pkl"), ("le", "_label_encoder.pkl")):
+            if os.path.isfile(stem + suffix):
+                with open(stem + suffix, 'rb') as f: assets[key] = pickle.load(f)
+        model = SequenceModel(model_name, load_model(path, compile=False), length_mode=self.length_mode,
+                              max_batch_size=self.max_batch_size, max_wait_ms=self.max_wait_ms, **assets)
+        model.warm_up()
+        print(f"✅ Loaded sequence model: {model_name} (input {model.timesteps}x{model.features}, warmed up)")
+        return model
+
+    def preload(self, model_names):
+        """Loads the given models ("*" for all) ahead of the first request."""
+        if [name.strip() for name in model_names] == ["*"]:
+            model_names = self.model_names()
+        for model_name in model_names:
+            try:
+                self.get(model_name.strip())
+            except Exception as e:
+                print(f"❌ FAILED to load sequence model {model_name}: {e}")
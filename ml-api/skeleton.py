@@ -0,0 +1,152 @@
+import numpy as np
+from feature_engine import STAT_NAMES, get_statistical_features, quat_multiply
+
+# --- FORWARD KINEMATICS ---
+# Joint positions of a whole recording in a few array operations instead of one
+# Quaternion.rotate call per segment and frame. A skeleton is declared as a list of segments;
+# each segment is a bone that hangs off a parent joint and is oriented by one sensor:
+#   bone vector (world) = alignment * sensor * mounting, applied to `bone` (in the segment frame)
+# "mounting" is the fixed rotation of the segment relative to the sensor, as it sits on the
+# garment. "alignment" is a fixed rotation in the world frame, used for the display conventions of
+# the visualize.py views. All segments of all frames are rotated at once. Each joint position is
+# the sum of the bone vectors on its path from the root, which is one matrix product for all
+# frames and joints.
+#
+#   positions = UPPER_BODY.joint_positions(quats)   # (frames, sensors, 4) w/x/y/z -> (frames, joints, 3)
+#   UPPER_BODY.joints                               # joint names, positions[:, i] belongs to joints[i]
+
+# Sensor order in the recordings (s1 .. s10)
+SENSORS = ["lower_right_arm", "upper_right_arm", "right_shoulder", "first_back", "second_back",
+           "third_back", "fourth_back", "left_shoulder", "upper_left_arm", "lower_left_arm"]
+
+_IDENTITY = np.array([1.0, 0.0, 0.0, 0.0])
+
+
+def axis_angle(axis, degrees):
+    """(w, x, y, z) rotation of `degrees` around `axis`."""
+    axis = np.asarray(axis, dtype=np.float64)
+    half = np.deg2rad(degrees) / 2
+    return np.concatenate([[np.cos(half)], np.sin(half) * axis / np.linalg.norm(axis)])
+
+
+def rotate_vectors(q, v):
+    """Rotates (..., 3) vectors by unit (..., 4) quaternions, broadcasting over leading axes."""
+    w, u = q[..., :1], q[..., 1:]
+    t = 2 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+
+class Segment:
+    """One bone: it ends in `joint`, starts at the `parent` joint and follows `sensor`.
+    `mounting` and `alignment` are (axis, degrees) pairs; `bone` is its vector in the segment frame."""
+
+    def __init__(self, joint, sensor, parent, bone=(1.0, 0.0, 0.0), mounting=None, alignment=None):
+        self.joint = joint
+        self.sensor = SENSORS.index(sensor) if isinstance(sensor, str) else sensor
+        self.parent = parent
+        self.bone = np.asarray(bone, dtype=np.float64)
+        self.mounting = axis_angle(*mounting) if mounting else _IDENTITY
+        self.alignment = axis_angle(*alignment) if alignment else _IDENTITY
+
+
+class Skeleton:
+    """A tree of segments rooted at the origin. Segments must be listed after their parent.
+    `global_rotation` (axis, degrees) turns the whole skeleton, e.g. to stand it upright."""
+
+    def __init__(self, segments, root="root", global_rotation=None):
+        self.segments = segments
+        self.joints = [root] + [segment.joint for segment in segments]
+        index = {root: 0}
+        # paths[j, k] = 1 when segment k lies on the path from the root to joint j
+        self.paths = np.zeros((len(self.joints), len(segments)))
+        for k, segment in enumerate(segments):
+            if segment.parent not in index:
+                raise ValueError(f"Segment '{segment.joint}': parent joint '{segment.parent}' is not declared before it.")
+            index[segment.joint] = k + 1
+            self.paths[k + 1] = self.paths[index[segment.parent]]
+            self.paths[k + 1, k] = 1
+        self.index = index
+        # (parent joint, joint) index pairs, the lines to draw
+        self.bones = [(index[segment.parent], k + 1) for k, segment in enumerate(segments)]
+        self.sensors = np.array([segment.sensor for segment in segments])
+        self.bone_vectors_local = np.stack([segment.bone for segment in segments])
+        self.mounting = np.stack([segment.mounting for segment in segments])
+        global_q = axis_angle(*global_rotation) if global_rotation else _IDENTITY
+        self.alignment = quat_multiply(global_q, np.stack([segment.alignment for segment in segments]))
+
+    def bone_vectors(self, quats):
+        """(frames, sensors, 4) w/x/y/z -> (frames, segments, 3) world bone vectors.
+        Sensors are normalized first; an all-zero quaternion gives a zero-length bone."""
+        q = quats[:, self.sensors]
+        norms = np.linalg.norm(q, axis=-1, keepdims=True)
+        q = q / np.where(norms == 0, 1, norms)
+        world = quat_multiply(quat_multiply(self.alignment, q), self.mounting)
+        return rotate_vectors(world, self.bone_vectors_local)
+
+    def joint_positions(self, quats):
+        """(frames, sensors, 4) w/x/y/z -> (frames, joints, 3); joint 0 is the root at the origin."""
+        return self.paths @ self.bone_vectors(np.asarray(quats, dtype=np.float64))
+
+    def angle_names(self):
+        """One angle per segment whose parent joint ends another segment: the angle at that joint."""
+        names = []
+        for segment in self.segments:
+            if self.index[segment.parent] == 0:
+                continue
+            siblings = sum(other.parent == segment.parent for other in self.segments)
+            names.append(segment.parent if siblings == 1 else f"{segment.parent}_{segment.joint}")
+        return names
+
+    def joint_angles(self, quats):
+        """(frames, angles) in degrees between each bone and its parent bone (0 = straight),
+        in angle_names() order."""
+        vectors = self.bone_vectors(np.asarray(quats, dtype=np.float64))
+        pairs = [(self.index[segment.parent] - 1, k) for k, segment in enumerate(self.segments) if self.index[segment.parent] != 0]
+        parent, child = (np.array(side) for side in zip(*pairs)) if pairs else (np.array([], int), np.array([], int))
+        a, b = vectors[:, parent], vectors[:, child]
+        norms = np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1)
+        cosine = np.sum(a * b, axis=-1) / np.where(norms == 0, 1, norms)
+        return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+    def trajectory_payload(self, quats, decimals=4):
+        """JSON-ready joint trajectories for the frontend avatar components."""
+        positions = self.joint_positions(quats)
+        return {"joints": self.joints, "bones": self.bones,
+                "positions": np.round(positions, decimals).tolist()}
+
+
+def joint_angle_features(quats, skeleton=None):
+    """mean/std/min/max/range of every joint angle over a recording, as angle_<joint>_<stat> features."""
+    skeleton = skeleton or UPPER_BODY
+    stats = get_statistical_features(skeleton.joint_angles(quats))
+    return {f"angle_{name}_{stat_name}": stats[stat_name][i]
+            for i, name in enumerate(skeleton.angle_names()) for stat_name in STAT_NAMES}
+
+
+# Upper body of visualize_10_sensors: every segment along the sensor's +X axis after its mounting
+# offset, the whole body turned 90° about Y. With identity sensors the spine points along +Y.
+UPPER_BODY = Skeleton([
+    Segment("spine_1", "first_back", "pelvis", mounting=([0, 0, 1], 90)),
+    Segment("spine_2", "second_back", "spine_1", mounting=([0, 0, 1], 90)),
+    Segment("spine_3", "third_back", "spine_2", mounting=([0, 0, 1], 90)),
+    Segment("neck", "fourth_back", "spine_3", mounting=([0, 0, 1], 90)),
+    Segment("right_shoulder", "right_shoulder", "neck", mounting=([0, 1, 0], -90)),
+    Segment("right_elbow", "upper_right_arm", "right_shoulder"),
+    Segment("right_wrist", "lower_right_arm", "right_elbow"),
+    Segment("left_shoulder", "left_shoulder", "neck", mounting=([0, 1, 0], 90)),
+    Segment("left_elbow", "upper_left_arm", "left_shoulder"),
+    Segment("left_wrist", "lower_left_arm", "left_elbow"),
+], root="pelvis", global_rotation=([0, 1, 0], 90))
+
+# The view readAndVisualize.py plays recordings in (visualize_10_sensorforread): lower and upper back
+# only, shoulders 0.6 and arm segments 0.8 long, with fixed display rotations.
+PLAYBACK_VIEW = Skeleton([
+    Segment("back", "first_back", "pelvis", alignment=([0, 1, 0], 150)),
+    Segment("neck", "fourth_back", "back", alignment=([0, 1, 0], 120)),
+    Segment("right_shoulder", "right_shoulder", "neck", bone=(0.6, 0, 0), alignment=([0, -1, 0], 60)),
+    Segment("left_shoulder", "left_shoulder", "neck", bone=(0.6, 0, 0), alignment=([0, 1, 0], 60)),
+    Segment("right_elbow", "upper_right_arm", "right_shoulder", bone=(0.8, 0, 0), alignment=([0, -1, 0], 30)),
+    Segment("left_elbow", "upper_left_arm", "left_shoulder", bone=(0.8, 0, 0), alignment=([0, 1, 0], 150)),
+    Segment("right_wrist", "lower_right_arm", "right_elbow", bone=(-0.8, 0, 0)),
+    Segment("left_wrist", "lower_left_arm", "left_elbow", bone=(0.8, 0, 0), alignment=([0, 1, 0], 130)),
+], root="pelvis")
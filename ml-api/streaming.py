@@ -0,0 +1,166 @@
+import json
+import pandas as pd
+import feature_engine
+from feature_accumulator import MovementFeatureAccumulator
+from rep_segmenter import RepetitionSegmenter
+
+# --- STREAMING (WEBSOCKET) INFERENCE ---
+# Frames are pushed while the patient moves. They are normalized against the first frame
+# of the current repetition and folded into a MovementFeatureAccumulator, so a new frame
+# costs O(1) instead of recomputing the features over the whole window.
+# A prediction is emitted every `every` frames using the same model bundles as /predict.
+#
+# Protocol on /predict/stream (one JSON object per text message):
+#   -> { "movement_type": "...", "model_name": "...", "every": 20 }   first message, selects the model
+#   -> { "frames": [[40 floats], ...] }                                 frames, same layout as /predict
+#   -> <binary message>                                                 raw int16 FF64 packets instead
+#   -> { "reset": true }                                                starts a new repetition
+#   <- { "prediction": "...", "frames": n, "status": "success" }
+#
+# /predict/session takes a whole set as one stream. A RepetitionSegmenter (rep_segmenter.py) finds
+# where each repetition starts and ends, and every repetition is scored as soon as it closes, with
+# the same normalization and features as a /predict call on that repetition:
+#   -> { "movement_type": "...", "model_name": "...", "sensors": [...] }  first message; sensors optional
+#   -> { "frames": [[40 floats], ...] } or <binary message>              the continuous stream
+#   -> { "end": true }                                                  end of the set, closes an open repetition
+#   <- { "repetition": k, "start": i, "end": j, "frames": n, "truncated": false, "prediction": "...", "status": "success" }
+#   <- { "repetitions": k, "status": "finished" }                       reply to "end"
+
+# Emit a prediction every this many frames unless the client asks for something else
+DEFAULT_PREDICT_EVERY = 20
+
+
+class StreamingSession:
+    """Running feature state of one repetition for one (movement_type, model_name) bundle."""
+
+    def __init__(self, assets, every=DEFAULT_PREDICT_EVERY, num_sensors=feature_engine.NUM_SENSORS):
+        self.assets = assets
+        self.every = every
+        self.num_sensors = num_sensors
+        self.columns = feature_engine.feature_names(num_sensors)
+        self.reset()
+
+    @classmethod
+    def from_message(cls, assets, content):
+        return cls(assets, every=max(1, int(content.get('every', DEFAULT_PREDICT_EVERY))))
+
+    def handle(self, content, quats):
+        """Replies to one /predict/stream message."""
+        if content.get('reset'):
+            self.reset()
+        yield from self.push(quats)
+
+    def reset(self):
+        self.accumulator = MovementFeatureAccumulator(self.num_sensors)
+
+    def push(self, quats):
+        """Adds (frames, sensors, 4) quaternions and returns the predictions that became due."""
+        predictions = []
+        start = 0
+        while start < len(quats):
+            # Feed the frames up to the next prediction point as one chunk
+            stop = start + self.every - self.accumulator.count % self.every
+            self.accumulator.add_frames(quats[start:stop])
+            if self.accumulator.count % self.every == 0:
+                predictions.append(self.predict())
+            start = stop
+        return predictions
+
+    def features(self):
+        """Current feature vector, in the column order the scaler was fitted on."""
+        return pd.DataFrame([self.accumulator.feature_vector()], columns=self.columns)
+
+    def predict(self):
+        features_scaled = self.assets["scaler"].transform(self.features())
+        prediction_encoded = self.assets["model"].predict(features_scaled)[0]
+        prediction_label = self.assets["le"].inverse_transform([prediction_encoded])[0]
+        return {'prediction': str(prediction_label), 'frames': self.accumulator.count, 'status': 'success'}
+
+
+class SegmentingSession:
+    """Repetition segmentation of one continuous set, scoring each repetition with one model bundle."""
+
+    def __init__(self, assets, sensors=None, num_sensors=feature_engine.NUM_SENSORS):
+        self.assets = assets
+        self.segmenter = RepetitionSegmenter(sensors)
+        self.columns = feature_engine.feature_names(num_sensors)
+
+    @classmethod
+    def from_message(cls, assets, content):
+        return cls(assets, sensors=content.get('sensors'))
+
+    def handle(self, content, quats):
+        """Replies to one /predict/session message."""
+        yield from self.push(quats)
+        if content.get('end'):
+            yield from self.end()
+            yield {'repetitions': self.segmenter.repetitions, 'status': 'finished'}
+            self.segmenter.reset()
+
+    def push(self, quats):
+        """Adds (frames, sensors, 4) quaternions and returns the results of the repetitions that closed."""
+        return [self.predict(repetition) for repetition in self.segmenter.push(quats)]
+
+    def end(self):
+        repetition = self.segmenter.flush()
+        return [self.predict(repetition)] if repetition else []
+
+    def predict(self, repetition):
+        features = feature_engine.extract_features_for_movement(feature_engine.normalize_by_first_frame(repetition.quats))
+        features_scaled = self.assets["scaler"].transform(pd.DataFrame([features], columns=self.columns))
+        prediction_encoded = self.assets["model"].predict(features_scaled)[0]
+        prediction_label = self.assets["le"].inverse_transform([prediction_encoded])[0]
+        return {**repetition.describe(), 'prediction': str(prediction_label), 'status': 'success'}
+
+
+def serve_session(ws, model_registry, session_class):
+    """Receive loop shared by the WebSocket routes. Every message is decoded into (content, quats);
+    one naming a model opens a new session_class session, and the replies of session.handle are sent back."""
+    session = None
+    while True:
+        message = ws.receive()
+        if message is None:
+            return
+        try:
+            if isinstance(message, (bytes, bytearray)):
+                content, quats = {}, feature_engine.decode_int16_packets(message)
+            else:
+                content = json.loads(message)
+                quats = feature_engine.frames_to_array(content.get('frames') or [])
+
+            if 'movement_type' in content or 'model_name' in content:
+                movement_type = content.get('movement_type')
+                model_name = content.get('model_name')
+                if not model_registry.has(movement_type, model_name):
+                    ws.send(json.dumps({'error': f"Model not found for movement '{movement_type}' with name '{model_name}'. Make sure the server has loaded it.", 'status': 'failure'}))
+                    continue
+                session = session_class.from_message(model_registry.get(movement_type, model_name), content)
+
+            if session is None:
+                ws.send(json.dumps({'error': 'Send movement_type and model_name before any frames.', 'status': 'failure'}))
+                continue
+
+            for reply in session.handle(content, quats):
+                ws.send(json.dumps(reply))
+        except Exception as e:
+            ws.send(json.dumps({'error': f"An unexpected error occurred during prediction: {str(e)}", 'status': 'failure'}))
+
+
+def register_streaming(app, model_registry):
+    """Adds the /predict/stream and /predict/session WebSocket routes to the Flask app.
+    Needs the optional flask-sock package."""
+    try:
+        from flask_sock import Sock
+    except ImportError:
+        print("WARNING: flask-sock is not installed, /predict/stream and /predict/session are disabled.")
+        return
+
+    sock = Sock(app)
+
+    @sock.route('/predict/stream')
+    def predict_stream(ws):
+        serve_session(ws, model_registry, StreamingSession)
+
+    @sock.route('/predict/session')
+    def predict_session(ws):
+        serve_session(ws, model_registry, SegmentingSession)
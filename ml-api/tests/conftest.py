@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The ml-api modules import each other by plain name, as when app.py is run from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
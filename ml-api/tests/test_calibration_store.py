@@ -0,0 +1,55 @@
+import os
+import time
+
+import numpy as np
+from calibration_store import CalibrationStore
+
+NPOSE = np.tile([1.0, 0.0, 0.0, 0.0], (5, 10, 1))
+
+
+def test_capacity_eviction_keeps_the_shared_file(tmp_path):
+    worker_a = CalibrationStore(max_entries=2, folder=str(tmp_path))
+    first = worker_a.create(NPOSE)
+    worker_a.create(NPOSE)
+    worker_a.create(NPOSE)      # pushes `first` out of worker A's memory
+    assert first.calibration_id not in worker_a.entries
+    assert os.path.exists(worker_a._path(first.calibration_id))
+    # Any worker, including A itself, still finds it in the folder
+    assert CalibrationStore(folder=str(tmp_path)).get(first.calibration_id) is not None
+    assert worker_a.get(first.calibration_id) is not None
+
+
+def test_expired_file_is_deleted(tmp_path):
+    store = CalibrationStore(ttl_seconds=1, folder=str(tmp_path))
+    old = store.create(NPOSE)
+    os.utime(store._path(old.calibration_id), (time.time() - 5, time.time() - 5))
+    store.entries[old.calibration_id][1] -= 5
+    new = store.create(NPOSE)
+    assert old.calibration_id not in store.entries
+    assert sorted(os.listdir(tmp_path)) == [f"{new.calibration_id}.npz"]
+
+
+def test_expired_entry_used_by_another_worker_keeps_its_file(tmp_path):
+    store = CalibrationStore(ttl_seconds=1, folder=str(tmp_path))
+    shared = store.create(NPOSE)
+    store.entries[shared.calibration_id][1] -= 5     # idle here, but the file's mtime is fresh
+    store.create(NPOSE)
+    assert os.path.exists(store._path(shared.calibration_id))
+
+
+def test_delete_reaches_other_workers(tmp_path):
+    worker_a = CalibrationStore(folder=str(tmp_path))
+    worker_b = CalibrationStore(folder=str(tmp_path))
+    calibration = worker_a.create(NPOSE)
+    assert worker_b.get(calibration.calibration_id) is not None
+    assert worker_a.delete(calibration.calibration_id)
+    assert worker_b.get(calibration.calibration_id) is None
+    assert calibration.calibration_id not in worker_b.entries
+
+
+def test_in_memory_store_writes_nothing():
+    store = CalibrationStore(max_entries=1)
+    first = store.create(NPOSE)
+    second = store.create(NPOSE)
+    assert store.get(first.calibration_id) is None
+    assert store.get(second.calibration_id) is second
@@ -0,0 +1,47 @@
+import numpy as np
+
+import feature_engine
+from feature_accumulator import MovementFeatureAccumulator, RunningStats
+
+
+def random_recording(frames=50, seed=0):
+    quats = np.random.default_rng(seed).normal(size=(frames, 10, 4))
+    return quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+
+
+def batch_features(quats):
+    return feature_engine.extract_features_for_movement(feature_engine.normalize_by_first_frame(quats))
+
+
+def test_frame_by_frame_matches_batch_features():
+    quats = random_recording()
+    accumulator = MovementFeatureAccumulator()
+    for frame in quats:
+        accumulator.add_frames(frame)
+    expected = batch_features(quats)
+    features = accumulator.features()
+    assert list(features) == list(expected)
+    np.testing.assert_allclose(list(features.values()), list(expected.values()), rtol=0, atol=1e-12)
+
+
+def test_chunks_of_any_size_match_batch_features():
+    quats = random_recording(seed=1)
+    accumulator = MovementFeatureAccumulator()
+    for start, stop in [(0, 1), (1, 7), (7, 8), (8, 31), (31, 50)]:
+        accumulator.add_frames(quats[start:stop])
+    assert accumulator.count == 50
+    np.testing.assert_allclose(accumulator.feature_vector(), list(batch_features(quats).values()), rtol=0, atol=1e-12)
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(2).normal(size=(30, 3))
+    stats = RunningStats(3)
+    stats.update_chunk(values[:10])
+    for row in values[10:12]:
+        stats.update(row)
+    stats.update_chunk(values[12:])
+    stats.update_chunk(values[:0])
+    np.testing.assert_allclose(stats.mean, values.mean(axis=0))
+    np.testing.assert_allclose(stats.std(), values.std(axis=0))
+    np.testing.assert_array_equal(stats.min, values.min(axis=0))
+    np.testing.assert_array_equal(stats.max, values.max(axis=0))
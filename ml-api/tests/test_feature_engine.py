@@ -0,0 +1,62 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+import app
+import feature_engine
+
+RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'dataAnalysisAndModeling',
+                         'ThesisDataSet', 'SitAndReach', 'User-B', 'SupportHand', 'movement_20250923_160618.pkl')
+
+
+def reference_features(frames):
+    """The original pyquaternion/DataFrame pipeline kept in app.py."""
+    return app.extract_features_for_movement(app.normalize_by_first_frame(app.reshape_from_request(frames)))
+
+
+def vectorized_features(frames):
+    return feature_engine.extract_features_for_movement(feature_engine.normalize_by_first_frame(feature_engine.frames_to_array(frames)))
+
+
+def assert_same_features(expected, actual):
+    assert list(actual) == list(expected)
+    np.testing.assert_allclose([actual[key] for key in expected], [expected[key] for key in expected], rtol=0, atol=1e-12)
+
+
+def test_matches_reference_on_a_recorded_take():
+    with open(RECORDING, 'rb') as f:
+        frames = pickle.load(f)['data']
+    assert_same_features(reference_features(frames), vectorized_features(frames))
+
+
+def test_matches_reference_on_random_unit_quaternions():
+    rng = np.random.default_rng(0)
+    quats = rng.normal(size=(60, 10, 4))
+    quats /= np.linalg.norm(quats, axis=-1, keepdims=True)
+    frames = quats.reshape(60, 40).tolist()
+    frames.insert(10, frames[10][:20])      # a short frame is skipped by both
+    assert_same_features(reference_features(frames), vectorized_features(frames))
+
+
+def test_feature_names_follow_the_dict_order():
+    frames = np.tile([0.0, 0.0, 0.0, 1.0], (3, 10)).tolist()
+    assert list(vectorized_features(frames)) == feature_engine.feature_names()
+
+
+def test_int16_packets_decode_like_frames():
+    rng = np.random.default_rng(1)
+    raw = rng.integers(-32768, 32767, size=(5, 10, 4), dtype=np.int16)
+    quats = feature_engine.decode_int16_packets(raw.astype('<i2').tobytes())
+    np.testing.assert_array_equal(quats, raw / 32768.0)
+    with pytest.raises(ValueError):
+        feature_engine.decode_int16_packets(b'\x00' * 81)
+
+
+def test_zero_first_frame_is_rejected():
+    quats = np.tile([1.0, 0.0, 0.0, 0.0], (4, 10, 1))
+    quats[0, 3] = 0
+    with pytest.raises(ValueError):
+        feature_engine.normalize_by_first_frame(quats)
+    assert feature_engine.normalize_by_first_frame(np.empty((0, 10, 4))) is None
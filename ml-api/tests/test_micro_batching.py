@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from batch_scheduler import InferenceScheduler
+from micro_batching import MicroBatcher
+
+
+def doubling_batcher(calls, max_batch_size=8, max_wait_ms=50):
+    def run_batch(items):
+        calls.append(list(items))
+        if any(item < 0 for item in items):
+            raise ValueError("negative input")
+        return [item * 2 for item in items]
+    return MicroBatcher(run_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+
+def test_concurrent_items_share_a_batch():
+    calls = []
+    batcher = doubling_batcher(calls)
+    futures = [batcher.submit(item) for item in range(5)]
+    assert [future.result(5) for future in futures] == [0, 2, 4, 6, 8]
+    assert len(calls) < 5
+    assert batcher.stats()['items'] == 5
+
+
+def test_batch_size_is_bounded():
+    calls = []
+    batcher = doubling_batcher(calls, max_batch_size=2)
+    futures = [batcher.submit(item) for item in range(5)]
+    assert [future.result(5) for future in futures] == [0, 2, 4, 6, 8]
+    assert max(len(call) for call in calls) <= 2
+
+
+def test_a_failing_item_fails_only_its_own_caller():
+    calls = []
+    batcher = doubling_batcher(calls)
+    futures = [batcher.submit(item) for item in (1, -1, 3)]
+    assert futures[0].result(5) == 2
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    assert futures[2].result(5) == 6
+
+
+def test_wrong_result_count_fails_every_caller():
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(item) for item in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(5)
+
+
+class FakeAssets:
+    """Scaler, model and label encoder in one: transform passes through, predict takes the feature "a"."""
+
+    def transform(self, features):
+        return features
+
+    def predict(self, features):
+        return list(features["a"])
+
+    def inverse_transform(self, encoded):
+        return [f"label-{value}" for value in encoded]
+
+
+class FakeRegistry:
+
+    def get(self, movement_type, model_name):
+        assets = FakeAssets()
+        return {"model": assets, "scaler": assets, "le": assets}
+
+
+def test_scheduler_returns_each_caller_its_label():
+    scheduler = InferenceScheduler(FakeRegistry(), max_batch_size=8, max_wait_ms=20)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, scheduler.predict("Move", "Model", {"a": i}, 5)))
+               for i in range(6)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert results == {i: f"label-{i}" for i in range(6)}
+    assert scheduler.stats()["Move/Model"]["items"] == 6
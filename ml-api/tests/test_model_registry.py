@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+from model_registry import ModelRegistry
+
+
+class FakeRegistry(ModelRegistry):
+    """Registry over 1000-byte placeholder files; "loading" returns the model name."""
+
+    def __init__(self, folder, names, max_bytes, failing=()):
+        super().__init__(str(folder), max_bytes=max_bytes)
+        self.failing = set(failing)
+        for name in names:
+            for prefix in ("final_model", "final_scaler", "final_label_encoder"):
+                (folder / f"{prefix}_Move_{name}.pkl").write_bytes(b"x" * 1000)
+        self.scan()
+
+    def load_assets(self, paths):
+        name = paths[0].rsplit("_", 1)[-1][:-len(".pkl")]
+        if name in self.failing:
+            raise OSError(f"cannot unpickle {name}")
+        return {"model": name, "scaler": None, "le": None}
+
+
+def test_lru_eviction_keeps_within_budget(tmp_path):
+    registry = FakeRegistry(tmp_path, ["A", "B", "C"], max_bytes=6000)
+    registry.get("Move", "A")
+    registry.get("Move", "B")
+    registry.get("Move", "C")
+    assert registry.loaded() == [("Move", "B"), ("Move", "C")]
+    assert registry.cached_bytes == 6000
+
+
+def test_hot_models_are_never_evicted(tmp_path):
+    registry = FakeRegistry(tmp_path, ["Hot", "B", "C", "D"], max_bytes=6000)
+    registry.preload(["Move/Hot"])
+    for name in ("B", "C", "D", "B"):
+        registry.get("Move", name)
+    loaded = registry.loaded()
+    assert ("Move", "Hot") in loaded
+    assert all(pair in loaded for pair in registry.expand(["Move/Hot"]))
+    assert len(loaded) == 2
+
+
+def test_hot_models_stay_when_they_exceed_the_budget(tmp_path):
+    registry = FakeRegistry(tmp_path, ["A", "B", "C"], max_bytes=3000)
+    registry.preload(["*"])
+    registry.get("Move", "A")
+    assert sorted(registry.loaded()) == [("Move", "A"), ("Move", "B"), ("Move", "C")]
+
+
+def test_failed_load_releases_its_lock(tmp_path):
+    registry = FakeRegistry(tmp_path, ["Broken"], max_bytes=6000, failing=["Broken"])
+    with pytest.raises(OSError):
+        registry.get("Move", "Broken")
+    assert registry.loading == {}
+    registry.failing.clear()
+    assert registry.get("Move", "Broken")["model"] == "Broken"
+    assert registry.loading == {}
+
+
+def test_concurrent_first_requests_load_once(tmp_path):
+    registry = FakeRegistry(tmp_path, ["A"], max_bytes=6000)
+    calls = []
+    load_assets = registry.load_assets
+    registry.load_assets = lambda paths: calls.append(paths) or load_assets(paths)
+    threads = [threading.Thread(target=registry.get, args=("Move", "A")) for _ in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert len(calls) == 1
@@ -0,0 +1,77 @@
+import numpy as np
+
+from rep_segmenter import RepetitionSegmenter, rms_angle, segment_recording
+
+RATE = 20
+ARM = ["lower_right_arm", "upper_right_arm"]
+
+
+def session(repetitions=3, hold=1.0, amplitude=1.2, seed=0):
+    """Rest, then `repetitions` times: raise the right arm over 1.5 s, hold it up, lower it, rest 2 s.
+    Returns (frames, 10, 4) w/x/y/z with a little sensor noise, and the (start, end) frame of every movement."""
+    angles, movements = [np.zeros(2 * RATE)], []
+    for _ in range(repetitions):
+        start = sum(map(len, angles))
+        angles += [np.linspace(0, amplitude, int(1.5 * RATE)), np.full(int(hold * RATE), amplitude),
+                   np.linspace(amplitude, 0, int(1.5 * RATE))]
+        movements.append((start, sum(map(len, angles))))
+        angles.append(np.zeros(2 * RATE))
+    angles = np.concatenate(angles)
+    quats = np.tile([1.0, 0.0, 0.0, 0.0], (len(angles), 10, 1))
+    quats[:, :2, 0] = np.cos(angles / 2)[:, None]
+    quats[:, :2, 3] = np.sin(angles / 2)[:, None]
+    quats += np.random.default_rng(seed).normal(scale=0.003, size=quats.shape)
+    return quats, movements
+
+
+def test_rms_angle():
+    identity = np.array([[1.0, 0.0, 0.0, 0.0]])
+    turned = np.array([[np.cos(0.25), 0.0, 0.0, np.sin(0.25)]])
+    assert np.isclose(rms_angle(identity, turned), 0.5)
+    assert rms_angle(identity, -identity) == 0
+    assert rms_angle(identity, np.zeros((1, 4))) == 0
+
+
+def test_finds_every_repetition_despite_the_hold_at_the_top():
+    quats, movements = session()
+    repetitions = segment_recording(quats, sensors=ARM, rate=RATE)
+    assert [repetition.number for repetition in repetitions] == [1, 2, 3]
+    for repetition, (start, end) in zip(repetitions, movements):
+        # Each repetition covers its whole movement, plus a little rest on both sides
+        assert repetition.start <= start and repetition.end >= end
+        assert repetition.end - repetition.start < end - start + 2 * RATE
+        assert not repetition.truncated
+        assert len(repetition.quats) == repetition.end - repetition.start
+
+
+def test_chunked_push_gives_the_same_repetitions():
+    quats, _ = session(seed=1)
+    whole = [(r.start, r.end) for r in segment_recording(quats, sensors=ARM, rate=RATE)]
+    segmenter = RepetitionSegmenter(sensors=ARM, rate=RATE)
+    chunked = []
+    for start in range(0, len(quats), 7):
+        chunked += [(r.start, r.end) for r in segmenter.push(quats[start:start + 7])]
+    last = segmenter.flush()
+    if last: chunked.append((last.start, last.end))
+    assert chunked == whole
+
+
+def test_long_movement_is_truncated_and_flush_closes_an_open_one():
+    quats, _ = session(repetitions=1, hold=3.0)
+    segmenter = RepetitionSegmenter(sensors=ARM, rate=RATE, max_duration=2.0)
+    closed = segmenter.push(quats[:5 * RATE])
+    assert [repetition.truncated for repetition in closed] == [True]
+    assert len(closed[0].quats) == 2 * RATE
+    # Still holding the arm up: nothing is open, so flush has nothing to close
+    assert segmenter.flush() is None
+    # An open repetition is closed by flush at the end of the session
+    segmenter = RepetitionSegmenter(sensors=ARM, rate=RATE)
+    segmenter.push(quats[:int(2.5 * RATE)])
+    last = segmenter.flush()
+    assert last is not None and last.end == int(2.5 * RATE)
+
+
+def test_still_session_has_no_repetitions():
+    quats = np.tile([1.0, 0.0, 0.0, 0.0], (10 * RATE, 10, 1))
+    quats += np.random.default_rng(2).normal(scale=0.003, size=quats.shape)
+    assert segment_recording(quats, rate=RATE) == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from pyquaternion import Quaternion
+
+from skeleton import PLAYBACK_VIEW, UPPER_BODY, Segment, Skeleton, joint_angle_features, rotate_vectors
+
+
+def random_quats(frames=6, seed=0):
+    quats = np.random.default_rng(seed).normal(size=(frames, 10, 4))
+    return quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+
+
+def reference_positions(skeleton, quats):
+    """One Quaternion.rotate per segment and frame, as the visualize.py scripts did."""
+    positions = np.zeros((len(quats), len(skeleton.joints), 3))
+    for f, frame in enumerate(quats):
+        for k, segment in enumerate(skeleton.segments):
+            world = (Quaternion(*skeleton.alignment[k]) * Quaternion(*frame[segment.sensor]).normalised
+                     * Quaternion(*segment.mounting))
+            parent = skeleton.index[segment.parent]
+            positions[f, k + 1] = positions[f, parent] + world.rotate(segment.bone)
+    return positions
+
+
+def test_rotate_vectors_matches_pyquaternion():
+    quats = random_quats()[:, 0]
+    vectors = np.random.default_rng(1).normal(size=(len(quats), 3))
+    expected = [Quaternion(*q).rotate(v) for q, v in zip(quats, vectors)]
+    np.testing.assert_allclose(rotate_vectors(quats, vectors), expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("skeleton", [UPPER_BODY, PLAYBACK_VIEW])
+def test_joint_positions_match_per_segment_rotation(skeleton):
+    quats = random_quats(seed=2)
+    np.testing.assert_allclose(skeleton.joint_positions(quats), reference_positions(skeleton, quats), atol=1e-12)
+
+
+def test_identity_pose_stands_upright_with_straight_arms():
+    identity = np.tile([1.0, 0.0, 0.0, 0.0], (1, 10, 1))
+    positions = UPPER_BODY.joint_positions(identity)[0]
+    np.testing.assert_allclose(positions[UPPER_BODY.index["neck"]], [0, 4, 0], atol=1e-12)
+    angles = dict(zip(UPPER_BODY.angle_names(), UPPER_BODY.joint_angles(identity)[0]))
+    assert angles["right_elbow"] == pytest.approx(0)
+    assert angles["left_elbow"] == pytest.approx(0)
+
+
+def test_joint_angle_features_have_every_stat():
+    features = joint_angle_features(random_quats(seed=3))
+    assert len(features) == 5 * len(UPPER_BODY.angle_names())
+    assert all(0 <= value <= 180 for key, value in features.items() if not key.endswith("_std"))
+
+
+def test_parent_must_be_declared_first():
+    with pytest.raises(ValueError):
+        Skeleton([Segment("elbow", 0, "shoulder"), Segment("shoulder", 1, "root")])
@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import streaming
+
+
+class FakeSocket:
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.sent = []
+
+    def receive(self):
+        return self.messages.pop(0) if self.messages else None
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+class FakeModel:
+
+    def transform(self, features):
+        return features
+
+    def predict(self, features):
+        return [0]
+
+    def inverse_transform(self, encoded):
+        return ["Correct"]
+
+
+class FakeRegistry:
+
+    def has(self, movement_type, model_name):
+        return (movement_type, model_name) == ("Move", "Model")
+
+    def get(self, movement_type, model_name):
+        return {"model": FakeModel(), "scaler": FakeModel(), "le": FakeModel()}
+
+
+def frames(count):
+    # Pickle layout (x, y, z, w per sensor): identity orientation on every sensor
+    return np.tile([0.0, 0.0, 0.0, 1.0], (count, 10)).tolist()
+
+
+def test_stream_needs_a_model_first():
+    ws = FakeSocket([json.dumps({"frames": frames(2)}),
+                     json.dumps({"movement_type": "Move", "model_name": "Nope"})])
+    streaming.serve_session(ws, FakeRegistry(), streaming.StreamingSession)
+    assert [reply["status"] for reply in ws.sent] == ["failure", "failure"]
+    assert "before any frames" in ws.sent[0]["error"]
+    assert "Model not found" in ws.sent[1]["error"]
+
+
+def test_stream_predicts_every_n_frames_and_resets():
+    ws = FakeSocket([json.dumps({"movement_type": "Move", "model_name": "Model", "every": 4}),
+                     json.dumps({"frames": frames(9)}),
+                     json.dumps({"reset": True, "frames": frames(4)})])
+    streaming.serve_session(ws, FakeRegistry(), streaming.StreamingSession)
+    assert [(reply["frames"], reply["prediction"]) for reply in ws.sent] == [(4, "Correct"), (8, "Correct"), (4, "Correct")]
+
+
+def test_stream_reports_bad_messages_and_keeps_going():
+    ws = FakeSocket([json.dumps({"movement_type": "Move", "model_name": "Model", "every": 2}),
+                     "not json",
+                     json.dumps({"frames": frames(2)})])
+    streaming.serve_session(ws, FakeRegistry(), streaming.StreamingSession)
+    assert ws.sent[0]["status"] == "failure"
+    assert ws.sent[1]["frames"] == 2
+
+
+def test_session_finishes_on_end():
+    ws = FakeSocket([json.dumps({"movement_type": "Move", "model_name": "Model"}),
+                     json.dumps({"frames": frames(40), "end": True})])
+    streaming.serve_session(ws, FakeRegistry(), streaming.SegmentingSession)
+    assert ws.sent == [{"repetitions": 0, "status": "finished"}]
+
+
+def test_session_scores_each_repetition():
+    # Rest, one 1 rad rotation of every sensor out and back over 2 s, rest
+    angles = np.concatenate([np.zeros(20), np.linspace(0, 1, 20), np.linspace(1, 0, 20), np.zeros(30)])
+    pickle_frames = [[0.0, 0.0, np.sin(angle / 2), np.cos(angle / 2)] * 10 for angle in angles]
+    ws = FakeSocket([json.dumps({"movement_type": "Move", "model_name": "Model"}),
+                     json.dumps({"frames": pickle_frames}),
+                     json.dumps({"end": True})])
+    streaming.serve_session(ws, FakeRegistry(), streaming.SegmentingSession)
+    assert [reply.get("repetition") for reply in ws.sent] == [1, None]
+    assert ws.sent[0]["prediction"] == "Correct"
+    assert ws.sent[-1] == {"repetitions": 1, "status": "finished"}
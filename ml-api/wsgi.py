@@ -0,0 +1,11 @@
+import gc
+from app import create_app
+
+# WSGI entry point for production, e.g.:  gunicorn -c gunicorn.conf.py wsgi:app
+# With preload_app the models are loaded once here, in the gunicorn master, and the forked
+# workers share those pages copy-on-write instead of each unpickling their own copy.
+app = create_app()
+
+# Move everything loaded so far out of the garbage collector's reach, so collections in the
+# workers don't touch (and thereby copy) the shared model objects.
+gc.freeze()
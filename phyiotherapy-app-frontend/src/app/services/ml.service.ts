@@ -8,11 +8,24 @@ export interface MlPredictionResponse {
   status: string;
 }
 
+export interface MlBatchMovement {
+  movement_data: number[][];
+  movement_type: string;
+  model_name: string;
+}
+
+export interface MlBatchPredictionResponse {
+  // One entry per movement, in request order. Failed entries carry 'error' instead of 'prediction'.
+  predictions: { prediction?: string; error?: string; status: string }[];
+  status: string;
+}
+
 @Injectable({
   providedIn: 'root'
 })
 export class MlService {
   private predictApiUrl = 'http://localhost:8080/api/predict';
+  private predictBatchApiUrl = 'http://localhost:8080/api/predict/batch';
 
   constructor(private http: HttpClient) { }
 
@@ -30,4 +43,9 @@ export class MlService {
 
     return this.http.post<MlPredictionResponse>(this.predictApiUrl, body);
   }
+
+  // Evaluates several repetitions (possibly for different models) in a single request.
+  evaluateMovements(movements: MlBatchMovement[]): Observable<MlBatchPredictionResponse> {
+    return this.http.post<MlBatchPredictionResponse>(this.predictBatchApiUrl, { movements });
+  }
 }
@@ -63,4 +63,30 @@ public class MovementController {
             return ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR).body("{\"error\": \"Internal Server Error: " + e.getMessage() + "\"}");
         }
     }
+
+    // Birden fazla tekrarı tek istekte değerlendirir
+    // Beklenen gövde: { "movements": [ { "movement_data": ..., "movement_type": "...", "model_name": "..." }, ... ] }
+    @PostMapping("/predict/batch")
+    public ResponseEntity<?> predictMovementBatch(@RequestBody Map<String, Object> requestBody) {
+        try {
+            HttpHeaders headers = new HttpHeaders();
+            headers.setContentType(MediaType.APPLICATION_JSON);
+            HttpEntity<Map<String, Object>> entity = new HttpEntity<>(requestBody, headers);
+
+            String pythonApiEndpoint = mlServiceUrl + "/predict/batch";
+            System.out.println("Forwarding batch request to Python API: " + pythonApiEndpoint);
+
+            ResponseEntity<JsonNode> pythonResponse = restTemplate.postForEntity(
+                    pythonApiEndpoint, entity, JsonNode.class
+            );
+            return ResponseEntity.status(pythonResponse.getStatusCode()).body(pythonResponse.getBody());
+
+        } catch (HttpClientErrorException e) {
+            System.err.println("Error from Python ML Service: " + e.getStatusCode() + " - " + e.getResponseBodyAsString());
+            return ResponseEntity.status(e.getStatusCode()).body(e.getResponseBodyAsString());
+        } catch (Exception e) {
+            System.err.println("Unexpected error during batch prediction: " + e.getMessage());
+            return ResponseEntity.status(HttpStatus.INTERNAL_SERVER_ERROR).body("{\"error\": \"Internal Server Error: " + e.getMessage() + "\"}");
+        }
+    }
 }